@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Generators of synthetic GND, MeSH and DDC source files."""
+
+import random
+
+import yaml
+from lxml import etree
+
+from invenio_vocabularies_extra.datastreams.iso2709 import (
+    FIELD_TERMINATOR,
+    LEADER_LENGTH,
+    RECORD_TERMINATOR,
+    SUBFIELD_DELIMITER,
+)
+
+MARC21_NS = "http://www.loc.gov/MARC21/slim"
+
+WORDS = (
+    "Abendmahl Bibliothek Chemie Datenbank Erdkunde Forschung Geschichte "
+    "Handschrift Informatik Jugend Kunst Literatur Musik Naturschutz Ordnung "
+    "Philosophie Quelle Recht Sprache Technik Umwelt Verkehr Wirtschaft Zeit"
+).split()
+
+
+def _datafield(tag, *subfields):
+    """MARC21-xml datafield with the given (code, value) subfields."""
+    subs = "".join(
+        f'<subfield code="{code}">{value}</subfield>' for code, value in subfields
+    )
+    return f'<datafield tag="{tag}" ind1=" " ind2=" ">{subs}</datafield>'
+
+
+def _term(rng):
+    """Random term of one or two words."""
+    return " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+
+
+def dump_iso2709(record):
+    """Encodes a MARC21-xml record element as a raw binary record."""
+    leader = "00000nz  a2200000n  4500"
+    directory = []
+    fields = []
+    position = 0
+    for child in record:
+        if not isinstance(child.tag, str):
+            continue
+        name = etree.QName(child).localname
+        if name == "leader":
+            leader = child.text
+            continue
+        if name == "controlfield":
+            body = child.text or ""
+        elif name == "datafield":
+            body = (child.get("ind1") or " ") + (child.get("ind2") or " ")
+            for subfield in child:
+                body += (
+                    SUBFIELD_DELIMITER + subfield.get("code") + (subfield.text or "")
+                )
+        else:
+            continue
+        field = body.encode("utf-8") + FIELD_TERMINATOR
+        directory.append(
+            b"%s%04d%05d" % (child.get("tag").encode(), len(field), position)
+        )
+        fields.append(field)
+        position += len(field)
+
+    directory = b"".join(directory) + FIELD_TERMINATOR
+    base = LEADER_LENGTH + len(directory)
+    length = base + position + len(RECORD_TERMINATOR)
+    leader = (
+        b"%05d" % length
+        + leader[5:9].encode("ascii")
+        + b"a"
+        + leader[10:12].encode("ascii")
+        + b"%05d" % base
+        + leader[17:24].encode("ascii")
+    )
+    return leader + directory + b"".join(fields) + RECORD_TERMINATOR
+
+
+def gnd_record(idx, rng):
+    """Synthetic GND subject record following the structure of the DNB dump."""
+    gnd_id = f"{4000000 + idx}-{idx % 10}"
+    heading = [("a", _term(rng))]
+    if rng.random() < 0.2:
+        heading.append(("x", _term(rng)))
+    if rng.random() < 0.1:
+        heading.append(("g", _term(rng)))
+    fields = [
+        "<leader>00000nz  a2200000nc 4500</leader>",
+        f'<controlfield tag="001">{idx:09d}</controlfield>',
+        '<controlfield tag="003">DE-101</controlfield>',
+        '<controlfield tag="005">20240101120000.0</controlfield>',
+        _datafield("024", ("a", gnd_id), ("0", f"http://d-nb.info/gnd/{gnd_id}")),
+        _datafield("035", ("a", f"(DE-101){idx:09d}")),
+        _datafield("035", ("a", f"(DE-588){gnd_id}")),
+        _datafield("040", ("a", "DE-101"), ("c", "DE-101"), ("9", "r:DE-101")),
+        _datafield("065", ("a", "12.2p"), ("2", "sswd")),
+        _datafield("075", ("b", "s"), ("2", "gndgen")),
+        _datafield("075", ("b", "saz"), ("2", "gndspec")),
+        _datafield("079", ("a", "g"), ("q", "s")),
+        _datafield("150", *heading),
+    ]
+    for _ in range(rng.randint(0, 8)):
+        synonym = [("a", _term(rng))]
+        if rng.random() < 0.1:
+            synonym.append(("x", _term(rng)))
+        if rng.random() < 0.05:
+            synonym.append(("g", _term(rng)))
+        fields.append(_datafield("450", *synonym))
+    for _ in range(rng.randint(0, 4)):
+        fields.append(
+            _datafield(
+                "550",
+                ("0", f"https://d-nb.info/gnd/{rng.randint(1, 10**6)}-0"),
+                ("a", _term(rng)),
+                ("4", "obge"),
+                ("w", "r"),
+                ("i", "Oberbegriff generisch"),
+            )
+        )
+    fields.append(_datafield("670", ("a", "Vorlage")))
+    for lang in rng.sample(["L:eng", "L:fre", "L:ita"], rng.randint(0, 3)):
+        fields.append(
+            _datafield(
+                "750",
+                ("0", f"(DLC)sh{rng.randint(10**7, 10**8)}"),
+                ("a", _term(rng)),
+                ("4", "EQ" if rng.random() < 0.9 else "CLOSE"),
+                ("9", lang),
+            )
+        )
+    return f'<record xmlns="{MARC21_NS}" type="Authority">{"".join(fields)}</record>'
+
+
+def gnd_records(count, seed=42):
+    """Parsed synthetic GND subject records."""
+    rng = random.Random(seed)
+    return [etree.fromstring(gnd_record(idx, rng)) for idx in range(count)]
+
+
+def write_gnd_collection(path, count, seed=42):
+    """Writes a MARC21-xml collection of synthetic GND subject records."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write(f'<collection xmlns="{MARC21_NS}">\n')
+        for idx in range(count):
+            fp.write(gnd_record(idx, rng).replace(f' xmlns="{MARC21_NS}"', ""))
+            fp.write("\n")
+        fp.write("</collection>\n")
+
+
+def write_gnd_iso2709(path, count, seed=42):
+    """Writes the same synthetic GND subject records as binary MARC21."""
+    rng = random.Random(seed)
+    with open(path, "wb") as fp:
+        for idx in range(count):
+            fp.write(dump_iso2709(etree.fromstring(gnd_record(idx, rng))))
+
+
+def _mesh_term(rng, term, preferred, permuted):
+    """MeSH term of a concept."""
+    return (
+        f'<Term ConceptPreferredTermYN="{preferred}" IsPermutedTermYN="{permuted}" '
+        'LexicalTag="NON" RecordPreferredTermYN="N">'
+        f"<TermUI>T{rng.randint(0, 10**9 - 1):09d}</TermUI><String>{term}</String>"
+        "</Term>"
+    )
+
+
+def mesh_descriptor(idx, rng):
+    """Synthetic bilingual MeSH descriptor record."""
+    title_de = _term(rng)
+    title_en = _term(rng)
+    terms = [_mesh_term(rng, title_en, "Y", "N"), _mesh_term(rng, title_de, "Y", "N")]
+    for _ in range(rng.randint(0, 8)):
+        terms.append(_mesh_term(rng, _term(rng), "N", rng.choice("NY")))
+    return (
+        '<DescriptorRecord DescriptorClass="1">'
+        f"<DescriptorUI>D{idx:06d}</DescriptorUI>"
+        f"<DescriptorName><String>{title_de}[{title_en}]</String></DescriptorName>"
+        "<DateCreated><Year>1999</Year><Month>01</Month><Day>01</Day></DateCreated>"
+        f"<TreeNumberList><TreeNumber>J01.{idx % 1000:03d}</TreeNumber></TreeNumberList>"
+        '<ConceptList><Concept PreferredConceptYN="Y">'
+        f"<ConceptUI>M{idx:07d}</ConceptUI>"
+        f"<ConceptName><String>{title_de}[{title_en}]</String></ConceptName>"
+        f"<TermList>{''.join(terms)}</TermList>"
+        "</Concept></ConceptList>"
+        "</DescriptorRecord>"
+    )
+
+
+def write_mesh_descriptors(path, count, seed=42):
+    """Writes a MeSH DescriptorRecordSet of synthetic descriptor records."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write('<DescriptorRecordSet LanguageCode="ger">\n')
+        for idx in range(count):
+            fp.write(mesh_descriptor(idx, rng))
+            fp.write("\n")
+        fp.write("</DescriptorRecordSet>\n")
+
+
+def write_ddc_yaml(path, count, seed=42):
+    """Writes a DDC YAML file of synthetic notations."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as fp:
+        for idx in range(count):
+            entry = {"id": f"{idx // 1000:03d}.{idx % 1000:03d}"}
+            entry["en"] = _term(rng)
+            entry["de"] = _term(rng)
+            yaml.safe_dump([entry], fp, allow_unicode=True, sort_keys=False)
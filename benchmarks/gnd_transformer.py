@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Micro-benchmark of the GND subjects transformer.
+
+Usage:
+    python -m benchmarks.gnd_transformer [--records 20000] [--repeat 3]
+"""
+
+import argparse
+import time
+
+from invenio_vocabularies.datastreams import StreamEntry
+
+from invenio_vocabularies_extra.contrib.subjects.gnd.datastreams import (
+    GNDSubjectMarc21Transformer,
+)
+
+from .generators import gnd_records
+
+
+def run(records, repeat):
+    """Best records per second of the transformer over the given records."""
+    transformer = GNDSubjectMarc21Transformer()
+    best = 0
+    for _ in range(repeat):
+        entries = [StreamEntry({"record": record}) for record in records]
+        start = time.perf_counter()
+        for entry in entries:
+            transformer.apply(entry)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(records) / elapsed)
+    return best
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = gnd_records(args.records)
+    rate = run(records, args.repeat)
+    print(f"GNDSubjectMarc21Transformer: {rate:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Throughput and memory benchmarks of the readers and transformers.
+
+Every case runs in its own process on synthetic source files, so that the
+peak RSS is measured per case.
+
+Usage:
+    python -m benchmarks.suite [--sizes 10000 100000 1000000] [--output results.json]
+
+The ``gnd-binary`` source holds the same records as ``gnd`` in binary
+MARC21, comparing both full import paths:
+
+    python -m benchmarks.suite --sources gnd gnd-binary --cases datastream
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from flask import Flask
+from invenio_i18n import InvenioI18N
+from invenio_vocabularies.datastreams import DataStream, StreamEntry
+from invenio_vocabularies.datastreams.writers import BaseWriter
+
+from invenio_vocabularies_extra import __version__
+from invenio_vocabularies_extra.contrib.subjects.ddc.datastreams import (
+    DdcYamlTransformer,
+)
+from invenio_vocabularies_extra.contrib.subjects.gnd.datastreams import (
+    GNDSubjectMarc21Transformer,
+)
+from invenio_vocabularies_extra.contrib.subjects.mesh.datastreams import (
+    MeSHSubjectXMLTransformer,
+)
+from invenio_vocabularies_extra.datastreams.readers import (
+    DdcReader,
+    Marc21BinaryReader,
+    Marc21CollectionReader,
+    MeshReader,
+)
+
+from .generators import (
+    write_ddc_yaml,
+    write_gnd_collection,
+    write_gnd_iso2709,
+    write_mesh_descriptors,
+)
+
+SOURCES = {
+    "gnd": ("gnd.mrc.xml", write_gnd_collection),
+    # the same records as "gnd"
+    "gnd-binary": ("gnd.mrc", write_gnd_iso2709),
+    "mesh": ("mesh.xml", write_mesh_descriptors),
+    "ddc": ("ddc.yaml", write_ddc_yaml),
+}
+"""Synthetic source file and generator per vocabulary."""
+
+
+class NullWriter(BaseWriter):
+    """Writer discarding all entries."""
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Discards the entry."""
+        return stream_entry
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Discards the entries."""
+        return stream_entries
+
+
+def create_app():
+    """Minimal application providing the context the transformers need."""
+    app = Flask("benchmarks")
+    app.config.update(
+        VOCABULARIES_EXTRA_SUBJECTS_DDC_LANG="de",
+        VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG="de",
+        I18N_LANGUAGES=[("de", "German")],
+    )
+    InvenioI18N(app)
+    return app
+
+
+def _reader(source, path, serialize=True):
+    """Reader of a vocabulary source file."""
+    if source == "gnd":
+        return Marc21CollectionReader(origin=path, serialize=serialize)
+    if source == "gnd-binary":
+        return Marc21BinaryReader(origin=path)
+    if source == "mesh":
+        return MeshReader(origin=path, serialize=serialize)
+    return DdcReader(origin=path)
+
+
+def _transformer(source):
+    """Transformer of a vocabulary source."""
+    return {
+        "gnd": GNDSubjectMarc21Transformer,
+        "gnd-binary": GNDSubjectMarc21Transformer,
+        "mesh": MeSHSubjectXMLTransformer,
+        "ddc": DdcYamlTransformer,
+    }[source]()
+
+
+def bench_reader(source, path):
+    """Reads all records, returns ``(records, seconds)``."""
+    reader = _reader(source, path)
+    count = 0
+    start = time.perf_counter()
+    for _ in reader.read():
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def bench_transformer(source, path):
+    """Transforms all records, only the transformation is timed."""
+    reader = _reader(source, path, serialize=False)
+    transformer = _transformer(source)
+    count = 0
+    elapsed = 0
+    for entry in reader.read():
+        stream_entry = StreamEntry(entry)
+        start = time.perf_counter()
+        transformer.apply(stream_entry)
+        elapsed += time.perf_counter() - start
+        count += 1
+    return count, elapsed
+
+
+def bench_datastream(source, path):
+    """Reads and transforms all records into a null writer."""
+    datastream = DataStream(
+        readers=[_reader(source, path, serialize=False)],
+        transformers=[_transformer(source)],
+        writers=[NullWriter()],
+        batch_size=1000,
+    )
+    count = 0
+    start = time.perf_counter()
+    for _ in datastream.process():
+        count += 1
+    return count, time.perf_counter() - start
+
+
+CASES = {
+    "reader": bench_reader,
+    "transformer": bench_transformer,
+    "datastream": bench_datastream,
+}
+"""Benchmark cases, each run for every vocabulary source."""
+
+
+def run_case(case, source, path):
+    """Runs a single case in the current process."""
+    app = create_app()
+    with app.app_context():
+        count, seconds = CASES[case](source, path)
+    return {
+        "case": case,
+        "source": source,
+        "records": count,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(count / seconds) if seconds else None,
+        # kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_suite(sizes, sources, cases, workdir):
+    """Generates the source files and runs every case in a subprocess."""
+    results = []
+    for size in sizes:
+        for source in sources:
+            filename, generate = SOURCES[source]
+            path = os.path.join(workdir, f"{size}-{filename}")
+            generate(path, size)
+            for case in cases:
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.suite"]
+                    + ["--case", case, "--source", source, "--file", path],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                result = json.loads(output)
+                result["size"] = size
+                results.append(result)
+                print(
+                    f"{source:5} {case:12} {size:>9,}: "
+                    f"{result['records_per_second'] or 0:>10,} records/s, "
+                    f"peak RSS {result['peak_rss_kb'] / 1024:,.1f} MiB",
+                    file=sys.stderr,
+                )
+            os.remove(path)
+    return results
+
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000])
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=SOURCES)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--output", help="JSON file for the results")
+    # internal: run a single case in this process
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--source", choices=SOURCES, help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.source, args.file)))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args.sizes, args.sources, args.cases, workdir)
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,75 @@
 
 """Add some extras to the vocabularies module like DDC and GND subjects.."""
 
-from .datastreams.readers import Marc21CollectionReader, MeshReader
+from importlib.resources import files
+
+from .datastreams.readers import (
+    CachedHTTPReader,
+    DdcReader,
+    Marc21BinaryReader,
+    Marc21CollectionReader,
+    Marc21ShardReader,
+    MeshJoinReader,
+    MeshReader,
+    PrefetchingOAIPMHReader,
+    SnapshotReader,
+    SpooledHTTPReader,
+    ThreadedGzipReader,
+    ThreadedZipReader,
+)
+from .datastreams.writers import SnapshotWriter, SubjectsBulkWriter
+
+VOCABULARIES_EXTRA_CACHE_DIR = None
+"""Directory for cached vocabulary source files, defaults to a folder in the instance path."""
+
+VOCABULARIES_EXTRA_SOURCE_CACHE_DIR = None
+"""Directory of the downloaded source files, defaults to ``sources`` in VOCABULARIES_EXTRA_CACHE_DIR."""
+
+VOCABULARIES_EXTRA_SOURCE_CACHE_MAX_SIZE = 20 * 1024**3
+"""Maximum total size of the downloaded source files in bytes, least recently used files are evicted beyond it."""
+
+VOCABULARIES_EXTRA_SOURCE_CACHE_MAX_AGE = 90 * 24 * 60 * 60
+"""Seconds after which unused downloaded source files are evicted, None keeps them."""
+
+VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED = False
+"""Skip the full imports if their source file did not change since it was last imported completely."""
+
+VOCABULARIES_EXTRA_HTTP_SPOOL_MAX_MEMORY = 64 * 1024**2
+"""Size in bytes up to which the ``http-spooled`` reader keeps a download in memory, larger downloads are spooled to disk."""
+
+VOCABULARIES_EXTRA_OAI_READ_AHEAD = 2
+"""Number of OAI-PMH pages fetched ahead while the current page is transformed."""
+
+VOCABULARIES_EXTRA_DECOMPRESS_BUFFER = 8
+"""Number of 1 MiB chunks the gzip-threaded and zip-threaded readers decompress ahead in a background thread."""
 
 VOCABULARIES_EXTRA_SUBJECTS_DDC_LANG = "de"
 """Default lang getting mapped to vocabularies' subject."""
 
+VOCABULARIES_EXTRA_SUBJECTS_DDC_FILE_URL = str(
+    files("invenio_vocabularies_extra") / "data" / "ddc.yaml"
+)
+"""URI or path to the DDC file, a YAML, JSON Lines or CSV export with the captions per language, defaults to the DDC file of the package."""
+
 VOCABULARIES_EXTRA_SUBJECTS_GND_FILE_URL = (
     "https://data.dnb.de/GND/authorities-gnd-sachbegriff_dnbmarc_20241013.mrc.xml.gz"
 )
 """URI to the full GND subjects authorities file."""
 
+VOCABULARIES_EXTRA_SUBJECTS_GND_BINARY_FILE_URL = (
+    "https://data.dnb.de/GND/authorities-gnd-sachbegriff_dnbmarc_20241013.mrc.gz"
+)
+"""URI to the full GND subjects authorities file in binary MARC21 (ISO 2709)."""
+
+VOCABULARIES_EXTRA_SUBJECTS_GND_HARVEST_WINDOW = 6 * 60 * 60
+"""Seconds of GND subjects updates harvested per task, larger gaps are harvested in concurrent windows."""
+
+VOCABULARIES_EXTRA_SUBJECTS_GND_HARVEST_MAX_WINDOWS = 8
+"""Maximum number of concurrent windows of a GND subjects updates harvest, windows are widened beyond it."""
+
+VOCABULARIES_EXTRA_SUBJECTS_GND_SHARDS = 8
+"""Number of parallel sub-tasks the sharded import of the full GND subjects file is split into."""
+
 VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG = "de"
 """Additional language in MeSH authorities file, must be part of I18N_LANGUAGES."""
 
@@ -26,7 +85,93 @@ VOCABULARIES_EXTRA_SUBJECTS_MESH_FILE_URL = (
 )
 """URI to the MeSH authorities file. Provide an URI fitting to VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG."""
 
+VOCABULARIES_EXTRA_SUBJECTS_MESH_FILE_URLS = {
+    "de": "https://repository.publisso.de/resource/frl:6473340/data",
+}
+"""URIs or paths of the MeSH descriptor files by language for the multilingual import, e.g. add ``"fr"`` with a French translation."""
+
+VOCABULARIES_EXTRA_JOIN_MAX_PENDING = 100000
+"""Number of incompletely joined entries kept in memory when joining several source files, more are spilled to a temporary file."""
+
+VOCABULARIES_EXTRA_TRANSFORM_WORKERS = None
+"""Number of worker processes transforming entries of the full imports, None starts one per CPU, 1 transforms them in the task's process."""
+
+VOCABULARIES_EXTRA_TRANSFORM_APP_FACTORY = "invenio_app.factory:create_api"
+"""Import path of the application factory of the transform worker processes, each creates its own application."""
+
+VOCABULARIES_EXTRA_BULK_WRITER_BATCH_SIZE = 500
+"""Number of subjects the bulk writer upserts in one transaction and search bulk request."""
+
+VOCABULARIES_EXTRA_CHECKPOINT_INTERVAL = 10000
+"""Number of committed entries after which the full imports persist their checkpoint and manifest, saved at the end of a batch."""
+
+VOCABULARIES_EXTRA_SUBJECTS_CACHE_SIZE = 10000
+"""Number of subjects kept in the in-process cache of the subject resolver."""
+
+VOCABULARIES_EXTRA_SUBJECTS_CACHE_TTL = 300
+"""Seconds a subject is kept in the in-process cache of the subject resolver."""
+
+VOCABULARIES_EXTRA_SUBJECTS_CACHE_REDIS_URL = None
+"""Redis URL of the subjects cache shared by all processes, e.g. ``redis://localhost:6379/2``, None disables it."""
+
+VOCABULARIES_EXTRA_SUBJECTS_CACHE_REDIS_TTL = 24 * 60 * 60
+"""Seconds a subject is kept in the shared subjects cache."""
+
+VOCABULARIES_EXTRA_SUBJECTS_CACHE_WARM = False
+"""Put the subjects written by the imports into the shared subjects cache, requires VOCABULARIES_EXTRA_SUBJECTS_CACHE_REDIS_URL."""
+
+VOCABULARIES_EXTRA_PREFIX_INDEX_DIR = None
+"""Directory of the prefix indexes for subject autocompletion, defaults to ``prefix-index`` in VOCABULARIES_EXTRA_CACHE_DIR."""
+
+VOCABULARIES_EXTRA_PREFIX_INDEX_TOP_K = 20
+"""Number of suggestions ranked in advance for the prefixes matching many labels, the maximum suggested for them."""
+
+VOCABULARIES_EXTRA_PREFIX_INDEX_MAX_SCAN = 200
+"""Maximum number of labels a prefix lookup ranks, prefixes matching more are ranked in advance."""
+
+VOCABULARIES_EXTRA_PREFIX_INDEX_RELOAD_INTERVAL = 5
+"""Seconds between two checks of the web processes for a rebuilt prefix index."""
+
+VOCABULARIES_EXTRA_SNAPSHOT_DIR = None
+"""Directory of the snapshots of the transformed entries, defaults to ``snapshots`` in VOCABULARIES_EXTRA_CACHE_DIR."""
+
+VOCABULARIES_EXTRA_PROFILE_DIR = None
+"""Directory of the reports of the profiling job, defaults to ``profiles`` in VOCABULARIES_EXTRA_CACHE_DIR."""
+
+VOCABULARIES_EXTRA_PROFILE_LIMIT = 10000
+"""Number of entries the profiling job reads and transforms, unless a fraction is given."""
+
+VOCABULARIES_EXTRA_PROFILE_INTERVAL = 0.005
+"""Seconds between two stack samples of the profiling job."""
+
+VOCABULARIES_EXTRA_PROFILE_TOP = 25
+"""Number of functions and source lines listed in the reports of the profiling job."""
+
+VOCABULARIES_EXTRA_DATASTREAM_STATS = False
+"""Log per-stage timing and counters of the full imports, also set per datastream config with ``stats``."""
+
+VOCABULARIES_EXTRA_DATASTREAM_STATS_SAMPLE = 10
+"""One in this many per-record calls of a stage is timed by the datastream stats, the counters are exact."""
+
+VOCABULARIES_EXTRA_DATASTREAM_STATSD = None
+"""StatsD target of the datastream stats, e.g. ``{"host": "localhost", "port": 8125, "prefix": "invenio.vocabularies"}``."""
+
 VOCABULARIES_DATASTREAM_READERS = {
+    "ddc": DdcReader,
+    "gzip-threaded": ThreadedGzipReader,
+    "http-cached": CachedHTTPReader,
+    "http-spooled": SpooledHTTPReader,
     "marc21": Marc21CollectionReader,
+    "marc21-binary": Marc21BinaryReader,
+    "marc21-shard": Marc21ShardReader,
+    "mesh-join": MeshJoinReader,
     "mesh-xml": MeshReader,
+    "oai-pmh-prefetch": PrefetchingOAIPMHReader,
+    "snapshot": SnapshotReader,
+    "zip-threaded": ThreadedZipReader,
+}
+
+VOCABULARIES_DATASTREAM_WRITERS = {
+    "snapshot": SnapshotWriter,
+    "subjects-bulk": SubjectsBulkWriter,
 }
@@ -11,10 +11,22 @@
 from flask import current_app
 from werkzeug.local import LocalProxy
 
+ddc_file_url = LocalProxy(
+    lambda: current_app.config["VOCABULARIES_EXTRA_SUBJECTS_DDC_FILE_URL"]
+)
+
 gnd_file_url = LocalProxy(
     lambda: current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_FILE_URL"]
 )
 
+gnd_binary_file_url = LocalProxy(
+    lambda: current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_BINARY_FILE_URL"]
+)
+
 mesh_file_url = LocalProxy(
     lambda: current_app.config["VOCABULARIES_EXTRA_SUBJECTS_MESH_FILE_URL"]
 )
+
+mesh_file_urls = LocalProxy(
+    lambda: current_app.config["VOCABULARIES_EXTRA_SUBJECTS_MESH_FILE_URLS"]
+)
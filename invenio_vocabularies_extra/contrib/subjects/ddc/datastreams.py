@@ -13,6 +13,9 @@ from invenio_i18n.proxies import current_i18n
 from invenio_vocabularies.contrib.subjects.datastreams import SubjectsServiceWriter
 from invenio_vocabularies.datastreams.transformers import BaseTransformer
 
+from ....datastreams.writers import SubjectsBulkWriter
+from ..config import ddc_file_url
+
 
 class DdcYamlTransformer(BaseTransformer):
     """Custom datastream transformer for DDC subjects."""
@@ -90,23 +93,26 @@ VOCABULARIES_DATASTREAM_TRANSFORMERS = {
 
 VOCABULARIES_DATASTREAM_WRITERS = {
     "subjects-service": SubjectsServiceWriter,
+    "subjects-bulk": SubjectsBulkWriter,
 }
 
 
 DDC_PRESET_DATASTREAM_CONFIG = {
     "readers": [
         {
-            "type": "yaml",
-            "args": {
-                "origin": "/home/gressho/Dokumente/ddc.yaml",
-            },
+            "type": "ddc",
+            "args": {"origin": ddc_file_url},
         },
     ],
     "transformers": [{"type": "ddc-subjects"}],
     "writers": [
         {
-            "args": {"writer": {"type": "subjects-service"}},
+            "args": {"writer": {"type": "subjects-bulk"}},
             "type": "async",
         }
     ],
+    "write_many": True,
+    # a few thousand notations, not worth starting worker processes
+    "transform_workers": 1,
+    "prefix_index": "DDC",
 }
@@ -8,12 +8,11 @@
 
 """Custom datastream transformer for GND subjects."""
 
-import lxml.etree as ET
 from invenio_vocabularies.contrib.subjects.datastreams import SubjectsServiceWriter
-from invenio_vocabularies.datastreams.transformers import BaseTransformer
-from oaipmh_scythe.models import Record
 
-from ..config import gnd_file_url
+from ....datastreams.transformers import Marc21MappingTransformer
+from ....datastreams.writers import SubjectsBulkWriter
+from ..config import gnd_binary_file_url, gnd_file_url
 
 ISO639_1_TO_2 = {
     "aar": "aa",
@@ -203,124 +202,119 @@ ISO639_1_TO_2 = {
 }
 
 
-class GNDSubjectMarc21Transformer(BaseTransformer):
-    """Custom datastream transformer for GND subjects."""
-
-    def apply(self, stream_entry, **kwargs):
-        """
-        Transform XML data to internal format.
+GND_SUBJECT_HEADING = {
+    "code": "a",
+    "prefix": "x",
+    "joiner": " / ",
+    "suffix": "g",
+    "suffix_format": " <{}>",
+}
+"""Heading of subfield a, prefixed by subfield x and suffixed by subfield g."""
 
-        Input:
-           A stream_entry.entry from OAIPMHHarvester is a dict with just a "record" which
-           is an OAIRecord (from oaipmh_scythe).
-           Record format is Marc21.
+GND_SUBJECT_MAPPING = {
+    "defaults": {
+        "title": {},
+        "subject": "",
+        "id": "",
+        "scheme": "GND",
+        "synonyms": [],
+        "identifiers": [],
+        "props": {},
+    },
+    "rules": [
+        # the main ID
+        {"tag": "024", "first": True, "value": "a", "format": "gnd:{}", "target": "id"},
+        # the IDN of the DNB, which identifies the record in OAI-PMH
+        {
+            "tag": "035",
+            "value": "a",
+            "pattern": r"^\(DE-101\)(.+)$",
+            "target": "props.idn",
+        },
+        {
+            "tag": "024",
+            "first": True,
+            "value": "0",
+            "format": {"scheme": "url", "identifier": "{}"},
+            "target": "identifiers",
+            "append": True,
+        },
+        # the main subject
+        {
+            "tag": "150",
+            "first": True,
+            "value": GND_SUBJECT_HEADING,
+            "target": ["title.de", "subject"],
+        },
+        # alternative names
+        {
+            "tag": "750",
+            "when": {"4": "EQ"},
+            "value": "a",
+            "language": {"code": "9", "prefix": "L:", "map": ISO639_1_TO_2},
+            "target": "title.{lang}",
+        },
+        # synonyms
+        {
+            "tag": "450",
+            "value": GND_SUBJECT_HEADING,
+            "target": "synonyms",
+            "append": True,
+            "unique": "a",
+        },
+    ],
+    # the OAI-PMH identifiers of the DNB end with the IDN, not the GND-ID,
+    # the subjects-bulk writer resolves it by props.idn
+    "deleted": {"pattern": r"([^/:]+)$", "target": "idn", "scheme": "GND"},
+}
+"""Mapping of GND subject authority records."""
 
-        Output:
-           {
-               "id": "gnd:4558957-4",
-               "scheme": "GND",
-               "title": {
-                   "de": "Mozartjahr",
-               },
-               "subject": "Mozartjahr",
-               "synonyms": [
-                   "Mozart-Jahr",
-                   "Mozart-Feier",
-               ],
-               "identifiers": [
-                   {
-                       "scheme": "url",
-                       "identifier": "http://d-nb.info/gnd/4558957-4",
-                   }
-               ],
-           }
-        """
-        if isinstance(stream_entry.entry["record"], Record):
-            record = ET.fromstring(
-                stream_entry.entry["record"].get_metadata()["record"]
-            )
-        else:
-            record = ET.fromstring(stream_entry.entry["record"])
-        xmlns = "{http://www.loc.gov/MARC21/slim}"
 
-        result = {
-            "title": {},
-            "subject": "",
-            "id": "",
-            "scheme": "GND",
-            "synonyms": [],
-            "identifiers": [],
-        }
+class GNDSubjectMarc21Transformer(Marc21MappingTransformer):
+    """Custom datastream transformer for GND subjects.
 
-        # Extracting the main ID
-        datafield_024 = record.find(f"{xmlns}datafield[@tag='024']")
-        if datafield_024 is not None:
-            subfield_a = datafield_024.find(f"{xmlns}subfield[@code='a']")
-            if subfield_a is not None:
-                result["id"] = f"gnd:{subfield_a.text}"
-            subfield_0 = datafield_024.find(f"{xmlns}subfield[@code='0']")
-            if subfield_0 is not None:
-                identifier = {
-                    "scheme": "url",
-                    "identifier": subfield_0.text,
-                }
-                result["identifiers"].append(identifier)
+    Input:
+       A stream_entry.entry from OAIPMHHarvester is a dict with just a "record" which
+       is an OAIRecord (from oaipmh_scythe).
+       The Marc21CollectionReader and the PrefetchingOAIPMHReader hand on
+       the "record" either serialized or as a parsed element.
+       Record format is Marc21.
+       Deleted records of the PrefetchingOAIPMHReader only have an
+       "identifier".
 
-        # Extracting the main subject
-        datafield_150 = record.find(f"{xmlns}datafield[@tag='150']")
-        if datafield_150 is not None:
-            subfield_a = datafield_150.find(f"{xmlns}subfield[@code='a']")
-            if subfield_a is not None:
-                title_de = subfield_a.text
-                subfield_x = datafield_150.find(f"{xmlns}subfield[@code='x']")
-                if subfield_x is not None:
-                    title_de = " / ".join(filter(None, [subfield_x.text, title_de]))
-                subfield_g = datafield_150.find(f"{xmlns}subfield[@code='g']")
-                if subfield_g is not None:
-                    year = "".join(filter(None, [" <", subfield_g.text, ">"]))
-                    if len(year) > 2:
-                        title_de += year
-                result["title"]["de"] = title_de
-                result["subject"] = title_de
+    Output:
+       {
+           "id": "gnd:4558957-4",
+           "scheme": "GND",
+           "title": {
+               "de": "Mozartjahr",
+           },
+           "subject": "Mozartjahr",
+           "synonyms": [
+               "Mozart-Jahr",
+               "Mozart-Feier",
+           ],
+           "identifiers": [
+               {
+                   "scheme": "url",
+                   "identifier": "http://d-nb.info/gnd/4558957-4",
+               }
+           ],
+           "props": {
+               "idn": "04558957X",
+           },
+       }
 
-        # Adding alternative names
-        datafields_750 = record.findall(f"{xmlns}datafield[@tag='750']")
-        for df in datafields_750:
-            subfield_4 = df.find(f"{xmlns}subfield[@code='4']")
-            if subfield_4 is not None and subfield_4.text == "EQ":
-                subfield_a = df.find(f"{xmlns}subfield[@code='a']")
-                subfields_9 = df.findall(f"{xmlns}subfield[@code='9']")
-                if subfield_a is not None:
-                    lang_codes = [
-                        sf.text for sf in subfields_9 if sf.text.startswith("L:")
-                    ]
-                    for lc in lang_codes:
-                        lc = lc.replace("L:", "")
-                        try:
-                            two_digit_cl = ISO639_1_TO_2[lc]
-                        except KeyError:
-                            continue
-                        else:
-                            result["title"][two_digit_cl] = subfield_a.text
+       or for a deleted record, with the IDN of its identifier
 
-        # Extracting synonyms from tag 450
-        datafields_450 = record.findall(f"{xmlns}datafield[@tag='450']")
-        for df in datafields_450:
-            subfield_a = df.find(f"{xmlns}subfield[@code='a']")
-            if subfield_a is not None and subfield_a.text not in result["synonyms"]:
-                synonym = subfield_a.text
-                subfield_x = df.find(f"{xmlns}subfield[@code='x']")
-                if subfield_x is not None:
-                    synonym = " / ".join(filter(None, [subfield_x.text, synonym]))
-                subfield_g = df.find(f"{xmlns}subfield[@code='g']")
-                if subfield_g is not None:
-                    year = "".join(filter(None, [" <", subfield_g.text, ">"]))
-                    if len(year) > 2:
-                        synonym += year
-                result["synonyms"].append(synonym)
+       {
+           "idn": "04558957X",
+           "deleted": True,
+           "scheme": "GND",
+       }
+    """
 
-        stream_entry.entry = result
-        return stream_entry
+    mapping = GND_SUBJECT_MAPPING
 
 
 VOCABULARIES_DATASTREAM_TRANSFORMERS = {
@@ -330,30 +324,35 @@ VOCABULARIES_DATASTREAM_TRANSFORMERS = {
 
 VOCABULARIES_DATASTREAM_WRITERS = {
     "subjects-service": SubjectsServiceWriter,
+    "subjects-bulk": SubjectsBulkWriter,
 }
 
 
 GND_PRESET_DATASTREAM_CONFIG = {
     "readers": [
         {
-            "type": "oai-pmh",
+            "type": "oai-pmh-prefetch",
             "args": {
-                "verb": "ListRecords",
                 "base_url": "https://services.dnb.de/oai/repository",
                 "metadata_prefix": "MARC21-xml",
                 "set": "authorities:sachbegriff",
                 "from_date": "now-10min",
                 "until_date": "now",
+                "serialize": False,
+                "deleted": True,
             },
         },
     ],
     "transformers": [{"type": "gnd-subjects"}],
     "writers": [
         {
-            "args": {"writer": {"type": "subjects-service"}},
+            "args": {"writer": {"type": "subjects-bulk"}},
             "type": "async",
         }
     ],
+    "write_many": True,
+    # the prefix index is not updated by the harvests, rewriting the whole
+    # GND index for a few changes, but rebuilt by the rebuild_prefix_index job
 }
 """gnd-subjects Data Stream configuration."""
 
@@ -361,17 +360,46 @@ GND_PRESET_DATASTREAM_CONFIG = {
 GND_FULL_DATASTREAM_CONFIG = {
     "readers": [
         {
-            "type": "http",
+            "type": "http-cached",
             "args": {"origin": gnd_file_url},
         },
-        {"type": "gzip"},
-        {"type": "marc21"},
+        {"type": "gzip-threaded"},
+        {"type": "marc21", "args": {"serialize": False}},
+    ],
+    "transformers": [{"type": "gnd-subjects"}],
+    "writers": [
+        {
+            "args": {"writer": {"type": "subjects-bulk"}},
+            "type": "async",
+        }
+    ],
+    "write_many": True,
+    "prefix_index": "GND",
+    "manifest": "gnd-subjects",
+    "checkpoint": "gnd-subjects",
+}
+
+
+GND_BINARY_DATASTREAM_CONFIG = {
+    "readers": [
+        {
+            "type": "http-cached",
+            "args": {"origin": gnd_binary_file_url},
+        },
+        {"type": "gzip-threaded"},
+        {"type": "marc21-binary"},
     ],
     "transformers": [{"type": "gnd-subjects"}],
     "writers": [
         {
-            "args": {"writer": {"type": "subjects-service"}},
+            "args": {"writer": {"type": "subjects-bulk"}},
             "type": "async",
         }
     ],
+    "write_many": True,
+    "prefix_index": "GND",
+    # the same subjects as the MARC21-xml import
+    "manifest": "gnd-subjects",
+    "checkpoint": "gnd-subjects-binary",
 }
+"""Full import of the GND subjects from the binary MARC21 file."""
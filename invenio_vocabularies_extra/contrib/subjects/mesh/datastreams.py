@@ -8,13 +8,19 @@
 
 """Custom datastream transformer for MeSH subjects."""
 
+import re
+
 import lxml.etree as ET
 from flask import current_app
 from invenio_i18n.proxies import current_i18n
 from invenio_vocabularies.contrib.subjects.datastreams import SubjectsServiceWriter
 from invenio_vocabularies.datastreams.transformers import BaseTransformer
 
-from ..config import mesh_file_url
+from ....datastreams.writers import SubjectsBulkWriter
+from ..config import mesh_file_url, mesh_file_urls
+
+BRACKETED_NAME = re.compile(r"(.*?)\s*\[(.+)\]\s*", re.DOTALL)
+"""Descriptor name followed by the English name in brackets."""
 
 
 class MeSHSubjectXMLTransformer(BaseTransformer):
@@ -29,8 +35,8 @@ class MeSHSubjectXMLTransformer(BaseTransformer):
         """Transform XML data to internal format.
 
         Input:
-           A stream_entry.entry from ZIPReader is a dict with just a "DescriptorRecord" which
-           is an string.
+           A stream_entry.entry from MeshReader is a dict with just a "record" which
+           is a serialized or an already parsed "DescriptorRecord".
            Record format is based on "https://www.nlm.nih.gov/databases/dtd/nlmdescriptorrecordset_20200101.dtd".
             - DescriptorUI is the ID
             - DescriptorName with <String>: starts with german title, english in brackets
@@ -69,7 +75,9 @@ class MeSHSubjectXMLTransformer(BaseTransformer):
                ],
            }
         """
-        record = ET.fromstring(stream_entry.entry["record"])
+        record = stream_entry.entry["record"]
+        if not ET.iselement(record):
+            record = ET.fromstring(record)
         default_lang = current_app.config["VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG"]
         default_lang_supported = False
         for language in self._supported_languages:
@@ -126,31 +134,150 @@ class MeSHSubjectXMLTransformer(BaseTransformer):
         return stream_entry
 
 
+class MeSHMultilingualTransformer(BaseTransformer):
+    """Transforms the joined MeSH descriptors of several languages to subjects.
+
+    A name like ``Schlachthöfe[Abattoirs]`` is read as the title in the
+    language of its file followed by the English title in brackets, as in
+    the German translation. The English title of an English file takes
+    precedence. Only the titles in the languages of the instance are kept.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initializes the transformer."""
+        super().__init__(*args, **kwargs)
+        self._supported_languages = {
+            language for language, _ in current_i18n.get_languages()
+        }
+        subject_lang = current_app.config["VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG"]
+        if subject_lang not in self._supported_languages:
+            subject_lang = "en"
+        self._subject_lang = subject_lang
+
+    def apply(self, stream_entry, **kwargs):
+        """Transform a joined descriptor to a subject.
+
+        Input:
+           A stream_entry.entry from MeshJoinReader, the DescriptorUI as
+           ``id`` and the ``name`` and ``synonyms`` of the descriptor by
+           language as ``descriptors``.
+
+        Output:
+           The subject like the one of ``MeSHSubjectXMLTransformer``, with a
+           title per language and the synonyms of all languages. The
+           ``subject`` is the title in ``VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG``
+           if it is a language of the instance, or else the English one.
+        """
+        descriptor_ui = stream_entry.entry["id"]
+        titles = {}
+        bracketed = {}
+        synonyms = []
+        for lang, terms in stream_entry.entry["descriptors"].items():
+            name = terms.get("name")
+            if name:
+                match = BRACKETED_NAME.fullmatch(name)
+                if match:
+                    name = match.group(1)
+                    bracketed.setdefault("en", match.group(2))
+                titles[lang] = name
+            synonyms.extend(terms.get("synonyms", []))
+        for lang, title in bracketed.items():
+            titles.setdefault(lang, title)
+        titles = {
+            lang: title
+            for lang, title in titles.items()
+            if lang in self._supported_languages
+        }
+
+        subject = titles.get(self._subject_lang) or titles.get("en")
+        if subject is None:
+            subject = next(iter(titles.values()), "")
+        stream_entry.entry = {
+            "title": titles,
+            "subject": subject,
+            "id": f"mesh:{descriptor_ui}",
+            "scheme": "MESH",
+            # synonyms shared by the translations are listed once
+            "synonyms": list(dict.fromkeys(synonyms)),
+            "identifiers": [
+                {
+                    "scheme": "url",
+                    "identifier": f"http://id.nlm.nih.gov/mesh/{descriptor_ui}",
+                },
+                {
+                    "scheme": "url",
+                    "identifier": f"https://id.nlm.nih.gov/mesh/{descriptor_ui}",
+                },
+            ],
+        }
+        return stream_entry
+
+
 VOCABULARIES_DATASTREAM_TRANSFORMERS = {
     "mesh-xml-to-subjects": MeSHSubjectXMLTransformer,
+    "mesh-multilingual-to-subjects": MeSHMultilingualTransformer,
 }
 
 
 VOCABULARIES_DATASTREAM_WRITERS = {
     "subjects-service": SubjectsServiceWriter,
+    "subjects-bulk": SubjectsBulkWriter,
 }
 
 
 MESH_DATASTREAM_CONFIG = {
     "readers": [
         {
-            "type": "http",
+            "type": "http-cached",
             "args": {"origin": mesh_file_url},
         },
-        {"type": "zip"},
-        {"type": "mesh-xml"},
+        {"type": "zip-threaded"},
+        {"type": "mesh-xml", "args": {"serialize": False}},
     ],
     "transformers": [{"type": "mesh-xml-to-subjects"}],
     "writers": [
         {
-            "args": {"writer": {"type": "subjects-service"}},
+            "args": {"writer": {"type": "subjects-bulk"}},
             "type": "async",
         }
     ],
+    "write_many": True,
+    "prefix_index": "MESH",
+    "manifest": "mesh-subjects",
 }
 """mesh-subjects Data Stream configuration."""
+
+
+MESH_SPOOLED_DATASTREAM_CONFIG = {
+    **MESH_DATASTREAM_CONFIG,
+    "readers": [
+        {
+            "type": "http-spooled",
+            "args": {"origin": mesh_file_url},
+        },
+        {"type": "zip-threaded"},
+        {"type": "mesh-xml", "args": {"serialize": False}},
+    ],
+}
+"""mesh-subjects Data Stream configuration reading the archive while it is downloaded, without keeping it in the source cache."""
+
+
+MESH_MULTILINGUAL_DATASTREAM_CONFIG = {
+    "readers": [
+        {
+            "type": "mesh-join",
+            "args": {"origin": mesh_file_urls},
+        },
+    ],
+    "transformers": [{"type": "mesh-multilingual-to-subjects"}],
+    "writers": [
+        {
+            "args": {"writer": {"type": "subjects-bulk"}},
+            "type": "async",
+        }
+    ],
+    "write_many": True,
+    "prefix_index": "MESH",
+    "manifest": "mesh-multilingual-subjects",
+}
+"""mesh-subjects Data Stream configuration joining the descriptor files of several languages."""
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Local cache of downloaded vocabulary source files."""
+
+import hashlib
+import json
+import os
+import time
+
+import requests
+from flask import current_app
+from invenio_vocabularies.datastreams.errors import ReaderError
+
+
+def cache_dir():
+    """Directory for cached vocabulary source files."""
+    path = current_app.config["VOCABULARIES_EXTRA_CACHE_DIR"] or os.path.join(
+        current_app.instance_path, "vocabularies-extra"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class SourceCache:
+    """Downloaded source files, revalidated with ETag and Last-Modified.
+
+    Every URL is stored as a data file next to a JSON file with its metadata.
+    A cached file is only downloaded again if the server does not answer the
+    conditional request with ``304 Not Modified``.
+    """
+
+    def __init__(self, directory, max_size=None, max_age=None, timeout=60):
+        """Constructor.
+
+        :param directory: directory of the cached files.
+        :param max_size: maximum total size in bytes, least recently used
+                         files are evicted beyond it.
+        :param max_age: seconds after which unused files are evicted.
+        :param timeout: timeout of the HTTP requests in seconds.
+        """
+        self._directory = directory
+        self._max_size = max_size
+        self._max_age = max_age
+        self._timeout = timeout
+
+    @classmethod
+    def from_config(cls):
+        """Cache as configured in the current application."""
+        config = current_app.config
+        return cls(
+            config.get("VOCABULARIES_EXTRA_SOURCE_CACHE_DIR")
+            or os.path.join(cache_dir(), "sources"),
+            max_size=config.get("VOCABULARIES_EXTRA_SOURCE_CACHE_MAX_SIZE"),
+            max_age=config.get("VOCABULARIES_EXTRA_SOURCE_CACHE_MAX_AGE"),
+        )
+
+    def path(self, url):
+        """Path of the data file of a URL."""
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self._directory, name)
+
+    def metadata(self, url):
+        """Metadata of a cached URL or None if it is not cached."""
+        path = self.path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(f"{path}.json") as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return None
+
+    def _save_metadata(self, url, metadata):
+        """Writes the metadata of a cached URL."""
+        path = f"{self.path(url)}.json"
+        with open(f"{path}.tmp", "w") as fp:
+            json.dump(metadata, fp)
+        os.replace(f"{path}.tmp", path)
+
+    def fetch(self, url):
+        """Makes sure the current version of the URL is cached.
+
+        :returns: the metadata of the cached file, ``changed`` tells if it was
+                  downloaded.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        path = self.path(url)
+        metadata = self.metadata(url)
+        headers = {}
+        if metadata and metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata and metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+        with requests.get(
+            url, headers=headers, stream=True, timeout=self._timeout
+        ) as resp:
+            if resp.status_code == 304 and metadata:
+                metadata["changed"] = False
+            elif resp.status_code == 200:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as fp:
+                    for chunk in resp.iter_content(1024 * 1024):
+                        fp.write(chunk)
+                os.replace(tmp_path, path)
+                metadata = {
+                    "url": url,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "size": os.path.getsize(path),
+                    "fetched": time.time(),
+                    "processed": False,
+                    "changed": True,
+                }
+            else:
+                raise ReaderError(f"Failed to fetch URL {url}: {resp.status_code}")
+
+        metadata["accessed"] = time.time()
+        self._save_metadata(url, metadata)
+        self.evict(keep=url)
+        return metadata
+
+    def mark_processed(self, url):
+        """Records that the cached version of the URL was processed completely."""
+        metadata = self.metadata(url)
+        if metadata is not None:
+            metadata["processed"] = True
+            self._save_metadata(url, metadata)
+
+    def evict(self, keep=None):
+        """Removes expired and least recently used files beyond the size cap."""
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self._directory, name)) as fp:
+                    entries.append(json.load(fp))
+            except (OSError, ValueError):
+                continue
+
+        now = time.time()
+        entries.sort(key=lambda entry: entry.get("accessed", 0), reverse=True)
+        total = 0
+        for entry in entries:
+            total += entry.get("size", 0)
+            if entry["url"] == keep:
+                continue
+            expired = self._max_age and now - entry.get("accessed", 0) > self._max_age
+            if expired or (self._max_size and total > self._max_size):
+                self._remove(entry["url"])
+                total -= entry.get("size", 0)
+
+    def _remove(self, url):
+        """Removes a cached URL."""
+        path = self.path(url)
+        for name in (path, f"{path}.json"):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Checkpoints of long running data streams."""
+
+import json
+import os
+
+
+class Checkpoint:
+    """Number of entries processed of a source version, persisted periodically.
+
+    Entries are identified by their ordinal in the read order. The position
+    is the number of leading entries that were processed completely, entries
+    finished out of order are kept until the gap before them is closed.
+    """
+
+    def __init__(self, path, interval=1000):
+        """Constructor.
+
+        :param path: path of the checkpoint file.
+        :param interval: minimum number of entries processed between two saves.
+        """
+        self._path = path
+        self._interval = interval
+        self.version = None
+        self.position = 0
+        self._saved = 0
+        self._done = set()
+
+    def start(self, version):
+        """Resumes from the checkpoint if it belongs to the same source version.
+
+        :returns: the number of entries to skip.
+        """
+        self.version = version
+        self.position = 0
+        try:
+            with open(self._path) as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            data = None
+        if version is not None and data and data["version"] == version:
+            self.position = data["position"]
+        self._saved = self.position
+        return self.position
+
+    def done(self, ordinals):
+        """Marks entries as processed."""
+        self._done.update(ordinals)
+        while self.position in self._done:
+            self._done.remove(self.position)
+            self.position += 1
+
+    @property
+    def due(self):
+        """True if enough entries were processed since the last save."""
+        return self.position - self._saved >= self._interval
+
+    def save(self):
+        """Persists the position."""
+        if self.version is None:
+            return
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump({"version": self.version, "position": self.position}, fp)
+        os.replace(tmp_path, self._path)
+        self._saved = self.position
+
+    def clear(self):
+        """Removes the checkpoint, e.g. because all entries were processed."""
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
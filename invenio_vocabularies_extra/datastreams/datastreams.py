@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Data stream transforming entries in a pool of worker processes."""
+
+import itertools
+import queue
+
+import billiard
+from flask import current_app
+from invenio_vocabularies.datastreams import DataStream, StreamEntry
+from invenio_vocabularies.datastreams.errors import TransformerError
+from lxml import etree
+from werkzeug.utils import import_string
+
+from .stats import (
+    DataStreamStats,
+    MeteredReader,
+    MeteredTransformer,
+    MeteredWriter,
+    stage_name,
+)
+
+_worker_transformers = None
+"""Transformers of the current worker process."""
+
+_worker_stats = None
+"""Stats of the current worker process, if the data stream is instrumented."""
+
+
+def _metered_transformers(transformers, stats):
+    """Wraps the transformers to keep their stats."""
+    return [
+        MeteredTransformer(
+            transformer, stats, stage_name("transform", idx, transformer)
+        )
+        for idx, transformer in enumerate(transformers)
+    ]
+
+
+def _init_worker(app_factory, transformers, sample=None):
+    """Sets up a worker process with an application of its own.
+
+    The workers are forked by a fork server, so they share no connections
+    (database, search, cache) and no threads with the process of the data
+    stream.
+
+    :param app_factory: import path of the application factory.
+    :param sample: sampling of the stats, None if the data stream is not
+                   instrumented.
+    """
+    global _worker_transformers, _worker_stats
+    import_string(app_factory)().app_context().push()
+    if sample is not None:
+        _worker_stats = DataStreamStats(sample=sample)
+        transformers = _metered_transformers(transformers, _worker_stats)
+    _worker_transformers = transformers
+
+
+def _transform_entries(entries):
+    """Applies the transformers of the worker process to a chunk of entries.
+
+    :returns: a list of ``(entry, errors)`` tuples in the order of the input
+              and the stats of the chunk.
+    """
+    results = []
+    for entry in entries:
+        stream_entry = StreamEntry(entry)
+        for transformer in _worker_transformers:
+            try:
+                stream_entry = transformer.apply(stream_entry)
+            except TransformerError as err:
+                stream_entry.errors.append(
+                    f"{transformer.__class__.__name__}: {str(err)}"
+                )
+                break
+        results.append((stream_entry.entry, stream_entry.errors))
+
+    stats = {}
+    if _worker_stats is not None:
+        stats = _worker_stats.as_dict()
+        _worker_stats.reset()
+    return results, stats
+
+
+def _picklable(entry):
+    """Serializes parsed XML elements so that the entry can be sent to a worker."""
+    if isinstance(entry, dict):
+        return {
+            key: etree.tostring(value) if etree.iselement(value) else value
+            for key, value in entry.items()
+        }
+    return entry
+
+
+class ParallelDataStream(DataStream):
+    """Data stream applying the transformers in a pool of worker processes.
+
+    The workers are forked by a fork server of billiard, which unlike
+    multiprocessing starts them in daemonic processes too, e.g. in the
+    processes of Celery's prefork pool. The fork server is a fresh,
+    single-threaded process, so the workers inherit no connections or
+    threads of the data stream's process. Each worker creates its own
+    application with ``VOCABULARIES_EXTRA_TRANSFORM_APP_FACTORY`` and gets the
+    transformers pickled.
+
+    The entries are read in the current process and handed to the workers in
+    chunks of ``batch_size``. At most ``max_pending`` chunks are in flight, so
+    reading is throttled to the pace of the workers. Transformed chunks are
+    written in reading order or, if ``ordered`` is False, as soon as they are
+    done.
+
+    With a manifest, transformed entries whose content did not change since
+    the last run are filtered out before they reach the writers. The hashes
+    of the other entries are recorded once they were written without errors.
+    With async writers this is left to the writer sub-tasks, see
+    ``Manifest``.
+
+    With a checkpoint, the number of entries processed is persisted
+    periodically, together with the manifest. A new run on the same version
+    of the source skips the entries processed before, only the entries of
+    the batches in flight when the previous run died are written again. A
+    batch counts as processed once it was committed: right after writing for
+    synchronous writers, once the writer sub-tasks journaled all its entries
+    in the manifest for async writers. Without a manifest, the checkpoint
+    is not used with async writers.
+
+    With stats, every reader, transformer and writer is wrapped to keep its
+    timing and counters, also for the stages run in the worker processes.
+    File objects handed on between readers are wrapped as well, so readers
+    checking the type of their input can not be instrumented.
+    """
+
+    def __init__(
+        self,
+        *args,
+        transform_workers=None,
+        ordered=True,
+        max_pending=None,
+        manifest=None,
+        checkpoint=None,
+        stats=None,
+        **kwargs,
+    ):
+        """Constructor.
+
+        :param transform_workers: number of worker processes. With one worker
+                                  the entries are transformed in the current
+                                  process.
+        :param ordered: if True entries are written in reading order.
+        :param max_pending: maximum number of chunks in flight, defaults to
+                            twice the number of workers.
+        :param manifest: a ``Manifest`` of the entries written by previous
+                         runs. It is saved when all entries are processed.
+        :param checkpoint: a ``Checkpoint`` to resume from. The source version
+                           is taken from the ``source_version`` of the first
+                           reader.
+        :param stats: a ``DataStreamStats`` collecting timing and counters.
+        """
+        super().__init__(*args, **kwargs)
+        self._transform_workers = transform_workers or 1
+        self._ordered = ordered
+        self._max_pending = max_pending or 2 * self._transform_workers
+        self._manifest = manifest
+        self._checkpoint = checkpoint
+        self._writes_async = any(
+            getattr(writer, "is_async", False) for writer in self._writers
+        )
+        if checkpoint is not None and self._writes_async and manifest is None:
+            current_app.logger.warning(
+                "Ignoring the checkpoint, the entries of async writers are "
+                "only known as committed through a manifest"
+            )
+            self._checkpoint = None
+        # batches waiting for async writers, by the ids of their entries
+        self._uncommitted = {}
+        self._plain_transformers = self._transformers or []
+        self.stats = stats
+        if stats is not None:
+            read_names = [
+                stage_name("read", idx, reader)
+                for idx, reader in enumerate(self._readers)
+            ]
+            self._readers = [
+                MeteredReader(reader, stats, name, next_name)
+                for reader, name, next_name in zip(
+                    self._readers, read_names, read_names[1:] + [None]
+                )
+            ]
+            self._transformers = _metered_transformers(self._plain_transformers, stats)
+            self._writers = [
+                MeteredWriter(writer, stats, stage_name("write", idx, writer))
+                for idx, writer in enumerate(self._writers)
+            ]
+
+    def read(self):
+        """Reads the entries, skipping the ones processed according to the checkpoint."""
+        if self._checkpoint is None:
+            yield from super().read()
+            return
+
+        skip = None
+        for ordinal, stream_entry in enumerate(super().read()):
+            if skip is None:
+                # the source version is known once the first reader started
+                version = getattr(self._readers[0], "source_version", None)
+                skip = self._checkpoint.start(version)
+                if skip:
+                    current_app.logger.info(
+                        "Resuming from checkpoint, skipping %s entries", skip
+                    )
+            if ordinal < skip:
+                continue
+            stream_entry.ordinal = ordinal
+            yield stream_entry
+
+    def process_batch(self, batch):
+        """Process a batch of entries and advances the checkpoint once it is committed."""
+        if self._checkpoint is None:
+            yield from super().process_batch(batch)
+            return
+
+        awaited = set()
+        for result in super().process_batch(batch):
+            entry = result.entry
+            if (
+                self._writes_async
+                and not result.filtered
+                and not result.errors
+                and isinstance(entry, dict)
+                and "id" in entry
+            ):
+                awaited.add(entry["id"])
+            yield result
+        ordinals = [stream_entry.ordinal for stream_entry in batch]
+        if awaited:
+            pending = (ordinals, awaited)
+            for entry_id in awaited:
+                self._uncommitted[entry_id] = pending
+            self._committed(self._manifest.update_from_journal())
+        else:
+            self._checkpoint.done(ordinals)
+        if self._checkpoint.due:
+            self._save_progress()
+
+    def _committed(self, entry_ids):
+        """Advances the checkpoint over the batches whose entries were all journaled."""
+        for entry_id in entry_ids:
+            pending = self._uncommitted.pop(entry_id, None)
+            if pending is None:
+                continue
+            ordinals, awaited = pending
+            awaited.discard(entry_id)
+            if not awaited:
+                self._checkpoint.done(ordinals)
+
+    def _save_progress(self):
+        """Saves the manifest and then the checkpoint, which never gets ahead of it."""
+        if self._manifest is not None:
+            entry_ids = self._manifest.save()
+            if self._checkpoint is not None:
+                self._committed(entry_ids)
+        if self._checkpoint is not None:
+            self._checkpoint.save()
+
+    def filter(self, stream_entry, *args, **kwargs):
+        """Filters out entries which are unchanged according to the manifest."""
+        if self._manifest is None:
+            return super().filter(stream_entry, *args, **kwargs)
+        entry = stream_entry.entry
+        if entry.get("deleted"):
+            # a recreated entry has to be written again
+            self._manifest.discard(entry["id"])
+            return False
+        return self._manifest.classify(entry) == "skip"
+
+    def transform(self, stream_entry, *args, **kwargs):
+        """Apply the transformations to an stream_entry.
+
+        With worker processes the entries are transformed before they reach
+        ``process_batch``.
+        """
+        if self._transform_workers > 1:
+            return stream_entry
+        return super().transform(stream_entry, *args, **kwargs)
+
+    def _transformed(self, async_result, ordinals):
+        """Stream entries of a finished chunk."""
+        results, stats = async_result.get()
+        if self.stats is not None:
+            self.stats.merge(stats)
+        stream_entries = []
+        for (entry, errors), ordinal in zip(results, ordinals):
+            stream_entry = StreamEntry(entry, errors=errors)
+            stream_entry.ordinal = ordinal
+            stream_entries.append(stream_entry)
+        return stream_entries
+
+    def process(self, *args, **kwargs):
+        """Iterates over the entries and keeps the manifest and checkpoint up to date."""
+        try:
+            for result in self._process(*args, **kwargs):
+                if self._manifest is not None:
+                    self._record(result)
+                yield result
+        except BaseException:
+            self._save_progress()
+            raise
+
+        if self._checkpoint is not None:
+            self._checkpoint.clear()
+            self._uncommitted.clear()
+
+        if self._manifest is not None:
+            self._manifest.save()
+            current_app.logger.info(
+                "Entries by the manifest: %(create)s new, %(update)s changed, "
+                "%(skip)s unchanged",
+                self._manifest.counts,
+            )
+
+    def _record(self, result):
+        """Records the hash of a written entry in the manifest."""
+        entry = result.entry
+        if not isinstance(entry, dict) or "id" not in entry:
+            return
+        if result.errors:
+            # make sure the entry is written again with the next run
+            self._manifest.discard(entry["id"])
+        elif not self._writes_async:
+            self._manifest.confirm([entry["id"]])
+
+    def _process(self, *args, **kwargs):
+        """Iterates over the entries, transforming them in the worker pool."""
+        if self._transform_workers <= 1:
+            yield from super().process(*args, **kwargs)
+            return
+
+        current_app.logger.info(
+            "Starting data stream processing with %s transform workers",
+            self._transform_workers,
+        )
+        app_factory = current_app.config["VOCABULARIES_EXTRA_TRANSFORM_APP_FACTORY"]
+        context = billiard.get_context("forkserver")
+        # the fork server imports them once for all pools of this process
+        context.set_forkserver_preload(
+            sorted(
+                {__name__, app_factory.partition(":")[0]}
+                | {type(t).__module__ for t in self._plain_transformers}
+            )
+        )
+        pool = context.Pool(
+            processes=self._transform_workers,
+            initializer=_init_worker,
+            initargs=(
+                app_factory,
+                self._plain_transformers,
+                self.stats.sample if self.stats is not None else None,
+            ),
+        )
+        # results and ordinals of the chunks in flight, in submission order
+        pending = {}
+        keys = itertools.count()
+        # keys of the finished chunks, in completion order
+        finished = queue.SimpleQueue()
+
+        def submit(batch):
+            read_errors = [entry for entry in batch if entry.errors]
+            if read_errors:
+                yield from self.process_batch(read_errors)
+            batch = [entry for entry in batch if not entry.errors]
+            if batch:
+                key = next(keys)
+                entries = [_picklable(entry.entry) for entry in batch]
+                async_result = pool.apply_async(
+                    _transform_entries,
+                    (entries,),
+                    callback=lambda _, key=key: finished.put(key),
+                    error_callback=lambda _, key=key: finished.put(key),
+                )
+                pending[key] = (
+                    async_result,
+                    [getattr(entry, "ordinal", None) for entry in batch],
+                )
+
+        def drain(limit):
+            while len(pending) > limit:
+                if self._ordered:
+                    key = next(iter(pending))
+                else:
+                    key = finished.get()
+                async_result, ordinals = pending.pop(key)
+                yield from self.process_batch(self._transformed(async_result, ordinals))
+
+        try:
+            batch = []
+            for stream_entry in self.read():
+                batch.append(stream_entry)
+                if len(batch) >= self.batch_size:
+                    yield from submit(batch)
+                    yield from drain(self._max_pending - 1)
+                    batch = []
+            if batch:
+                yield from submit(batch)
+            yield from drain(0)
+        finally:
+            # the workers finish the chunks in flight and exit cleanly, a
+            # terminated worker can die holding the lock of the task queue,
+            # blocking the others forever
+            pool.close()
+            pool.join()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Decompression in a background thread.
+
+The compressed input is inflated in a background thread, so that it
+overlaps with parsing and transforming in the consuming thread. The zlib
+implementations release the GIL while inflating. A faster zlib-compatible
+implementation (python-isal or zlib-ng) is used if it is installed.
+"""
+
+import io
+import struct
+import zlib
+
+from invenio_vocabularies.datastreams.errors import ReaderError
+
+from .prefetch import prefetch
+
+try:
+    from isal import isal_zlib as fast_zlib
+except ImportError:
+    try:
+        from zlib_ng import zlib_ng as fast_zlib
+    except ImportError:
+        fast_zlib = None
+
+zlib_impl = fast_zlib or zlib
+"""zlib-compatible module used for decompressing."""
+
+GZIP_WBITS = 31
+"""Window bits of a gzip stream with header and trailer."""
+
+DEFLATE_WBITS = -15
+"""Window bits of a raw deflate stream, e.g. a zip member."""
+
+
+def inflate_chunks(
+    fp, wbits=GZIP_WBITS, chunk_size=1024 * 1024, length=None, crc=None, size=None
+):
+    """Yields the decompressed chunks of a compressed file object.
+
+    Concatenated gzip members are decompressed one after the other, zero
+    bytes padding the last member are skipped like ``gzip`` does.
+
+    :param length: number of compressed bytes to read, defaults to all.
+    :param crc: CRC-32 of the decompressed data of a raw deflate stream, e.g.
+                of a zip member. Gzip members are checked by zlib.
+    :param size: size of the decompressed data of a raw deflate stream.
+    :raises ReaderError: if the input is corrupt, ends within a compressed
+                         stream or does not match ``crc`` and ``size``.
+    """
+    checked = crc is not None or size is not None
+    checksum = 0
+    total = 0
+    decompressor = None
+    remaining = length
+    try:
+        while remaining is None or remaining > 0:
+            data = fp.read(
+                chunk_size if remaining is None else min(chunk_size, remaining)
+            )
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            while data:
+                if decompressor is None:
+                    data = data.lstrip(b"\0") if wbits == GZIP_WBITS else data
+                    if not data:
+                        break
+                    decompressor = zlib_impl.decompressobj(wbits)
+                chunk = decompressor.decompress(data)
+                if chunk:
+                    if checked:
+                        checksum = zlib_impl.crc32(chunk, checksum)
+                        total += len(chunk)
+                    yield chunk
+                if not decompressor.eof:
+                    break
+                if wbits != GZIP_WBITS:
+                    if (crc is not None and checksum != crc) or (
+                        size is not None and total != size
+                    ):
+                        raise ReaderError(
+                            "Decompressed data does not match its CRC-32 or size."
+                        )
+                    return
+                # the next gzip member starts with the unused data
+                data = decompressor.unused_data
+                decompressor = None
+    except zlib_impl.error as err:
+        raise ReaderError(f"Corrupt compressed data: {err}") from err
+    if decompressor is not None or wbits != GZIP_WBITS:
+        raise ReaderError("Compressed data ended before the end of the stream.")
+
+
+class ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        """Constructor."""
+        self._chunks = chunks
+        self._chunk = b""
+        self._pos = 0
+
+    def readable(self):
+        """The stream is readable."""
+        return True
+
+    def readinto(self, buffer):
+        """Fills the buffer with the next bytes of the chunks."""
+        while self._pos >= len(self._chunk):
+            self._chunk = next(self._chunks, b"")
+            self._pos = 0
+            if not self._chunk:
+                return 0
+        size = min(len(buffer), len(self._chunk) - self._pos)
+        buffer[:size] = self._chunk[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def close(self):
+        """Stops producing the chunks."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+        super().close()
+
+
+def threaded_inflate(fp, wbits=GZIP_WBITS, chunk_size=1024 * 1024, buffer=8, **kwargs):
+    """Buffered file object decompressing ``fp`` in a background thread.
+
+    :param buffer: number of decompressed chunks buffered ahead.
+    """
+    chunks = prefetch(inflate_chunks(fp, wbits, chunk_size, **kwargs), depth=buffer)
+    return io.BufferedReader(ChunkStream(chunks), buffer_size=chunk_size)
+
+
+def zip_member_offset(fp, info):
+    """Offset of the compressed data of a zip member in the archive file."""
+    fp.seek(info.header_offset)
+    header = fp.read(30)
+    if header[:4] != b"PK\x03\x04":
+        raise ValueError(f"Bad local file header of {info.filename}.")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + name_length + extra_length
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""High-water mark of incremental OAI-PMH harvesting."""
+
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+import arrow
+
+OAI_DATESTAMP_FORMAT = "YYYY-MM-DDTHH:mm:ss[Z]"
+"""Format of the OAI-PMH datestamps with seconds granularity."""
+
+
+def harvest_windows(since, until, window, max_windows=None):
+    """Splits ``[since, until]`` into consecutive windows.
+
+    :param since: start of the time span, an ``arrow.Arrow``.
+    :param until: end of the time span, an ``arrow.Arrow``.
+    :param window: length of a window in seconds.
+    :param max_windows: if given, windows are widened to stay within it.
+    :returns: a list of ``(start, end)`` tuples.
+    """
+    span = (until - since).total_seconds()
+    count = max(1, -(-int(span) // int(window)))
+    if max_windows:
+        count = min(count, max_windows)
+    step = span / count
+    bounds = [since.shift(seconds=round(step * idx)) for idx in range(count)]
+    return list(zip(bounds, bounds[1:] + [until]))
+
+
+class HarvestState:
+    """Persistent high-water mark of a harvest split into concurrent windows.
+
+    Every window reports itself when it was harvested successfully. The
+    high-water mark only moves past windows once all windows before them are
+    harvested as well, so a failed window is harvested again with the next
+    run and no updates are lost.
+    """
+
+    def __init__(self, path):
+        """Constructor.
+
+        :param path: path of the state file, shared by all harvesting tasks.
+        """
+        self._path = path
+
+    @contextmanager
+    def _locked(self):
+        """Loads the state under an exclusive lock and saves it afterwards."""
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        with open(f"{self._path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self._path) as fp:
+                    state = json.load(fp)
+            except FileNotFoundError:
+                state = {"high_water_mark": None, "harvested": []}
+            yield state
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as fp:
+                json.dump(state, fp)
+            os.replace(tmp_path, self._path)
+
+    @property
+    def high_water_mark(self):
+        """Datestamp up to which everything was harvested, or None."""
+        try:
+            with open(self._path) as fp:
+                value = json.load(fp)["high_water_mark"]
+        except FileNotFoundError:
+            return None
+        return arrow.get(value) if value else None
+
+    def start(self, since):
+        """Sets the high-water mark if there is none yet."""
+        with self._locked() as state:
+            if state["high_water_mark"] is None:
+                state["high_water_mark"] = since.isoformat()
+
+    def mark_harvested(self, start, end):
+        """Records a harvested window and advances the high-water mark."""
+        with self._locked() as state:
+            windows = state["harvested"] + [[start.isoformat(), end.isoformat()]]
+            windows.sort(key=lambda window: arrow.get(window[0]))
+            mark = arrow.get(state["high_water_mark"] or start)
+            pending = []
+            for window_start, window_end in windows:
+                if arrow.get(window_start) <= mark:
+                    mark = max(mark, arrow.get(window_end))
+                else:
+                    pending.append([window_start, window_end])
+            state["high_water_mark"] = mark.isoformat()
+            state["harvested"] = pending
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Binary MARC21 (ISO 2709) records.
+
+A record is split into ``Datafields``, a list of ``(tag, field)`` tuples
+of its datafields with the decoded field data. The subfields of a field are
+only parsed with ``subfields_of_field`` when they are needed, which keeps
+the records compact to pass on to other processes. Control fields are left
+out. Records are expected to be UTF-8 encoded (leader position 9 is ``a``),
+as published by the DNB.
+"""
+
+RECORD_TERMINATOR = b"\x1d"
+FIELD_TERMINATOR = b"\x1e"
+SUBFIELD_DELIMITER = "\x1f"
+
+LEADER_LENGTH = 24
+DIRECTORY_ENTRY_LENGTH = 12
+
+
+class Datafields(list):
+    """Datafields of a parsed record.
+
+    The representation is kept short, as the data stream logs every entry it
+    transforms at debug level, formatting it even if the level is disabled.
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        """Short representation."""
+        return f"<{type(self).__name__} of {len(self)} datafields>"
+
+
+def iter_iso2709(fp, chunk_size=1024 * 1024):
+    """Yields the raw records of a binary MARC21 stream."""
+    rest = b""
+    while chunk := fp.read(chunk_size):
+        records = (rest + chunk).split(RECORD_TERMINATOR)
+        rest = records.pop()
+        for record in records:
+            # some dumps put a line break between the records
+            record = record.lstrip(b"\r\n")
+            if record:
+                yield record
+    rest = rest.strip()
+    if rest:
+        yield rest
+
+
+def parse_iso2709(data):
+    """Splits a raw record into its datafields.
+
+    :raises ValueError: if the leader or the directory is malformed.
+    """
+    base = int(data[12:17])
+    datafields = Datafields()
+    for pos in range(LEADER_LENGTH, base - 1, DIRECTORY_ENTRY_LENGTH):
+        entry = data[pos : pos + DIRECTORY_ENTRY_LENGTH]
+        if entry[:2] == b"00":
+            continue
+        start = base + int(entry[7:12])
+        # without the field terminator
+        field = data[start : start + int(entry[3:7]) - 1]
+        datafields.append((entry[:3].decode("ascii"), field.decode("utf-8", "replace")))
+    return datafields
+
+
+def subfields_of_field(field):
+    """Maps the subfield codes of a datafield to their values in order."""
+    subfields = {}
+    # the indicators come before the first delimiter
+    for part in field.split(SUBFIELD_DELIMITER)[1:]:
+        if not part:
+            continue
+        code, value = part[0], part[1:] or None
+        if code in subfields:
+            subfields[code].append(value)
+        else:
+            subfields[code] = [value]
+    return subfields
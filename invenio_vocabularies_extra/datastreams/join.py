@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Joining several streams of keyed values in one pass.
+
+The streams are consumed in turns, so they are read concurrently, and the
+values are collected by key until every stream delivered one. Then the key is
+complete and handed on right away. Streams in the same order, like the
+language versions of a vocabulary, are joined with only a few incomplete keys
+held at any time. For streams in different orders the incomplete keys beyond
+``max_pending`` are spilled to a temporary SQLite database, which is deleted
+once the join is closed.
+"""
+
+import json
+import sqlite3
+
+
+class PendingJoin:
+    """Values of the incomplete keys of a join."""
+
+    def __init__(self, names, max_pending=None):
+        """Constructor.
+
+        :param names: names of the joined streams, the joined values are
+                      ordered by them.
+        :param max_pending: number of incomplete keys kept in memory, None
+                            keeps all of them.
+        """
+        self.names = list(names)
+        self.max_pending = max_pending
+        self._pending = {}
+        self._spilled = set()
+        self._db = None
+
+    def add(self, name, key, value):
+        """Adds the value of a stream.
+
+        :returns: the values by stream name if the key is complete, else None.
+        """
+        values = self._pending.pop(key, None)
+        if values is None:
+            values = self._load(key) if key in self._spilled else {}
+        values[name] = value
+        if len(values) == len(self.names):
+            return self._ordered(values)
+        self._pending[key] = values
+        if self.max_pending is not None and len(self._pending) > self.max_pending:
+            self._spill()
+        return None
+
+    def remaining(self):
+        """Yields the incomplete keys with the values they got, oldest first."""
+        if self._db is not None:
+            rows = self._db.execute("SELECT key, vals FROM pending ORDER BY rowid")
+            for key, values in rows:
+                yield key, self._ordered(json.loads(values))
+        for key, values in self._pending.items():
+            yield key, self._ordered(values)
+
+    def close(self):
+        """Drops the incomplete keys and the temporary database."""
+        self._pending.clear()
+        self._spilled.clear()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self):
+        """Number of incomplete keys."""
+        return len(self._pending) + len(self._spilled)
+
+    def _ordered(self, values):
+        """Values in the order of the stream names."""
+        return {name: values[name] for name in self.names if name in values}
+
+    def _spill(self):
+        """Moves the older half of the incomplete keys to the database."""
+        if self._db is None:
+            # an empty name is a private temporary database on disk
+            self._db = sqlite3.connect("")
+            self._db.execute("CREATE TABLE pending (key TEXT PRIMARY KEY, vals TEXT)")
+        count = max(len(self._pending) // 2, 1)
+        rows = []
+        for key in list(self._pending)[:count]:
+            rows.append((key, json.dumps(self._pending.pop(key))))
+            self._spilled.add(key)
+        self._db.executemany("INSERT INTO pending VALUES (?, ?)", rows)
+
+    def _load(self, key):
+        """Takes the values of a spilled key out of the database."""
+        self._spilled.discard(key)
+        (values,) = self._db.execute(
+            "SELECT vals FROM pending WHERE key = ?", (key,)
+        ).fetchone()
+        self._db.execute("DELETE FROM pending WHERE key = ?", (key,))
+        return json.loads(values)
+
+
+def join_streams(streams, max_pending=None):
+    """Yields ``(key, values)`` for the keys of several streams.
+
+    :param streams: iterators of ``(key, value)`` tuples by name, each key
+                    once per stream. Prefetched iterators are read in
+                    parallel.
+    :param max_pending: number of incomplete keys kept in memory.
+    :returns: the values are a dict by stream name. The keys complete in all
+              streams come first, the ones missing in some streams at the end.
+    """
+    pending = PendingJoin(streams, max_pending=max_pending)
+    active = list(streams.items())
+    try:
+        while active:
+            for item in list(active):
+                name, stream = item
+                try:
+                    key, value = next(stream)
+                except StopIteration:
+                    active.remove(item)
+                    continue
+                values = pending.add(name, key, value)
+                if values is not None:
+                    yield key, values
+        yield from pending.remaining()
+    finally:
+        pending.close()
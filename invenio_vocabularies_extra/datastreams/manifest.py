@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Manifest of the content hashes of written vocabulary entries.
+
+Hashes are only recorded for entries that were written successfully. Async
+writers write the entries in sub-tasks, which append the hashes of the
+entries they committed to a journal next to the manifest. The journal is
+merged into the manifest when it is loaded or saved.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+from .cache import cache_dir
+
+
+def content_hash(entry):
+    """Hash of a transformed entry, independent of the order of its keys."""
+    data = json.dumps(entry, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def manifest_path(name):
+    """Path of the manifest ``name`` in the cache directory."""
+    return os.path.join(cache_dir(), "manifests", f"{name}.json")
+
+
+def journal_path(path):
+    """Path of the journal of a manifest."""
+    return f"{path}.journal"
+
+
+@contextmanager
+def _locked(path):
+    """Serializes the updates of a manifest and its journal between processes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "w") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def journal_written(path, stream_entries):
+    """Appends the written entries to the journal of the manifest at ``path``.
+
+    Deleted entries and entries with errors are journaled without a hash, so
+    that they are dropped from the manifest but still known as processed.
+    """
+    lines = []
+    for stream_entry in stream_entries:
+        entry = stream_entry.entry
+        if not isinstance(entry, dict) or "id" not in entry:
+            continue
+        entry_hash = None
+        if not stream_entry.errors and not entry.get("deleted"):
+            entry_hash = content_hash(entry)
+        lines.append(json.dumps([entry["id"], entry_hash]) + "\n")
+    if not lines:
+        return
+    with _locked(path):
+        with open(journal_path(path), "a") as fp:
+            fp.write("".join(lines))
+
+
+class Manifest:
+    """Content hashes of the entries written by previous runs, keyed by id.
+
+    Entries are classified as ``create`` (unknown id), ``update`` (changed
+    content) or ``skip`` (unchanged content). The hashes of created and
+    updated entries are pending until the entries are confirmed as written,
+    either with ``confirm`` or by the journal of an async writer. Confirmed
+    hashes are kept in memory until the manifest is saved.
+    """
+
+    def __init__(self, path):
+        """Constructor.
+
+        :param path: path of the manifest file, it is created on save.
+        """
+        self._path = path
+        try:
+            with open(path) as fp:
+                self._hashes = json.load(fp)
+        except FileNotFoundError:
+            self._hashes = {}
+        self._pending = {}
+        self._journal_offset = 0
+        self.update_from_journal()
+        self.counts = {"create": 0, "update": 0, "skip": 0}
+
+    def classify(self, entry):
+        """Classifies the entry and stages its hash.
+
+        :returns: ``create``, ``update`` or ``skip``.
+        """
+        entry_hash = content_hash(entry)
+        previous = self._hashes.get(entry["id"])
+        if previous == entry_hash:
+            op_type = "skip"
+        else:
+            op_type = "create" if previous is None else "update"
+            self._pending[entry["id"]] = entry_hash
+        self.counts[op_type] += 1
+        return op_type
+
+    def confirm(self, entry_ids):
+        """Records the staged hashes of entries that were written."""
+        for entry_id in entry_ids:
+            entry_hash = self._pending.pop(entry_id, None)
+            if entry_hash is not None:
+                self._hashes[entry_id] = entry_hash
+
+    def discard(self, entry_id):
+        """Forgets an entry, e.g. because writing it failed."""
+        self._pending.pop(entry_id, None)
+        self._hashes.pop(entry_id, None)
+
+    def update_from_journal(self):
+        """Records the entries journaled by async writers since the last call.
+
+        :returns: the ids of the journaled entries.
+        """
+        try:
+            with open(journal_path(self._path), "rb") as fp:
+                fp.seek(self._journal_offset)
+                data = fp.read()
+        except FileNotFoundError:
+            return []
+        # a line being appended is read with the next call
+        data = data[: data.rfind(b"\n") + 1]
+        self._journal_offset += len(data)
+        entry_ids = []
+        for line in data.splitlines():
+            entry_id, entry_hash = json.loads(line)
+            self._pending.pop(entry_id, None)
+            if entry_hash is None:
+                self._hashes.pop(entry_id, None)
+            else:
+                self._hashes[entry_id] = entry_hash
+            entry_ids.append(entry_id)
+        return entry_ids
+
+    def save(self):
+        """Persists the manifest, merging and truncating the journal.
+
+        Pending hashes are not saved, their entries are written again by the
+        next run.
+
+        :returns: the ids of the entries merged from the journal.
+        """
+        with _locked(self._path):
+            entry_ids = self.update_from_journal()
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w") as fp:
+                json.dump(self._hashes, fp)
+            os.replace(tmp_path, self._path)
+            try:
+                os.remove(journal_path(self._path))
+            except FileNotFoundError:
+                pass
+            self._journal_offset = 0
+        return entry_ids
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Declarative mapping of MARC21 authority records.
+
+A mapping is a dict with the ``defaults`` of the result and a list of
+``rules``. Every rule takes the subfields of the datafields with a ``tag``
+(only of the first one with ``first``) and writes a value to a ``target``:
+
+- ``value``: a subfield code, or a heading composed of a main subfield
+  ``code``, a ``prefix`` subfield put in front with a ``joiner`` and a
+  ``suffix`` subfield appended with ``suffix_format``, also if it is empty.
+- ``pattern``: regular expression the value must match, its first group
+  (or the whole match) is used.
+- ``format``: format string of the value, or a dict of format strings to
+  build a dict.
+- ``target``: dotted key of the result, or a list of them. It may contain
+  ``{lang}`` to use the language of the ``language`` rule.
+- ``append``: append to a list instead of setting the value. With
+  ``unique`` the value is skipped if it is in the list already, or if the
+  first value of the subfield ``unique`` names is.
+- ``when``: dict of subfield codes and the value their first occurrence
+  must have.
+- ``language``: ``code`` of the subfield holding the languages, a
+  ``prefix`` the values must start with and a ``map`` of the language
+  codes. The value is written once per mapped language.
+
+Deleted records only have the identifier of their OAI-PMH header. The
+``deleted`` section of a mapping turns it into the entry to delete: a
+``pattern`` searched in the identifier (its first group, or the whole
+match), the ``format`` of the value and optionally the ``scheme`` of the
+entry. The value is the ``id`` of the entry, unless the ``target`` names
+another key, e.g. for identifiers the writer resolves to the id.
+
+The mapping is compiled into plain functions once, a record is transformed
+in a single pass over its datafields. Records are MARC21-xml elements or
+the datafields of binary MARC21 records.
+"""
+
+import re
+
+from .iso2709 import subfields_of_field
+from .readers import MARC21_NAMESPACE
+
+DATAFIELD = f"{MARC21_NAMESPACE}datafield"
+SUBFIELD = f"{MARC21_NAMESPACE}subfield"
+
+
+def subfields_of(datafield):
+    """Maps the subfield codes of a datafield to their texts in order."""
+    subfields = {}
+    for subfield in datafield.iterchildren(SUBFIELD):
+        code = subfield.get("code")
+        if code in subfields:
+            subfields[code].append(subfield.text)
+        else:
+            subfields[code] = [subfield.text]
+    return subfields
+
+
+def _compile_value(spec):
+    """Function extracting the value of a rule from the subfields, or None."""
+    if isinstance(spec, str):
+
+        def value(subfields):
+            values = subfields.get(spec)
+            return values[0] if values else None
+
+        return value
+
+    code = spec["code"]
+    prefix = spec.get("prefix")
+    joiner = spec.get("joiner", " ")
+    suffix = spec.get("suffix")
+    suffix_format = spec.get("suffix_format", " {}")
+
+    def heading(subfields):
+        if code not in subfields:
+            return None
+        value = subfields[code][0]
+        if prefix in subfields:
+            value = joiner.join(filter(None, [subfields[prefix][0], value]))
+        if suffix in subfields:
+            # an empty suffix subfield still adds the format, e.g. " <>"
+            value += suffix_format.format(subfields[suffix][0] or "")
+        return value
+
+    return heading
+
+
+def _compile_pattern(get_value, pattern):
+    """Function extracting the match of a pattern from a value, or None."""
+    if pattern is None:
+        return get_value
+    regex = re.compile(pattern)
+
+    def value(subfields):
+        text = get_value(subfields)
+        match = regex.search(text) if text is not None else None
+        if match is None:
+            return None
+        return match.group(1) if regex.groups else match.group(0)
+
+    return value
+
+
+def _compile_format(spec):
+    """Function formatting the value of a rule, or None to keep it as is."""
+    if spec is None:
+        return None
+    if isinstance(spec, dict):
+        formats = list(spec.items())
+        return lambda value: {key: fmt.format(value) for key, fmt in formats}
+    return spec.format
+
+
+def _compile_languages(spec):
+    """Function listing the mapped languages of the subfields, or None."""
+    if spec is None:
+        return None
+    code = spec["code"]
+    prefix = spec.get("prefix", "")
+    mapping = spec["map"]
+
+    def languages(subfields):
+        langs = []
+        for value in subfields.get(code, ()):
+            if value and value.startswith(prefix):
+                lang = mapping.get(value[len(prefix) :])
+                if lang is not None:
+                    langs.append(lang)
+        return langs
+
+    return languages
+
+
+def _compile_target(target, append, unique):
+    """Function writing a value to a dotted key of the result."""
+    *parents, key = target.split(".")
+    localized = "{lang}" in key
+
+    def container(result, lang):
+        for parent in parents:
+            result = result[parent]
+        return result, key.format(lang=lang) if localized else key
+
+    if not append and not parents and not localized:
+
+        def write(result, value, subfields, lang):
+            result[key] = value
+
+    elif not append:
+
+        def write(result, value, subfields, lang):
+            result, name = container(result, lang)
+            result[name] = value
+
+    elif unique is None:
+
+        def write(result, value, subfields, lang):
+            result, name = container(result, lang)
+            result[name].append(value)
+
+    else:
+
+        def write(result, value, subfields, lang):
+            result, name = container(result, lang)
+            items = result[name]
+            check = value if unique is True else subfields[unique][0]
+            if check not in items:
+                items.append(value)
+
+    return write
+
+
+def _compile_rule(rule):
+    """Function applying a rule to the subfields of a datafield."""
+    get_value = _compile_pattern(_compile_value(rule["value"]), rule.get("pattern"))
+    format_value = _compile_format(rule.get("format"))
+    languages = _compile_languages(rule.get("language"))
+    targets = rule["target"]
+    if isinstance(targets, str):
+        targets = [targets]
+    writers = [
+        _compile_target(target, rule.get("append", False), rule.get("unique"))
+        for target in targets
+    ]
+    conditions = list(rule.get("when", {}).items())
+
+    if not conditions and languages is None and len(writers) == 1:
+        # the common case, without the loops
+        (write,) = writers
+
+        def apply(subfields, result):
+            value = get_value(subfields)
+            if value is not None:
+                if format_value:
+                    value = format_value(value)
+                write(result, value, subfields, None)
+
+        return apply
+
+    def apply(subfields, result):
+        for code, expected in conditions:
+            values = subfields.get(code)
+            if not values or values[0] != expected:
+                return
+        value = get_value(subfields)
+        if value is None:
+            return
+        for lang in languages(subfields) if languages else (None,):
+            # every target gets its own value, e.g. a dict
+            for write in writers:
+                formatted = format_value(value) if format_value else value
+                write(result, formatted, subfields, lang)
+
+    return apply
+
+
+def compile_mapping(mapping):
+    """Compiles a mapping into a function transforming a record.
+
+    The record is a MARC21-xml record element, or the datafields of a binary
+    record as split by ``iso2709.parse_iso2709``.
+    """
+    defaults = list(mapping.get("defaults", {}).items())
+    rules = [
+        (rule["tag"], rule.get("first", False), _compile_rule(rule))
+        for rule in mapping["rules"]
+    ]
+    tags = {tag for tag, _, _ in rules}
+
+    def transform(record):
+        datafields = {tag: [] for tag in tags}
+        if isinstance(record, list):
+            # datafields of binary MARC21, only the mapped ones are parsed
+            for tag, field in record:
+                subfields_list = datafields.get(tag)
+                if subfields_list is not None:
+                    subfields_list.append(subfields_of_field(field))
+        else:
+            for datafield in record.iterchildren(DATAFIELD):
+                subfields_list = datafields.get(datafield.get("tag"))
+                if subfields_list is not None:
+                    subfields_list.append(subfields_of(datafield))
+
+        result = {
+            key: value.copy() if isinstance(value, (dict, list)) else value
+            for key, value in defaults
+        }
+        # rules are applied in the order of the mapping
+        for tag, first, apply in rules:
+            subfields_list = datafields[tag]
+            if first:
+                subfields_list = subfields_list[:1]
+            for subfields in subfields_list:
+                apply(subfields, result)
+        return result
+
+    return transform
+
+
+def compile_deletion(mapping):
+    """Compiles the ``deleted`` section of a mapping, or None if it has none.
+
+    The function returns the entry deleting the record of an OAI-PMH
+    identifier, or None if the identifier does not match.
+    """
+    spec = mapping.get("deleted")
+    if spec is None:
+        return None
+    pattern = re.compile(spec["pattern"])
+    id_format = spec.get("format", "{}")
+    target = spec.get("target", "id")
+    scheme = spec.get("scheme")
+
+    def deletion(identifier):
+        match = pattern.search(identifier or "")
+        if match is None:
+            return None
+        value = match.group(1) if pattern.groups else match.group(0)
+        entry = {target: id_format.format(value), "deleted": True}
+        if scheme is not None:
+            entry["scheme"] = scheme
+        return entry
+
+    return deletion
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Running a stage of a data stream ahead in a background thread."""
+
+import queue
+import threading
+
+_DONE = object()
+"""Marks the end of the prefetched items."""
+
+
+def prefetch(iterable, depth=1):
+    """Iterates over ``iterable`` in a background thread.
+
+    At most ``depth`` items are produced ahead of the consumer. Exceptions of
+    the producer are raised in the consumer once the items before them were
+    consumed. If the consumer stops early the producer is stopped as well.
+    """
+    items = queue.Queue(maxsize=max(depth, 1))
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as err:
+            put((_DONE, err))
+        finally:
+            close = getattr(iterable, "close", None)
+            if stopped.is_set() and close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, err = items.get()
+            if err is not None:
+                raise err
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Profiling data streams on a sample of the real source data.
+
+The sampling profiler records the stacks of all threads in fixed intervals
+from a background thread, so the profiled code runs unmodified and the
+overhead does not depend on the number of function calls. The stacks are
+written in the folded format of flame graph tools (e.g. speedscope or
+``flamegraph.pl``) besides a plain text summary.
+"""
+
+import json
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+
+from .datastreams import ParallelDataStream
+
+
+def _frame_name(frame):
+    """Function name and location of a stack frame."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of all threads."""
+
+    def __init__(self, interval=0.005):
+        """Constructor.
+
+        :param interval: seconds between two samples.
+        """
+        self.interval = interval
+        # number of samples per stack, rooted at the thread name
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts sampling in a background thread."""
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops sampling."""
+        self._stopped.set()
+        self._thread.join()
+
+    def __enter__(self):
+        """Starts sampling."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Stops sampling."""
+        self.stop()
+
+    def _sample(self):
+        """Samples the stacks until stopped."""
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        """Stacks in the folded format, one ``a;b;c count`` line per stack."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in sorted(self.stacks.items())
+        )
+
+    def report(self, top=25):
+        """Functions with the most samples, on top of the stack and in total."""
+        total = sum(self.stacks.values())
+        own = Counter()
+        inclusive = Counter()
+        threads = Counter()
+        for stack, count in self.stacks.items():
+            threads[stack[0]] += count
+            own[stack[-1]] += count
+            for name in set(stack[1:]):
+                inclusive[name] += count
+
+        def table(title, counter):
+            lines = [title]
+            for name, count in counter.most_common(top):
+                lines.append(f"{100 * count / total:6.1f}% {count:8} {name}")
+            return lines
+
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:g} ms, "
+            f"{total} thread stacks",
+            "",
+        ]
+        lines += table("Samples per thread:", threads) + [""]
+        lines += table("Functions on top of the stack (own time):", own) + [""]
+        lines += table("Functions on the stack (total time):", inclusive)
+        return "\n".join(lines) + "\n"
+
+
+def allocation_report(snapshot, peak, top=25):
+    """Source lines allocating the most memory still held in the snapshot."""
+    snapshot = snapshot.filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+    )
+    stats = snapshot.statistics("lineno")
+    lines = [
+        f"Peak traced memory: {peak / 1024**2:.1f} MiB",
+        f"Memory held at the end: {sum(s.size for s in stats) / 1024**2:.1f} MiB",
+        "",
+        "Source lines holding the most memory:",
+    ]
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size / 1024:10.1f} KiB {stat.count:8} blocks "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def write_profile(directory, profiler, snapshot, peak, summary, top=25):
+    """Writes the CPU and allocation reports and the summary.
+
+    :returns: the paths of the written files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {
+        "cpu.folded": profiler.folded(),
+        "cpu.txt": profiler.report(top),
+        "memory.txt": allocation_report(snapshot, peak, top),
+        "summary.json": json.dumps(summary, indent=2, default=str),
+    }
+    paths = []
+    for name, content in files.items():
+        path = os.path.join(directory, name)
+        with open(path, "w") as fp:
+            fp.write(content)
+        paths.append(path)
+    return paths
+
+
+class SampledDataStream(ParallelDataStream):
+    """Data stream processing only a sample of the entries read.
+
+    With a ``fraction`` every n-th entry is processed, so the readers still
+    read the whole source. With a ``limit`` reading stops after as many
+    entries were taken.
+    """
+
+    def __init__(self, *args, limit=None, fraction=None, **kwargs):
+        """Constructor.
+
+        :param limit: maximum number of entries processed.
+        :param fraction: share of the entries read that is processed.
+        """
+        self._limit = limit
+        self._step = max(round(1 / fraction), 1) if fraction else 1
+        super().__init__(*args, **kwargs)
+
+    def read(self):
+        """Reads the entries of the sample."""
+        entries = super().read()
+        taken = 0
+        try:
+            for ordinal, stream_entry in enumerate(entries):
+                if ordinal % self._step:
+                    continue
+                if self._limit is not None and taken >= self._limit:
+                    return
+                taken += 1
+                yield stream_entry
+        finally:
+            entries.close()
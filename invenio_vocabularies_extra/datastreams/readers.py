@@ -8,28 +8,849 @@
 
 """Extra Readers module."""
 
-from invenio_vocabularies.datastreams.readers import BaseReader
+import csv
+import io
+import json
+import os
+import zipfile
+
+import requests
+import yaml
+from flask import current_app
+from invenio_vocabularies.datastreams.errors import ReaderError
+from invenio_vocabularies.datastreams.readers import BaseReader, ZipReader
 from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from .cache import SourceCache
+from .decompress import DEFLATE_WBITS, threaded_inflate, zip_member_offset
+from .iso2709 import iter_iso2709, parse_iso2709
+from .join import join_streams
+from .prefetch import prefetch
+from .shards import ByteRangeFile, load_record_index, shard_byte_range
+from .snapshot import read_snapshot
+from .spool import spooled_download
+
+MARC21_NAMESPACE = "{http://www.loc.gov/MARC21/slim}"
+"""Namespace of MARC21-xml (slim) records."""
+
+OAI_NAMESPACE = "{http://www.openarchives.org/OAI/2.0/}"
+"""Namespace of OAI-PMH responses."""
+
+
+def iterparse_elements(fp, tag, detach=False):
+    """Yields every element with the given tag as soon as it is closed.
+
+    The document is parsed incrementally. By default the element and all of
+    its already processed siblings are cleared once the consumer resumes, so
+    the memory used is bounded by a single element regardless of document
+    size. With ``detach`` the element is instead removed from the tree before
+    it is yielded, so it stays usable for as long as the consumer keeps it.
+    """
+    context = etree.iterparse(fp, events=("end",), tag=tag)
+    for _, element in context:
+        parent = element.getparent()
+        if detach:
+            if parent is not None:
+                parent.remove(element)
+            yield element
+            continue
+        yield element
+        element.clear(keep_tail=True)
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+    del context
+
+
+class CachedHTTPReader(BaseReader):
+    """HTTP reader keeping the downloaded file in the local source cache.
+
+    The cached file is revalidated with a conditional request and handed on
+    as an open binary file, so the next reader streams it from disk.
+    """
+
+    def __init__(
+        self, origin, *args, skip_unchanged=None, mark_processed=True, **kwargs
+    ):
+        """Constructor.
+
+        :param origin: URL of the source file.
+        :param skip_unchanged: if True nothing is read when the source did not
+                               change since it was last processed completely.
+                               Defaults to
+                               ``VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED``.
+        :param mark_processed: if False the source is not marked as processed
+                               once it was read completely, e.g. when the
+                               entries are not written.
+        """
+        self._skip_unchanged = skip_unchanged
+        self._mark_processed = mark_processed
+        # identity of the downloaded version of the source, known once read
+        self.source_version = None
+        super().__init__(origin, *args, mode="rb", **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the cached file."""
+        yield fp
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the source file from the cache, downloading it if it changed."""
+        url = item or self._origin
+        skip_unchanged = self._skip_unchanged
+        if skip_unchanged is None:
+            skip_unchanged = current_app.config.get(
+                "VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED", False
+            )
+        cache = SourceCache.from_config()
+        metadata = cache.fetch(url)
+        self.source_version = f"{url}#{metadata['fetched']}"
+        if skip_unchanged and not metadata["changed"] and metadata["processed"]:
+            current_app.logger.info("Skipping unchanged source %s", url)
+            return
+
+        with open(cache.path(url), self._mode) as fp:
+            yield from self._iter(fp=fp, *args, **kwargs)
+        # only reached when the next readers consumed the whole file
+        if self._mark_processed:
+            cache.mark_processed(url)
+
+
+class SpooledHTTPReader(BaseReader):
+    """HTTP reader handing on the download while it is in progress.
+
+    The response is spooled to a temporary file, in memory up to
+    ``max_memory`` and on disk beyond it, see ``SpooledDownload``. The next
+    reader gets a seekable file object right away, reads block until the
+    bytes arrived. Unlike ``CachedHTTPReader`` nothing is kept once read.
+    """
+
+    def __init__(
+        self,
+        origin,
+        *args,
+        max_memory=None,
+        tail_size=1024**2,
+        chunk_size=1024 * 1024,
+        timeout=60,
+        **kwargs,
+    ):
+        """Constructor.
+
+        :param origin: URL of the source file.
+        :param max_memory: size in bytes beyond which the download is spooled
+                           to disk, defaults to
+                           ``VOCABULARIES_EXTRA_HTTP_SPOOL_MAX_MEMORY``.
+        :param tail_size: number of bytes at the end fetched first if the
+                          server supports range requests, e.g. for the
+                          central directory of a zip archive.
+        :param chunk_size: size of the chunks downloaded.
+        :param timeout: timeout of the requests in seconds.
+        """
+        self._max_memory = max_memory
+        self._tail_size = tail_size
+        self._chunk_size = chunk_size
+        self._timeout = timeout
+        super().__init__(origin, *args, mode="rb", **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the downloading file."""
+        yield fp
+
+    def read(self, item=None, *args, **kwargs):
+        """Starts the download and reads it while in progress."""
+        max_memory = self._max_memory
+        if max_memory is None:
+            max_memory = current_app.config.get(
+                "VOCABULARIES_EXTRA_HTTP_SPOOL_MAX_MEMORY", 64 * 1024**2
+            )
+        with spooled_download(
+            item or self._origin,
+            max_memory=max_memory,
+            tail_size=self._tail_size,
+            chunk_size=self._chunk_size,
+            timeout=self._timeout,
+        ) as fp:
+            yield from self._iter(fp=fp, *args, **kwargs)
+
+
+def _decompress_buffer(buffer):
+    """Number of decompressed chunks buffered ahead."""
+    if buffer is None:
+        buffer = current_app.config.get("VOCABULARIES_EXTRA_DECOMPRESS_BUFFER", 8)
+    return buffer
+
+
+class ThreadedGzipReader(BaseReader):
+    """Gzip reader decompressing in a background thread.
+
+    The decompressed data is handed on as a file object, while the next
+    chunks are decompressed ahead, so the next reader parses it concurrently.
+    """
+
+    def __init__(self, *args, mode="rb", buffer=None, chunk_size=1024 * 1024, **kwargs):
+        """Constructor.
+
+        :param buffer: number of decompressed chunks buffered ahead, defaults
+                       to ``VOCABULARIES_EXTRA_DECOMPRESS_BUFFER``.
+        :param chunk_size: size of the compressed chunks read in bytes.
+        """
+        self._buffer = buffer
+        self._chunk_size = chunk_size
+        super().__init__(*args, mode=mode, **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the decompressed file."""
+        if isinstance(fp, bytes):
+            fp = io.BytesIO(fp)
+        with threaded_inflate(
+            fp, chunk_size=self._chunk_size, buffer=_decompress_buffer(self._buffer)
+        ) as stream:
+            yield stream
+
+
+class ThreadedZipReader(ZipReader):
+    """ZIP reader decompressing the deflated members in a background thread.
+
+    The CRC-32 and size of the decompressed members are checked against the
+    central directory, like ``zipfile`` does. Members that are not deflated
+    or are encrypted are opened as usual.
+    """
+
+    def __init__(self, *args, buffer=None, chunk_size=1024 * 1024, **kwargs):
+        """Constructor.
+
+        :param buffer: number of decompressed chunks buffered ahead, defaults
+                       to ``VOCABULARIES_EXTRA_DECOMPRESS_BUFFER``.
+        :param chunk_size: size of the compressed chunks read in bytes.
+        """
+        self._buffer = buffer
+        self._chunk_size = chunk_size
+        super().__init__(*args, **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Iterates through the files in the archive."""
+        for member in fp.infolist():
+            match = not self._regex or self._regex.search(member.filename)
+            if member.is_dir() or not match:
+                continue
+            if member.compress_type != zipfile.ZIP_DEFLATED or member.flag_bits & 0x1:
+                yield fp.open(member)
+                continue
+            # the archive file is only read by the thread until it is closed
+            fp.fp.seek(zip_member_offset(fp.fp, member))
+            with threaded_inflate(
+                fp.fp,
+                wbits=DEFLATE_WBITS,
+                chunk_size=self._chunk_size,
+                buffer=_decompress_buffer(self._buffer),
+                length=member.compress_size,
+                crc=member.CRC,
+                size=member.file_size,
+            ) as stream:
+                yield stream
 
 
 class Marc21CollectionReader(BaseReader):
     """Reader for MARC21 collection data."""
 
+    def __init__(self, *args, mode="rb", serialize=True, **kwargs):
+        """Constructor.
+
+        :param serialize: if False the parsed record element is handed on as
+                          is instead of being serialized to bytes. Only use it
+                          when the transformers run in the same process.
+        """
+        self._serialize = serialize
+        super().__init__(*args, mode=mode, **kwargs)
+
     def _iter(self, fp, *args, **kwargs):
-        """Yields single records from Marc21-xml collection."""
-        collection = etree.parse(fp)
-        xmlns = "{http://www.loc.gov/MARC21/slim}"
-        records = collection.findall(f"{xmlns}record")
+        """Yields single records from Marc21-xml collection.
+
+        The collection is streamed, the first record is yielded as soon as it
+        has been parsed.
+        """
+        records = iterparse_elements(
+            fp, f"{MARC21_NAMESPACE}record", detach=not self._serialize
+        )
         for record in records:
-            yield {"record": etree.tostring(record)}
+            if self._serialize:
+                record = etree.tostring(record)
+            yield {"record": record}
+
+
+class Marc21ShardReader(Marc21CollectionReader):
+    """Reader for one shard of an indexed, decompressed MARC21 collection."""
+
+    def __init__(self, origin, *args, shard=0, shards=1, **kwargs):
+        """Constructor.
+
+        :param origin: path of the decompressed collection, the record index
+                       is expected next to it.
+        :param shard: number of the shard to read, starting with 0.
+        :param shards: total number of shards.
+        """
+        self._shard = shard
+        self._shards = shards
+        super().__init__(origin, *args, **kwargs)
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the records within the byte range of the shard."""
+        if item:
+            raise NotImplementedError(
+                "Marc21ShardReader does not support being chained after another reader"
+            )
+        index = load_record_index(self._origin)
+        if index is None:
+            raise ReaderError(f"No record index found for {self._origin}.")
+        byte_range = shard_byte_range(index, self._shard, self._shards)
+        if byte_range is None:
+            return
+
+        with open(self._origin, "rb") as fp:
+            prefix = fp.read(index["records"][0])
+            fp.seek(index["end"])
+            suffix = fp.read()
+            shard_fp = ByteRangeFile(fp, *byte_range, prefix=prefix, suffix=suffix)
+            yield from self._iter(fp=shard_fp, *args, **kwargs)
+
+
+class Marc21BinaryReader(BaseReader):
+    """Reader for binary MARC21 (ISO 2709) data.
+
+    The records are streamed and handed on as their datafields, see
+    ``iso2709``, which ``Marc21MappingTransformer`` consumes directly.
+    Malformed records are logged and skipped.
+    """
+
+    def __init__(self, *args, mode="rb", **kwargs):
+        """Constructor."""
+        super().__init__(*args, mode=mode, **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the parsed records of the stream."""
+        if isinstance(fp, bytes):
+            fp = io.BytesIO(fp)
+        for idx, data in enumerate(iter_iso2709(fp)):
+            try:
+                record = parse_iso2709(data)
+            except ValueError:
+                current_app.logger.warning(
+                    "Skipping malformed binary MARC21 record %s", idx, exc_info=True
+                )
+                continue
+            yield {"record": record}
 
 
 class MeshReader(BaseReader):
     """Reader for MeSH xml data."""
 
+    def __init__(self, *args, mode="rb", serialize=True, **kwargs):
+        """Constructor.
+
+        :param serialize: if False the parsed descriptor element is handed on
+                          as is instead of being serialized to bytes. Only use
+                          it when the transformers run in the same process.
+        """
+        self._serialize = serialize
+        super().__init__(*args, mode=mode, **kwargs)
+
     def _iter(self, fp, *args, **kwargs):
-        """Yields single records from MeSH-xml descriptorRecordSet."""
-        descriptorRecordSet = etree.parse(fp)
-        descriptorRecords = descriptorRecordSet.findall("DescriptorRecord")
-        for descriptorRecord in descriptorRecords:
-            yield {"record": etree.tostring(descriptorRecord)}
+        """Yields single records from MeSH-xml descriptorRecordSet.
+
+        The file pointer does not need to be seekable, so a member opened by
+        the zip reader is decompressed and parsed on the fly.
+        """
+        if isinstance(fp, bytes):
+            fp = io.BytesIO(fp)
+        descriptor_records = iterparse_elements(
+            fp, "DescriptorRecord", detach=not self._serialize
+        )
+        for descriptor_record in descriptor_records:
+            if self._serialize:
+                descriptor_record = etree.tostring(descriptor_record)
+            yield {"record": descriptor_record}
+
+
+def mesh_descriptor_terms(record):
+    """Id and terms of a MeSH descriptor record, the id is its DescriptorUI.
+
+    :returns: the ``name`` of the descriptor as given and the ``synonyms``,
+              the non-permuted terms of the preferred concept which are not
+              its preferred term.
+    """
+    synonyms = []
+    for concept in record.iterfind("ConceptList/Concept"):
+        if concept.get("PreferredConceptYN") != "Y":
+            continue
+        for term in concept.iterfind("TermList/Term"):
+            if (
+                term.get("ConceptPreferredTermYN") == "N"
+                and term.get("IsPermutedTermYN") == "N"
+            ):
+                synonyms.append(term.findtext("String"))
+    return record.findtext("DescriptorUI"), {
+        "name": record.findtext("DescriptorName/String"),
+        "synonyms": synonyms,
+    }
+
+
+class MeshJoinReader(BaseReader):
+    """Reader joining the MeSH descriptor files of several languages.
+
+    The files are parsed concurrently, each in a background thread, and the
+    descriptors are joined by their DescriptorUI. Every descriptor is handed
+    on once with the terms of all languages, see ``join_streams``::
+
+        {
+            "id": "D000003",
+            "descriptors": {
+                "de": {"name": "Schlachthöfe[Abattoirs]", "synonyms": [...]},
+                "fr": {"name": "Abattoirs", "synonyms": [...]},
+            },
+        }
+
+    Descriptors missing in some files are handed on at the end with the
+    languages they were found in. The files are XML, gzipped XML or zip
+    archives of XML files. URLs are downloaded into the source cache first.
+    """
+
+    def __init__(
+        self,
+        origin,
+        *args,
+        mode="rb",
+        buffer=None,
+        max_pending=None,
+        skip_unchanged=None,
+        mark_processed=True,
+        **kwargs,
+    ):
+        """Constructor.
+
+        :param origin: URLs or paths of the descriptor files by language.
+        :param buffer: number of descriptors parsed ahead per file, also the
+                       number of decompressed chunks buffered ahead.
+                       Defaults to ``VOCABULARIES_EXTRA_DECOMPRESS_BUFFER``.
+        :param max_pending: number of incompletely joined descriptors kept in
+                            memory, defaults to
+                            ``VOCABULARIES_EXTRA_JOIN_MAX_PENDING``.
+        :param skip_unchanged: if True nothing is read when none of the
+                               downloaded files changed since they were last
+                               processed completely. Defaults to
+                               ``VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED``.
+        :param mark_processed: if False the downloaded files are not marked as
+                               processed once they were read completely.
+        """
+        self._buffer = buffer
+        self._max_pending = max_pending
+        self._skip_unchanged = skip_unchanged
+        self._mark_processed = mark_processed
+        # identity of the read versions of the files, known once read
+        self.source_version = None
+        super().__init__(origin, *args, mode=mode, **kwargs)
+
+    def _descriptors(self, path, buffer):
+        """Yields the DescriptorUI and terms of the descriptors of a file."""
+        with open(path, self._mode) as fp:
+            is_zip = zipfile.is_zipfile(fp)
+            fp.seek(0)
+            if is_zip:
+                archive = zipfile.ZipFile(fp)
+                members = ThreadedZipReader(buffer=buffer)._iter(archive)
+            elif fp.read(2) == b"\x1f\x8b":
+                fp.seek(0)
+                members = [threaded_inflate(fp, buffer=buffer)]
+            else:
+                fp.seek(0)
+                members = [fp]
+            for member in members:
+                for record in iterparse_elements(member, "DescriptorRecord"):
+                    yield mesh_descriptor_terms(record)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the joined descriptors of the files.
+
+        :param fp: paths of the descriptor files by language.
+        """
+        # resolved here, the files are parsed outside of the app context
+        buffer = _decompress_buffer(self._buffer)
+        max_pending = self._max_pending
+        if max_pending is None:
+            max_pending = current_app.config.get(
+                "VOCABULARIES_EXTRA_JOIN_MAX_PENDING", 100000
+            )
+        streams = {
+            lang: prefetch(self._descriptors(path, buffer), depth=buffer)
+            for lang, path in fp.items()
+        }
+        try:
+            for descriptor_ui, descriptors in join_streams(streams, max_pending):
+                yield {"id": descriptor_ui, "descriptors": descriptors}
+        finally:
+            for stream in streams.values():
+                stream.close()
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the descriptor files, downloading the URLs if they changed."""
+        origins = item or self._origin
+        skip_unchanged = self._skip_unchanged
+        if skip_unchanged is None:
+            skip_unchanged = current_app.config.get(
+                "VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED", False
+            )
+        cache = None
+        paths = {}
+        versions = []
+        unchanged = True
+        for lang, origin in origins.items():
+            if not origin.startswith(("http://", "https://")):
+                paths[lang] = origin
+                versions.append(f"{origin}#{os.path.getmtime(origin)}")
+                unchanged = False
+                continue
+            cache = cache or SourceCache.from_config()
+            metadata = cache.fetch(origin)
+            paths[lang] = cache.path(origin)
+            versions.append(f"{origin}#{metadata['fetched']}")
+            unchanged = unchanged and not metadata["changed"] and metadata["processed"]
+        self.source_version = " ".join(versions)
+        if skip_unchanged and unchanged:
+            current_app.logger.info("Skipping unchanged MeSH files %s", versions)
+            return
+
+        yield from self._iter(fp=paths, *args, **kwargs)
+        # only reached when the next readers consumed all files
+        if self._mark_processed and cache is not None:
+            for origin in origins.values():
+                if origin.startswith(("http://", "https://")):
+                    cache.mark_processed(origin)
+
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+"""Safe YAML loader, the one of libyaml if PyYAML was built with it."""
+
+
+def iter_yaml_sequence(fp, batch_size=1000):
+    """Yields the items of a YAML document which is a block sequence.
+
+    The items start with ``-`` in the first column, so the document is split
+    there and loaded in batches of ``batch_size`` items. Other documents are
+    loaded as a whole.
+
+    :param fp: text file object.
+    """
+    lines = []
+    items = 0
+    for line in fp:
+        if line[:1] == "-" and line[1:2] in ("", " ", "\n", "\r", "\t"):
+            if items >= batch_size:
+                yield from yaml.load("".join(lines), Loader=YAML_LOADER) or []
+                lines = []
+                items = 0
+            items += 1
+        elif not items and line.strip() and line[0] not in "#%" and line[:3] != "---":
+            # not a block sequence, e.g. a flow sequence
+            lines.append(line)
+            lines.extend(fp)
+            break
+        lines.append(line)
+    yield from yaml.load("".join(lines), Loader=YAML_LOADER) or []
+
+
+class DdcReader(BaseReader):
+    """Streaming reader of DDC notations.
+
+    Every notation is handed on as a dict with its ``id`` and its caption per
+    language, e.g. ``{"id": "551", "en": "Geology, ...", "de": "Geologie,
+    ..."}``, as ``DdcYamlTransformer`` expects them. The source can be
+
+    - YAML, a sequence of these dicts, loaded in batches (see
+      ``iter_yaml_sequence``),
+    - JSON Lines, one of these dicts per line,
+    - CSV with a header row, e.g. ``id,en,de``, empty cells are left out.
+
+    The format is taken from the extension of the origin or else guessed
+    from the first bytes. URLs are downloaded into the source cache first.
+    """
+
+    FORMATS = {
+        ".yaml": "yaml",
+        ".yml": "yaml",
+        ".jsonl": "jsonl",
+        ".ndjson": "jsonl",
+        ".csv": "csv",
+    }
+    """Formats by file extension."""
+
+    def __init__(
+        self,
+        *args,
+        mode="rb",
+        format=None,
+        batch_size=1000,
+        mark_processed=True,
+        **kwargs,
+    ):
+        """Constructor.
+
+        :param format: ``yaml``, ``jsonl`` or ``csv``, defaults to the one of
+                       the origin.
+        :param batch_size: number of YAML items loaded at once.
+        :param mark_processed: if False a downloaded source is not marked as
+                               processed once it was read completely.
+        """
+        self._format = format
+        self._batch_size = batch_size
+        self._mark_processed = mark_processed
+        # identity of the read version of the source, known once read
+        self.source_version = None
+        super().__init__(*args, mode=mode, **kwargs)
+
+    def _detect_format(self, fp):
+        """Format of the source."""
+        if self._format:
+            return self._format
+        name = str(self._origin or getattr(fp, "name", ""))
+        extension = os.path.splitext(name.split("?")[0])[1].lower()
+        if extension in self.FORMATS:
+            return self.FORMATS[extension]
+        start = fp.peek(1024).lstrip(b"\xef\xbb\xbf \t\r\n")
+        if start[:1] == b"{":
+            return "jsonl"
+        if start[:1] in (b"-", b"#", b"%", b"["):
+            return "yaml"
+        return "csv"
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the notations of the source."""
+        if isinstance(fp, bytes):
+            fp = io.BytesIO(fp)
+        if not hasattr(fp, "peek"):
+            fp = io.BufferedReader(fp)
+        format_ = self._detect_format(fp)
+        text = io.TextIOWrapper(fp, encoding="utf-8-sig", newline="")
+        try:
+            if format_ == "yaml":
+                yield from iter_yaml_sequence(text, self._batch_size)
+            elif format_ == "jsonl":
+                for line in text:
+                    if line.strip():
+                        yield json.loads(line)
+            elif format_ == "csv":
+                for row in csv.DictReader(text):
+                    yield {
+                        key.strip(): value
+                        for key, value in row.items()
+                        if key and value
+                    }
+            else:
+                raise ReaderError(f"Unknown DDC format {format_}.")
+        finally:
+            # leaves the file object open for its owner
+            text.detach()
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the notations, downloading the origin first if it is a URL."""
+        if item:
+            yield from self._iter(fp=item, *args, **kwargs)
+            return
+        origin = self._origin
+        if not origin:
+            raise ReaderError(
+                "No DDC file configured, set VOCABULARIES_EXTRA_SUBJECTS_DDC_FILE_URL."
+            )
+        # resolves a config proxy like ddc_file_url
+        path = origin = str(origin)
+        cache = None
+        if origin.startswith(("http://", "https://")):
+            cache = SourceCache.from_config()
+            metadata = cache.fetch(origin)
+            path = cache.path(origin)
+            self.source_version = f"{origin}#{metadata['fetched']}"
+        with open(path, self._mode) as fp:
+            yield from self._iter(fp=fp, *args, **kwargs)
+        if cache is not None and self._mark_processed:
+            cache.mark_processed(origin)
+
+
+class NoRecordsMatchError(ReaderError):
+    """The OAI-PMH request matched no records, e.g. a window without updates."""
+
+
+class PrefetchingOAIPMHReader(BaseReader):
+    """OAI-PMH ``ListRecords`` reader fetching the next pages in the background.
+
+    The pages are requested over a persistent, gzip-compressed HTTP session
+    and parsed in a background thread, while the records of the current page
+    are transformed. Deleted records are recognized by their header and
+    skipped, or handed on as ``{"deleted": True, "identifier": ...}``.
+
+    A request matching no records raises ``NoRecordsMatchError``, the other
+    OAI-PMH and HTTP errors a plain ``ReaderError``.
+    """
+
+    def __init__(
+        self,
+        *args,
+        base_url=None,
+        metadata_prefix=None,
+        set=None,
+        from_date=None,
+        until_date=None,
+        read_ahead=None,
+        timeout=60,
+        serialize=True,
+        deleted=False,
+        **kwargs,
+    ):
+        """Constructor.
+
+        :param read_ahead: number of pages fetched ahead, defaults to
+                           ``VOCABULARIES_EXTRA_OAI_READ_AHEAD``.
+        :param timeout: timeout of a single request in seconds.
+        :param serialize: if False the parsed metadata element is handed on as
+                          is instead of being serialized to bytes. Only use it
+                          when the transformers run in the same process.
+        :param deleted: if True deleted records are handed on with the
+                        identifier of their header instead of being skipped.
+        """
+        self._base_url = base_url
+        self._metadata_prefix = metadata_prefix or "oai_dc"
+        self._set = set
+        self._from = from_date
+        self._until = until_date
+        self._read_ahead = read_ahead
+        self._timeout = timeout
+        self._serialize = serialize
+        self._deleted = deleted
+        super().__init__(*args, **kwargs)
+
+    def _session(self):
+        """HTTP session keeping the connection alive, retrying on overload."""
+        session = requests.Session()
+        session.headers["Accept-Encoding"] = "gzip"
+        retries = Retry(
+            total=5,
+            backoff_factor=2,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+        )
+        session.mount("http://", HTTPAdapter(max_retries=retries))
+        session.mount("https://", HTTPAdapter(max_retries=retries))
+        return session
+
+    def _pages(self, session):
+        """Fetches and parses the pages following the resumption tokens."""
+        params = {"verb": "ListRecords", "metadataPrefix": self._metadata_prefix}
+        for key, value in (("set", self._set), ("from", self._from)):
+            if value:
+                params[key] = value
+        if self._until:
+            params["until"] = self._until
+
+        while params:
+            resp = session.get(self._base_url, params=params, timeout=self._timeout)
+            if resp.status_code != 200:
+                raise ReaderError(
+                    f"Failed to fetch OAI-PMH page {resp.url}: {resp.status_code}"
+                )
+            page = etree.fromstring(resp.content)
+            error = page.find(f"{OAI_NAMESPACE}error")
+            if error is not None:
+                if error.get("code") == "noRecordsMatch":
+                    raise NoRecordsMatchError("No records found in OAI-PMH request.")
+                raise ReaderError(f"OAI-PMH error {error.get('code')}: {error.text}")
+            yield page
+
+            token = page.find(
+                f"{OAI_NAMESPACE}ListRecords/{OAI_NAMESPACE}resumptionToken"
+            )
+            params = None
+            if token is not None and token.text:
+                params = {"verb": "ListRecords", "resumptionToken": token.text}
+
+    def _iter(self, pages, *args, **kwargs):
+        """Yields the metadata of the records of all pages."""
+        for page in pages:
+            for record in page.iterfind(
+                f"{OAI_NAMESPACE}ListRecords/{OAI_NAMESPACE}record"
+            ):
+                header = record.find(f"{OAI_NAMESPACE}header")
+                if header is not None and header.get("status") == "deleted":
+                    if self._deleted:
+                        yield {
+                            "deleted": True,
+                            "identifier": header.findtext(f"{OAI_NAMESPACE}identifier"),
+                        }
+                    continue
+                metadata = record.find(f"{OAI_NAMESPACE}metadata")
+                if metadata is None or not len(metadata):
+                    continue
+                element = metadata[0]
+                if self._serialize:
+                    element = etree.tostring(element)
+                yield {"record": element}
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the records, fetching pages ahead."""
+        if item:
+            raise NotImplementedError(
+                "PrefetchingOAIPMHReader does not support being chained after another reader"
+            )
+        read_ahead = self._read_ahead
+        if read_ahead is None:
+            read_ahead = current_app.config.get("VOCABULARIES_EXTRA_OAI_READ_AHEAD", 2)
+        with self._session() as session:
+            pages = self._pages(session)
+            if read_ahead > 0:
+                pages = prefetch(pages, depth=read_ahead)
+            yield from self._iter(pages, *args, **kwargs)
+
+
+class SnapshotReader(BaseReader):
+    """Reader of the transformed entries of a snapshot.
+
+    The entries are handed on as written by the transformers, so the data
+    stream needs no transformers. Chained after another reader, e.g. one
+    downloading the snapshot, the snapshot file object is read as a whole.
+    """
+
+    def __init__(self, *args, mode="rb", shard=0, shards=1, buffer=None, **kwargs):
+        """Constructor.
+
+        :param shard: number of the shard to read, starting with 0.
+        :param shards: total number of shards, the chunks are split between
+                       them.
+        :param buffer: number of decompressed chunks buffered ahead, defaults
+                       to ``VOCABULARIES_EXTRA_DECOMPRESS_BUFFER``.
+        """
+        self._shard = shard
+        self._shards = shards
+        self._buffer = buffer
+        super().__init__(*args, mode=mode, **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Yields the entries of a snapshot file object."""
+        if isinstance(fp, bytes):
+            fp = io.BytesIO(fp)
+        with threaded_inflate(fp, buffer=_decompress_buffer(self._buffer)) as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads the entries of the snapshot, with its chunk index if it has one."""
+        if item:
+            yield from super().read(item, *args, **kwargs)
+            return
+        try:
+            yield from read_snapshot(
+                self._origin,
+                shard=self._shard,
+                shards=self._shards,
+                buffer=_decompress_buffer(self._buffer),
+            )
+        except FileNotFoundError as err:
+            raise ReaderError(f"No snapshot found at {self._origin}.") from err
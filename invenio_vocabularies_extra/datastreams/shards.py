@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Record boundary index to read byte ranges of large XML collections."""
+
+import io
+import json
+import os
+import re
+
+RECORD_START = re.compile(rb"<(?:[\w.-]+:)?record[\s>]")
+"""Start tag of a record, with or without namespace prefix."""
+
+RECORD_END = re.compile(rb"</(?:[\w.-]+:)?record\s*>")
+"""End tag of a record, with or without namespace prefix."""
+
+_OVERLAP = 64
+"""Bytes kept between chunks so that tags on a chunk boundary are found."""
+
+
+def record_index_path(path):
+    """Path of the record index belonging to a decompressed collection."""
+    return f"{path}.idx.json"
+
+
+def build_record_index(src, dst, source=None, chunk_size=1024 * 1024):
+    """Copies a decompressed XML collection and indexes its record boundaries.
+
+    :param src: readable (binary) file object of the decompressed collection.
+    :param dst: file object the collection is copied to.
+    :param source: identity of the source (e.g. its URL), kept in the index.
+    :returns: the index, a dict with the byte offsets of all record start
+              tags in ``records`` and the offset right after the last record
+              end tag in ``end``.
+    """
+    records = []
+    end = 0
+    tail = b""
+    position = 0
+    while chunk := src.read(chunk_size):
+        dst.write(chunk)
+        buffer = tail + chunk
+        base = position - len(tail)
+        for match in RECORD_START.finditer(buffer):
+            # matches inside the tail were found with the previous chunk
+            if match.end() > len(tail):
+                records.append(base + match.start())
+        for match in RECORD_END.finditer(buffer):
+            if match.end() > len(tail):
+                end = base + match.end()
+        position += len(chunk)
+        tail = buffer[-_OVERLAP:]
+
+    return {"source": source, "size": position, "records": records, "end": end}
+
+
+def write_record_index(path, index):
+    """Persists the index next to the decompressed collection."""
+    tmp_path = f"{record_index_path(path)}.tmp"
+    with open(tmp_path, "w") as fp:
+        json.dump(index, fp)
+    os.replace(tmp_path, record_index_path(path))
+
+
+def load_record_index(path):
+    """Loads the index of a decompressed collection, None if there is none."""
+    try:
+        with open(record_index_path(path)) as fp:
+            index = json.load(fp)
+    except FileNotFoundError:
+        return None
+    if not os.path.exists(path) or os.path.getsize(path) != index["size"]:
+        return None
+    return index
+
+
+def shard_byte_range(index, shard, shards):
+    """Byte range ``(start, end)`` of the records belonging to one shard.
+
+    Records are distributed evenly over the shards, ``None`` is returned for
+    a shard without records.
+    """
+    records = index["records"]
+    first = shard * len(records) // shards
+    last = (shard + 1) * len(records) // shards
+    if first == last:
+        return None
+    end = records[last] if last < len(records) else index["end"]
+    return records[first], end
+
+
+class ByteRangeFile(io.RawIOBase):
+    """Read only file object over a byte range of a file.
+
+    The range is framed by a prefix and a suffix, e.g. the opening and
+    closing parts of the surrounding collection, so that it can be parsed
+    as a document on its own.
+    """
+
+    def __init__(self, fp, start, end, prefix=b"", suffix=b""):
+        """Constructor."""
+        self._fp = fp
+        self._fp.seek(start)
+        self._remaining = end - start
+        self._prefix = io.BytesIO(prefix)
+        self._suffix = io.BytesIO(suffix)
+
+    def readable(self):
+        """The file object is readable."""
+        return True
+
+    def readinto(self, buffer):
+        """Reads from the prefix, the byte range and the suffix in turn."""
+        read = self._prefix.readinto(buffer)
+        if read:
+            return read
+        if self._remaining > 0:
+            data = self._fp.read(min(len(buffer), self._remaining))
+            self._remaining -= len(data)
+            if data:
+                buffer[: len(data)] = data
+                return len(data)
+            self._remaining = 0
+        return self._suffix.readinto(buffer)
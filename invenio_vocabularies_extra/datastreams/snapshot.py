@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Snapshots of transformed vocabulary entries.
+
+A snapshot stores the output of the transformers as JSON lines, so that the
+entries can be written again without downloading and parsing the source.
+The lines are compressed in chunks, every chunk is a gzip member of its own.
+Concatenated gzip members are a valid gzip file, so a snapshot can be read
+with the usual tools as well.
+
+The chunk index next to the snapshot has a JSON line per chunk with its
+``offset`` and ``length`` in the file and its number of ``entries``. A chunk
+is added to the index after it was written, so the index of an interrupted
+snapshot only lists complete chunks. With the index, the chunks are read
+with one read each and can be split between parallel readers.
+"""
+
+import json
+import os
+
+from flask import current_app
+
+from .cache import cache_dir
+from .decompress import GZIP_WBITS, threaded_inflate, zlib_impl
+from .prefetch import prefetch
+
+
+def snapshot_path(name):
+    """Path of the snapshot of a vocabulary import."""
+    directory = current_app.config["VOCABULARIES_EXTRA_SNAPSHOT_DIR"] or os.path.join(
+        cache_dir(), "snapshots"
+    )
+    return os.path.join(directory, f"{name}.jsonl.gz")
+
+
+def snapshot_index_path(path):
+    """Path of the chunk index of a snapshot."""
+    return f"{path}.index"
+
+
+def encode_chunk(entries, level=None):
+    """Compressed chunk of entries.
+
+    :param level: compression level, defaults to the one of the zlib
+                  implementation (their ranges differ).
+    """
+    data = "".join(
+        json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for entry in entries
+    ).encode("utf-8")
+    if level is None:
+        compressor = zlib_impl.compressobj(wbits=GZIP_WBITS)
+    else:
+        compressor = zlib_impl.compressobj(level, wbits=GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+class SnapshotFile:
+    """Snapshot written chunk by chunk."""
+
+    def __init__(self, path, level=None):
+        """Constructor.
+
+        :param level: compression level of the chunks.
+        """
+        self.path = path
+        self.level = level
+        self._started = False
+
+    def append(self, entries):
+        """Writes a chunk of entries, the first chunk replaces an existing snapshot."""
+        if not entries:
+            return
+        mode = "ab" if self._started else "wb"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        chunk = encode_chunk(entries, self.level)
+        with open(self.path, mode) as fp:
+            offset = fp.tell()
+            fp.write(chunk)
+        with open(snapshot_index_path(self.path), mode[0]) as fp:
+            fp.write(
+                json.dumps(
+                    {"offset": offset, "length": len(chunk), "entries": len(entries)}
+                )
+                + "\n"
+            )
+        self._started = True
+
+
+def load_snapshot_index(path):
+    """Chunks of a snapshot, None if it has no chunk index."""
+    try:
+        with open(snapshot_index_path(path)) as fp:
+            return [json.loads(line) for line in fp if line.strip()]
+    except FileNotFoundError:
+        return None
+
+
+def shard_chunks(chunks, shard=0, shards=1):
+    """Consecutive chunks of a shard, the shards have similar numbers of entries."""
+    total = sum(chunk["entries"] for chunk in chunks)
+    start = total * shard // shards
+    end = total * (shard + 1) // shards
+    selected = []
+    position = 0
+    for chunk in chunks:
+        # a chunk belongs to the shard of its first entry
+        if start <= position < end:
+            selected.append(chunk)
+        position += chunk["entries"]
+    return selected
+
+
+def read_snapshot(path, shard=0, shards=1, buffer=8):
+    """Yields the entries of a snapshot.
+
+    The chunks are read and decompressed in a background thread, up to
+    ``buffer`` chunks ahead.
+    """
+    chunks = load_snapshot_index(path)
+    if chunks is None:
+        if shards > 1:
+            raise ValueError(f"{path} can not be sharded without chunk index.")
+        with open(path, "rb") as fp, threaded_inflate(fp, buffer=buffer) as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    def decompressed():
+        with open(path, "rb") as fp:
+            for chunk in shard_chunks(chunks, shard, shards):
+                fp.seek(chunk["offset"])
+                yield zlib_impl.decompress(fp.read(chunk["length"]), GZIP_WBITS)
+
+    for data in prefetch(decompressed(), depth=buffer):
+        # not splitlines, which also splits at separators within JSON strings
+        for line in data.decode("utf-8").split("\n"):
+            if line:
+                yield json.loads(line)
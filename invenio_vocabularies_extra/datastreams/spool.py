@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""HTTP downloads readable while they are downloaded.
+
+The response is written to a spooled temporary file in a background thread.
+The file stays in memory up to a threshold and is moved to disk beyond it,
+so the memory used does not depend on the size of the download. Reads
+block until the requested bytes have arrived, so a sequential reader, e.g.
+a decompressor, overlaps with the download.
+
+A zip archive is read from its end first, where its central directory is.
+If the server supports range requests, the end of the file is fetched
+with a separate request first. The central directory can then be read at
+once, and the members are decompressed while the download proceeds.
+"""
+
+import io
+import os
+import tempfile
+import threading
+
+import requests
+from invenio_vocabularies.datastreams.errors import ReaderError
+
+
+class SpooledDownload(io.RawIOBase):
+    """Seekable, read-only file of an HTTP download in progress."""
+
+    def __init__(
+        self,
+        url,
+        max_memory=64 * 1024**2,
+        tail_size=1024**2,
+        chunk_size=1024 * 1024,
+        timeout=60,
+    ):
+        """Constructor.
+
+        :param max_memory: size in bytes beyond which the download is spooled
+                           to disk.
+        :param tail_size: number of bytes at the end fetched first, 0 disables
+                          it.
+        :param chunk_size: size of the chunks downloaded.
+        :param timeout: timeout of the requests in seconds.
+        """
+        self.url = url
+        self._max_memory = max_memory
+        self._tail_size = tail_size
+        self._chunk_size = chunk_size
+        self._timeout = timeout
+        self._spool = None
+        self._response = None
+        self._thread = None
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+        self._downloaded = 0
+        self._done = False
+        self._error = None
+        # size of the download, None if unknown
+        self.length = None
+        self._tail = b""
+        self._tail_offset = None
+        self._pos = 0
+
+    def start(self):
+        """Requests the URL and starts downloading in a background thread."""
+        response = requests.get(self.url, stream=True, timeout=self._timeout)
+        if response.status_code != 200:
+            response.close()
+            raise ReaderError(f"Failed to fetch URL {self.url}: {response.status_code}")
+        self._response = response
+        headers = response.headers
+        # the decoded content does not have the announced length
+        if headers.get("Content-Length") and not headers.get("Content-Encoding"):
+            self.length = int(headers["Content-Length"])
+            if headers.get("Accept-Ranges") == "bytes" and self._tail_size:
+                self._fetch_tail()
+        self._spool = tempfile.SpooledTemporaryFile(max_size=self._max_memory)
+        self._thread = threading.Thread(
+            target=self._download, name="spooled-download", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _fetch_tail(self):
+        """Fetches the end of the file with a range request."""
+        if self.length <= self._tail_size:
+            return
+        with requests.get(
+            self.url,
+            headers={"Range": f"bytes=-{self._tail_size}"},
+            stream=True,
+            timeout=self._timeout,
+        ) as response:
+            # a server ignoring the range sends the whole file
+            if response.status_code != 206:
+                return
+            tail = b"".join(response.iter_content(self._chunk_size))
+        if len(tail) == self._tail_size:
+            self._tail = tail
+            self._tail_offset = self.length - len(tail)
+
+    def _download(self):
+        """Writes the response to the spooled file."""
+        try:
+            for chunk in self._response.iter_content(self._chunk_size):
+                with self._changed:
+                    # the spooled file is closed once stopped
+                    if self._stopped.is_set():
+                        return
+                    self._spool.seek(self._downloaded)
+                    self._spool.write(chunk)
+                    self._downloaded += len(chunk)
+                    self._changed.notify_all()
+            if self.length is not None and self._downloaded < self.length:
+                raise ReaderError(
+                    f"Download of {self.url} ended after {self._downloaded} "
+                    f"of {self.length} bytes."
+                )
+        except BaseException as err:
+            self._error = err
+        finally:
+            with self._changed:
+                self._done = True
+                self._changed.notify_all()
+
+    def _wait(self, predicate):
+        """Waits until the predicate is true or the download ended."""
+        with self._changed:
+            self._changed.wait_for(lambda: predicate() or self._done)
+        if self._error is not None:
+            raise ReaderError(f"Failed to download {self.url}.") from self._error
+
+    def readable(self):
+        """The file is readable."""
+        return True
+
+    def seekable(self):
+        """The file is seekable."""
+        return True
+
+    def tell(self):
+        """Current position."""
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Moves to a position, the end is known once it was announced or reached."""
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            if self.length is None:
+                self._wait(lambda: False)
+                self.length = self._downloaded
+            offset += self.length
+        self._pos = max(offset, 0)
+        return self._pos
+
+    def readinto(self, buffer):
+        """Reads the next available bytes, waiting for them to be downloaded."""
+        pos = self._pos
+        end = pos + len(buffer)
+        if self.length is not None:
+            end = min(end, self.length)
+        if end <= pos:
+            return 0
+
+        in_tail = self._tail_offset is not None and pos >= self._tail_offset
+        if not in_tail:
+            self._wait(lambda: self._downloaded > pos)
+        with self._changed:
+            if in_tail and self._downloaded < end:
+                start = pos - self._tail_offset
+                data = self._tail[start : start + end - pos]
+            else:
+                # a short read, the buffered reader reads again for the rest
+                size = min(end, self._downloaded) - pos
+                if size <= 0:
+                    return 0
+                self._spool.seek(pos)
+                data = self._spool.read(size)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        """Stops the download and removes the spooled file.
+
+        The download thread is waited for up to the request timeout. A thread
+        still blocked in a read of the response is left behind, it stops
+        before writing the next chunk and does not keep the process alive.
+        """
+        if self.closed:
+            return
+        self._stopped.set()
+        if self._response is not None:
+            self._response.close()
+        if self._thread is not None:
+            self._thread.join(self._timeout)
+        if self._spool is not None:
+            with self._changed:
+                self._spool.close()
+        super().close()
+
+
+def spooled_download(url, chunk_size=1024 * 1024, **kwargs):
+    """Buffered file object of a download started in the background.
+
+    See ``SpooledDownload`` for the arguments.
+    """
+    raw = SpooledDownload(url, chunk_size=chunk_size, **kwargs).start()
+    return io.BufferedReader(raw, buffer_size=chunk_size)
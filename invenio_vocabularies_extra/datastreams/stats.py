@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Per-stage timing and counters of data streams.
+
+The stages of a data stream call each other: a reader pulls from the file
+object handed on by the previous reader, and the data stream drives the
+transformers and writers. Timing therefore uses a stack of active stages,
+every clock reading is attributed to the stage on top of the stack, so each
+stage is only charged for its own time. Counters and times are aggregated
+in memory.
+
+Reading the clocks costs more than most stages spend on a record, so the
+per-record calls of a stage are sampled: only one call in ``sample`` is
+timed, and its time is weighted by ``sample``. Stages called by a timed
+stage, e.g. the previous reader, are timed along with it. Writers are
+called per batch and always timed. Counters are exact.
+"""
+
+import io
+import socket
+import threading
+import time
+
+
+class StageStats:
+    """Timing and counters of a single stage."""
+
+    FIELDS = ("wall", "cpu", "records_in", "records_out", "errors", "bytes_in")
+
+    def __init__(self):
+        """Constructor."""
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.records_in = 0
+        self.records_out = 0
+        self.errors = 0
+        self.bytes_in = 0
+        # per-record calls, to sample them
+        self.calls = 0
+
+    def merge(self, data):
+        """Adds the values of a dict (see ``as_dict``)."""
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + data.get(field, 0))
+
+    def as_dict(self):
+        """Values as a dict."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class DataStreamStats:
+    """Timing and counters of all stages of a data stream."""
+
+    def __init__(self, sample=1):
+        """Constructor.
+
+        :param sample: one in ``sample`` per-record calls of a stage is timed.
+        """
+        self.stages = {}
+        self.sample = sample
+        # the stack of active stages and their weights is only kept by the
+        # creating thread
+        self.thread = threading.get_ident()
+        self._active = []
+        self._wall = 0.0
+        self._cpu = 0.0
+
+    def stage(self, name):
+        """Stats of a stage, created on first use."""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageStats()
+        return stage
+
+    def _tick(self):
+        """Charges the time since the last tick to the active stage."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if self._active:
+            stage, weight = self._active[-1]
+            stage.wall += (wall - self._wall) * weight
+            stage.cpu += (cpu - self._cpu) * weight
+        self._wall = wall
+        self._cpu = cpu
+
+    def enter(self, stage, per_record=False):
+        """Starts charging time to the given ``StageStats``.
+
+        :param per_record: if True the call is sampled, unless it is made by
+                           a timed stage.
+        :returns: True if the call is timed, only then ``exit`` is called.
+        """
+        if self._active:
+            weight = self._active[-1][1]
+        elif per_record and self.sample > 1:
+            stage.calls += 1
+            if stage.calls % self.sample:
+                return False
+            weight = self.sample
+        else:
+            weight = 1
+        self._tick()
+        self._active.append((stage, weight))
+        return True
+
+    def exit(self):
+        """Stops charging time to the current stage."""
+        self._tick()
+        self._active.pop()
+
+    def merge(self, data):
+        """Adds the stats of another process (see ``as_dict``)."""
+        for name, values in data.items():
+            self.stage(name).merge(values)
+
+    def as_dict(self):
+        """Stats of all stages as a dict."""
+        return {name: stage.as_dict() for name, stage in self.stages.items()}
+
+    def reset(self):
+        """Resets all stats."""
+        self.stages = {}
+
+
+class MeteredFile:
+    """File object proxy charging reads to the stage that produced the file."""
+
+    def __init__(self, fp, stats, producer, consumer):
+        """Constructor."""
+        self._fp = fp
+        self._stats = stats
+        self._producer = producer
+        self._consumer = consumer
+
+    def _metered(self, method, *args):
+        if threading.get_ident() != self._stats.thread:
+            # read ahead by a background thread, not charged to a stage
+            data = method(*args)
+        else:
+            timed = self._stats.enter(self._producer, per_record=True)
+            try:
+                data = method(*args)
+            finally:
+                if timed:
+                    self._stats.exit()
+        self._consumer.bytes_in += data if isinstance(data, int) else len(data)
+        return data
+
+    def read(self, *args):
+        """Reads from the file object."""
+        return self._metered(self._fp.read, *args)
+
+    def read1(self, *args):
+        """Reads from the file object."""
+        return self._metered(self._fp.read1, *args)
+
+    def readinto(self, buffer):
+        """Reads into the buffer."""
+        return self._metered(self._fp.readinto, buffer)
+
+    def readline(self, *args):
+        """Reads a line from the file object."""
+        return self._metered(self._fp.readline, *args)
+
+    def __iter__(self):
+        """Iterates over the lines of the file object."""
+        while line := self.readline():
+            yield line
+
+    def __enter__(self):
+        """Context manager of the file object."""
+        return self
+
+    def __exit__(self, *exc):
+        """Closes the file object."""
+        self._fp.close()
+
+    def __getattr__(self, name):
+        """Delegates anything else to the file object."""
+        return getattr(self._fp, name)
+
+
+class MeteredReader:
+    """Reader proxy keeping the stats of a reader stage."""
+
+    def __init__(self, reader, stats, name, next_name=None):
+        """Constructor.
+
+        :param next_name: name of the reader stage consuming the output.
+        """
+        self._reader = reader
+        self._stats = stats
+        self._name = name
+        self._next_name = next_name
+
+    def read(self, item=None, *args, **kwargs):
+        """Reads from the wrapped reader."""
+        stats = self._stats
+        stage = stats.stage(self._name)
+        stage.records_in += 1
+        if isinstance(item, (bytes, bytearray)):
+            stage.bytes_in += len(item)
+        entries = self._reader.read(item, *args, **kwargs)
+        while True:
+            timed = stats.enter(stage, per_record=True)
+            try:
+                entry = next(entries)
+            except StopIteration:
+                return
+            except Exception:
+                stage.errors += 1
+                raise
+            finally:
+                if timed:
+                    stats.exit()
+            stage.records_out += 1
+            if self._next_name and isinstance(entry, io.IOBase):
+                entry = MeteredFile(entry, stats, stage, stats.stage(self._next_name))
+            yield entry
+
+    def __getattr__(self, name):
+        """Delegates anything else to the reader."""
+        return getattr(self._reader, name)
+
+
+class MeteredTransformer:
+    """Transformer proxy keeping the stats of a transformer stage."""
+
+    def __init__(self, transformer, stats, name):
+        """Constructor."""
+        self._transformer = transformer
+        self._stats = stats
+        self._name = name
+
+    def apply(self, stream_entry, *args, **kwargs):
+        """Applies the wrapped transformer."""
+        stage = self._stats.stage(self._name)
+        stage.records_in += 1
+        timed = self._stats.enter(stage, per_record=True)
+        try:
+            stream_entry = self._transformer.apply(stream_entry, *args, **kwargs)
+        except Exception:
+            stage.errors += 1
+            raise
+        finally:
+            if timed:
+                self._stats.exit()
+        stage.records_out += 1
+        return stream_entry
+
+    def __getattr__(self, name):
+        """Delegates anything else to the transformer."""
+        return getattr(self._transformer, name)
+
+
+class MeteredWriter:
+    """Writer proxy keeping the stats of a writer stage."""
+
+    def __init__(self, writer, stats, name):
+        """Constructor."""
+        self._writer = writer
+        self._stats = stats
+        self._name = name
+
+    def _metered(self, method, count, *args, **kwargs):
+        stage = self._stats.stage(self._name)
+        stage.records_in += count
+        self._stats.enter(stage)
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            stage.errors += count
+            raise
+        finally:
+            self._stats.exit()
+        stage.records_out += count
+        return result
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Writes with the wrapped writer."""
+        return self._metered(self._writer.write, 1, stream_entry, *args, **kwargs)
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Writes with the wrapped writer."""
+        return self._metered(
+            self._writer.write_many,
+            len(stream_entries),
+            stream_entries,
+            *args,
+            **kwargs,
+        )
+
+    def __getattr__(self, name):
+        """Delegates anything else (e.g. ``is_async``) to the writer."""
+        return getattr(self._writer, name)
+
+
+def stage_name(kind, index, component):
+    """Name of a stage, e.g. ``read[0]:SimpleHTTPReader``."""
+    return f"{kind}[{index}]:{type(component).__name__}"
+
+
+def send_statsd(stats, host, port=8125, prefix="invenio.vocabularies"):
+    """Sends the stats as StatsD counters and timers over UDP.
+
+    The metrics can be scraped by Prometheus through the StatsD exporter.
+    """
+    lines = []
+    for name, values in stats.as_dict().items():
+        metric = f"{prefix}.{name.replace(':', '.').replace('[', '_').rstrip(']')}"
+        lines.append(f"{metric}.wall_ms:{values['wall'] * 1000:.0f}|ms")
+        lines.append(f"{metric}.cpu_ms:{values['cpu'] * 1000:.0f}|ms")
+        for field in ("records_in", "records_out", "errors", "bytes_in"):
+            lines.append(f"{metric}.{field}:{values[field]}|c")
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # keep the datagrams below the usual MTU
+        packet = []
+        for line in lines:
+            if sum(len(p) + 1 for p in packet) + len(line) > 1400:
+                sock.sendto("\n".join(packet).encode(), (host, port))
+                packet = []
+            packet.append(line)
+        if packet:
+            sock.sendto("\n".join(packet).encode(), (host, port))
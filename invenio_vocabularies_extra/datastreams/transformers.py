@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Extra Transformers module."""
+
+import lxml.etree as ET
+from invenio_vocabularies.datastreams.errors import TransformerError
+from invenio_vocabularies.datastreams.transformers import BaseTransformer
+from oaipmh_scythe.models import Record
+
+from .marc21 import compile_deletion, compile_mapping
+
+
+class Marc21MappingTransformer(BaseTransformer):
+    """Transformer of MARC21 authority records by a declarative mapping.
+
+    Subclasses set ``mapping``, see ``invenio_vocabularies_extra.datastreams.marc21``
+    for its format. It is compiled when the transformer is constructed.
+    """
+
+    mapping = None
+
+    def __init__(self, *args, mapping=None, **kwargs):
+        """Constructor.
+
+        :param mapping: mapping overriding the one of the class.
+        """
+        super().__init__(*args, **kwargs)
+        self._mapping = mapping or self.mapping
+        self._compile()
+
+    def _compile(self):
+        """Compiles the mapping."""
+        self._transform = compile_mapping(self._mapping)
+        self._deletion = compile_deletion(self._mapping)
+
+    def __getstate__(self):
+        """State for pickling, without the compiled mapping."""
+        state = dict(self.__dict__)
+        del state["_transform"], state["_deletion"]
+        return state
+
+    def __setstate__(self, state):
+        """Restores the state and compiles the mapping again."""
+        self.__dict__.update(state)
+        self._compile()
+
+    def apply(self, stream_entry, **kwargs):
+        """Transforms the MARC21 record of the entry.
+
+        The "record" of the entry is an OAIRecord (from oaipmh_scythe), a
+        serialized or a parsed record element, or the list of datafields of a
+        binary record.
+
+        Deleted records, handed on by the OAI-PMH reader with their
+        "identifier", become an entry with the "id" to delete, or the key of
+        the mapping's "target", and "deleted".
+        """
+        if stream_entry.entry.get("deleted"):
+            identifier = stream_entry.entry.get("identifier")
+            deletion = self._deletion and self._deletion(identifier)
+            if deletion is None:
+                raise TransformerError(f"Cannot delete the record {identifier}.")
+            stream_entry.entry = deletion
+            return stream_entry
+
+        record = stream_entry.entry["record"]
+        if isinstance(record, Record):
+            record = ET.fromstring(record.get_metadata()["record"])
+        elif not isinstance(record, list) and not ET.iselement(record):
+            record = ET.fromstring(record)
+
+        stream_entry.entry = self._transform(record)
+        return stream_entry
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Extra Writers module."""
+
+from flask import current_app
+from invenio_db import db
+from invenio_db.uow import Operation, UnitOfWork
+from invenio_pidstore.errors import PIDDoesNotExistError
+from invenio_search.engine import dsl
+from invenio_vocabularies.contrib.subjects.datastreams import SubjectsServiceWriter
+from invenio_vocabularies.datastreams import StreamEntry
+from invenio_vocabularies.datastreams.writers import BaseWriter
+from sqlalchemy.orm.exc import NoResultFound
+
+from ..resolver import subject_resolver
+from .manifest import journal_written, manifest_path
+from .snapshot import SnapshotFile
+
+
+class RecordBulkIndexDeleteOp(Operation):
+    """Removes records from the search index with one bulk request."""
+
+    def __init__(self, record_ids, indexer):
+        """Constructor.
+
+        :param record_ids: ids of the deleted records.
+        :param indexer: indexer instance.
+        """
+        self._record_ids = record_ids
+        self._indexer = indexer
+
+    def on_post_commit(self, uow):
+        """Queues the bulk deletion once the records are deleted."""
+        if self._record_ids:
+            self._indexer.bulk_delete(self._record_ids)
+
+
+class SubjectsBulkWriter(SubjectsServiceWriter):
+    """Writes subjects in batches, each in one transaction and bulk request.
+
+    Every batch is upserted by ``write_many`` of the service writer, whose
+    ``create_or_update_many`` of the subjects service commits the batch in a
+    single database transaction and indexes it with one bulk request.
+    Validation errors are reported per entry. If the transaction of a batch fails as a whole, its entries are
+    written one by one so that only the failing entries are reported.
+
+    Entries marked as ``deleted`` are deleted in batches the same way, in one
+    transaction and one bulk request removing them from the index. Entries
+    which do not exist (anymore) count as deleted.
+
+    Deleted GND records of the OAI-PMH harvest only have the IDN of the DNB
+    as ``idn``. The IDNs of a batch are resolved to the ids of the subjects
+    storing them in ``props.idn`` with one search, subjects which are not
+    found are skipped.
+
+    Entries are always upserted, the ``insert`` and ``update`` options of the
+    service writer are not used.
+
+    The written subjects are invalidated in the caches of the subject
+    resolver once committed. The upserted ones are only put into the caches
+    if ``VOCABULARIES_EXTRA_SUBJECTS_CACHE_WARM`` is set and the resolver has
+    a shared cache, the in-process cache of the importing worker is never
+    read by the web processes.
+
+    With a manifest, the committed entries are appended to its journal, so
+    that a data stream writing through an async writer records their hashes.
+    """
+
+    journals_manifest = True
+    """The writer records the written entries in the journal of a manifest."""
+
+    def __init__(self, *args, batch_size=None, manifest=None, **kwargs):
+        """Constructor.
+
+        :param batch_size: number of entries per transaction, defaults to
+                           ``VOCABULARIES_EXTRA_BULK_WRITER_BATCH_SIZE``.
+        :param manifest: name of the manifest journaling the written entries.
+        """
+        self._batch_size = batch_size
+        self._manifest = manifest
+        super().__init__(*args, **kwargs)
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Writes a single entry."""
+        return self.write_many([stream_entry], *args, **kwargs)[0]
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Writes the entries in batches.
+
+        :returns: the written stream entries in the order of the input.
+        """
+        batch_size = self._batch_size or current_app.config.get(
+            "VOCABULARIES_EXTRA_BULK_WRITER_BATCH_SIZE", 500
+        )
+        results = []
+        for idx in range(0, len(stream_entries), batch_size):
+            batch = self._write_batch(stream_entries[idx : idx + batch_size])
+            if self._manifest:
+                journal_written(manifest_path(self._manifest), batch)
+            results.extend(batch)
+        return results
+
+    def _write_batch(self, stream_entries):
+        """Writes the deletions and the upserts of a batch."""
+        stream_entries = list(stream_entries)
+        results = [None] * len(stream_entries)
+        upserts = []
+        deletions = []
+        by_idn = []
+        for idx, stream_entry in enumerate(stream_entries):
+            entry = stream_entry.entry
+            if entry.get("deleted") and "id" not in entry and entry.get("idn"):
+                by_idn.append(idx)
+                continue
+            try:
+                entry_id = self._entry_id(stream_entry.entry)
+            except KeyError:
+                results[idx] = StreamEntry(
+                    stream_entry.entry, errors=["Vocabulary entry without id."]
+                )
+                continue
+            if stream_entry.entry.get("deleted"):
+                deletions.append((idx, entry_id))
+            else:
+                upserts.append((idx, entry_id))
+        if by_idn:
+            ids = self._resolve_idns([stream_entries[idx].entry for idx in by_idn])
+            for idx in by_idn:
+                entry = stream_entries[idx].entry
+                entry_id = ids.get((entry.get("scheme"), entry["idn"]))
+                if entry_id is None:
+                    current_app.logger.info(
+                        "No subject with the IDN %s to delete", entry["idn"]
+                    )
+                    results[idx] = StreamEntry(entry, op_type="skip")
+                    continue
+                stream_entries[idx] = StreamEntry(dict(entry, id=entry_id))
+                deletions.append((idx, entry_id))
+
+        for operation, batch in ((self._delete, deletions), (self._upsert, upserts)):
+            if batch:
+                self._run(operation, stream_entries, batch, results)
+        self._update_cache(results)
+        return results
+
+    def _resolve_idns(self, entries):
+        """Ids of the subjects with the IDNs of the entries, by scheme and IDN."""
+        idns = sorted({entry["idn"] for entry in entries})
+        # the strings of the dynamic props are mapped as text with a keyword
+        query = dsl.Q("terms", **{"props.idn.keyword": idns})
+        schemes = sorted({entry["scheme"] for entry in entries if entry.get("scheme")})
+        if schemes:
+            query &= dsl.Q("terms", scheme=schemes)
+        result = self._service.search(
+            self._identity, params={"size": len(idns)}, extra_filter=query
+        )
+        ids = {}
+        for hit in result.hits:
+            idn = hit["props"]["idn"]
+            ids[(hit["scheme"], idn)] = hit["id"]
+            ids.setdefault((None, idn), hit["id"])
+        return ids
+
+    def _update_cache(self, results):
+        """Invalidates the written subjects in the caches and warms them."""
+        resolver = subject_resolver()
+        if resolver is None:
+            return
+        keys = []
+        upserted = []
+        for stream_entry in results:
+            if stream_entry.record is None and stream_entry.op_type != "delete":
+                continue
+            entry = stream_entry.entry
+            scheme = entry.get("scheme")
+            if scheme is None and stream_entry.record is not None:
+                scheme = stream_entry.record.get("scheme")
+            keys.append((scheme, entry["id"]))
+            if stream_entry.op_type != "delete" and not stream_entry.errors:
+                upserted.append(stream_entry.record)
+        resolver.invalidate(keys)
+
+        if (
+            upserted
+            and resolver.shared
+            and current_app.config.get("VOCABULARIES_EXTRA_SUBJECTS_CACHE_WARM")
+        ):
+            service = self._service
+            resolver.prime(
+                [
+                    service.result_item(
+                        service,
+                        self._identity,
+                        record,
+                        links_tpl=service.links_item_tpl,
+                    ).to_dict()
+                    for record in upserted
+                ]
+            )
+
+    def _run(self, operation, stream_entries, batch, results):
+        """Runs an operation on a batch, falling back to single entries if it fails."""
+        try:
+            operation(stream_entries, batch, results)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.warning(
+                "Writing a batch of %s subjects failed, writing them one by one",
+                len(batch),
+                exc_info=True,
+            )
+            for idx, entry_id in batch:
+                try:
+                    operation(stream_entries, [(idx, entry_id)], results)
+                except Exception as err:
+                    db.session.rollback()
+                    results[idx] = StreamEntry(
+                        stream_entries[idx].entry,
+                        errors=[f"{type(err).__name__}: {err}"],
+                    )
+
+    def _upsert(self, stream_entries, batch, results):
+        """Creates or updates the entries of the batch in one transaction.
+
+        The entries are written by ``write_many`` of the service writer, the
+        entries of the batch all have an id.
+        """
+        written = super().write_many([stream_entries[idx] for idx, _ in batch])
+        for (idx, _), stream_entry in zip(batch, written):
+            results[idx] = stream_entry
+
+    def _delete(self, stream_entries, batch, results):
+        """Deletes the entries of the batch in one transaction.
+
+        Like the ``delete`` of the service, but the records are removed from
+        the index with one bulk request instead of one request each.
+        """
+        service = self._service
+        deleted = []
+        with UnitOfWork(db.session) as uow:
+            for idx, entry_id in batch:
+                try:
+                    record = service.record_cls.pid.resolve(entry_id)
+                except (NoResultFound, PIDDoesNotExistError):
+                    deleted.append((idx, None))
+                    continue
+                service.require_permission(self._identity, "delete", record=record)
+                service.run_components("delete", self._identity, record=record, uow=uow)
+                record.delete()
+                deleted.append((idx, record))
+            uow.register(
+                RecordBulkIndexDeleteOp(
+                    [record.id for _, record in deleted if record is not None],
+                    service.indexer,
+                )
+            )
+            uow.commit()
+        for idx, record in deleted:
+            results[idx] = StreamEntry(
+                stream_entries[idx].entry, record=record, op_type="delete"
+            )
+
+
+class SnapshotWriter(BaseWriter):
+    """Writes the transformed entries to a snapshot.
+
+    Every written batch becomes a chunk of the snapshot, an existing
+    snapshot is replaced with the first batch. Use it with ``write_many``
+    and without a manifest, which leaves out the unchanged entries.
+    """
+
+    def __init__(self, origin, *args, level=None, **kwargs):
+        """Constructor.
+
+        :param origin: path of the snapshot.
+        :param level: compression level of the chunks.
+        """
+        self._snapshot = SnapshotFile(origin, level=level)
+        super().__init__(*args, **kwargs)
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Writes a single entry."""
+        return self.write_many([stream_entry], *args, **kwargs)[0]
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Writes the entries as one chunk."""
+        self._snapshot.append([stream_entry.entry for stream_entry in stream_entries])
+        return stream_entries
@@ -9,6 +9,8 @@
 """Add some extras to the vocabularies module like DDC and GND subjects.."""
 
 from . import config
+from .prefix_index import SubjectSuggester
+from .resolver import SubjectResolver
 
 
 class InvenioExtraVocabularies(object):
@@ -16,6 +18,8 @@ class InvenioExtraVocabularies(object):
 
     def __init__(self, app=None):
         """Extension initialization."""
+        self._subject_resolver = None
+        self._subject_suggester = None
         if app:
             self.init_app(app)
 
@@ -29,3 +33,17 @@ class InvenioExtraVocabularies(object):
         for k in dir(config):
             if k.startswith("VOCABULARIES_EXTRA_"):
                 app.config.setdefault(k, getattr(config, k))
+
+    @property
+    def subject_resolver(self):
+        """Cached resolver of subjects, created on first use."""
+        if self._subject_resolver is None:
+            self._subject_resolver = SubjectResolver.from_config()
+        return self._subject_resolver
+
+    @property
+    def subject_suggester(self):
+        """Prefix suggester of subjects, created on first use."""
+        if self._subject_suggester is None:
+            self._subject_suggester = SubjectSuggester.from_config()
+        return self._subject_suggester
@@ -7,15 +7,50 @@
 # details.
 
 """Custom jobs module."""
+
 import arrow
-from invenio_vocabularies.jobs import ProcessDataStreamJob
+from flask import current_app
+from invenio_jobs.jobs import JobType, PredefinedArgsSchema
+from marshmallow import fields, validate
 
 from .contrib.subjects.ddc.datastreams import DDC_PRESET_DATASTREAM_CONFIG
-from .contrib.subjects.gnd.datastreams import GND_FULL_DATASTREAM_CONFIG
-from .contrib.subjects.mesh.datastreams import MESH_DATASTREAM_CONFIG
+from .contrib.subjects.gnd.datastreams import (
+    GND_BINARY_DATASTREAM_CONFIG,
+    GND_FULL_DATASTREAM_CONFIG,
+)
+from .contrib.subjects.mesh.datastreams import (
+    MESH_DATASTREAM_CONFIG,
+    MESH_MULTILINGUAL_DATASTREAM_CONFIG,
+    MESH_SPOOLED_DATASTREAM_CONFIG,
+)
+from .tasks import (
+    harvest_gnd_subjects,
+    import_gnd_subjects_sharded,
+    load_snapshot_config,
+    process_datastream_parallel,
+    profile_datastream,
+    rebuild_prefix_index,
+    snapshot_datastream,
+)
+
+FULL_DATASTREAMS = {
+    "ddc": DDC_PRESET_DATASTREAM_CONFIG,
+    "gnd": GND_FULL_DATASTREAM_CONFIG,
+    "gnd-binary": GND_BINARY_DATASTREAM_CONFIG,
+    "mesh": MESH_DATASTREAM_CONFIG,
+    "mesh-multilingual": MESH_MULTILINGUAL_DATASTREAM_CONFIG,
+    "mesh-spooled": MESH_SPOOLED_DATASTREAM_CONFIG,
+}
+"""Datastreams of the full imports, which can be profiled and snapshotted."""
+
+
+class ProcessParallelDataStreamJob(JobType):
+    """Process data stream job type transforming in worker processes."""
+
+    task = process_datastream_parallel
 
 
-class ProcessDDCJob(ProcessDataStreamJob):
+class ProcessDDCJob(ProcessParallelDataStreamJob):
     """Process DDC subjects datastream registered task."""
 
     description = "Process DDC subjects"
@@ -28,51 +63,28 @@ class ProcessDDCJob(ProcessDataStreamJob):
         return {"config": {**DDC_PRESET_DATASTREAM_CONFIG}}
 
 
-class ProcessGNDSubjectsJob(ProcessDataStreamJob):
+class ProcessGNDSubjectsJob(JobType):
     """Process GND subjects datastream registered task."""
 
     description = "Import GND subjects updates"
     title = "Load GND subjects updates"
     id = "process_gnd_subjects"
+    task = harvest_gnd_subjects
 
     @classmethod
     def build_task_arguments(cls, job_obj, since=None, **kwargs):
-        """Process GND subjects."""
-        until_dt = arrow.utcnow()
-        until = until_dt.format("YYYY-MM-DDTHH:mm:ss[Z]")
-        if since is None:
-            since_dt = until_dt.shift(minutes=-15)
-        else:
-            since_dt = arrow.get(since)
-        since = since_dt.format("YYYY-MM-DDTHH:mm:ss[Z]")
+        """Process GND subjects.
 
+        The task continues from the persisted high-water mark, ``since`` only
+        matters if it is earlier or no harvest succeeded yet.
+        """
         return {
-            "config": {
-                "readers": [
-                    {
-                        "type": "oai-pmh",
-                        "args": {
-                            "verb": "ListRecords",
-                            "base_url": "https://services.dnb.de/oai/repository",
-                            "metadata_prefix": "MARC21-xml",
-                            "set": "authorities:sachbegriff",
-                            "from_date": since,
-                            "until_date": until,
-                        },
-                    },
-                ],
-                "transformers": [{"type": "gnd-subjects"}],
-                "writers": [
-                    {
-                        "args": {"writer": {"type": "subjects-service"}},
-                        "type": "async",
-                    }
-                ],
-            }
+            "since": arrow.get(since).isoformat() if since else None,
+            "until": arrow.utcnow().isoformat(),
         }
 
 
-class ImportCompleteGndSubjectsJob(ProcessDataStreamJob):
+class ImportCompleteGndSubjectsJob(ProcessParallelDataStreamJob):
     """Import the complete GND subjects from gzipped file."""
 
     description = "Import GND subjects completely"
@@ -85,7 +97,36 @@ class ImportCompleteGndSubjectsJob(ProcessDataStreamJob):
         return {"config": {**GND_FULL_DATASTREAM_CONFIG}}
 
 
-class ProcessMeshSubjectsJob(ProcessDataStreamJob):
+class ImportBinaryGndSubjectsJob(ProcessParallelDataStreamJob):
+    """Import the complete GND subjects from gzipped binary MARC21 file."""
+
+    description = "Import GND subjects completely from binary MARC21"
+    title = "Import complete GND subjects (binary MARC21)"
+    id = "import_gnd_subjects_binary"
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        """Process GND subjects."""
+        return {"config": {**GND_BINARY_DATASTREAM_CONFIG}}
+
+
+class ImportShardedGndSubjectsJob(JobType):
+    """Import the complete GND subjects in parallel shards."""
+
+    description = "Import GND subjects completely in parallel shards"
+    title = "Import complete GND subjects (sharded)"
+    id = "import_gnd_subjects_sharded"
+    task = import_gnd_subjects_sharded
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        """Process GND subjects in shards."""
+        return {
+            "shards": current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_SHARDS"],
+        }
+
+
+class ProcessMeshSubjectsJob(ProcessParallelDataStreamJob):
     """Import the (bilingual) MeSH subjects from zipped file."""
 
     description = "Import (multi-lingual) MeSH subjects"
@@ -96,3 +137,158 @@ class ProcessMeshSubjectsJob(ProcessDataStreamJob):
     def build_task_arguments(cls, job_obj, since=None, **kwargs):
         """Process GND subjects."""
         return {"config": {**MESH_DATASTREAM_CONFIG}}
+
+
+class ImportSpooledMeshSubjectsJob(ProcessParallelDataStreamJob):
+    """Import the MeSH subjects while the zipped file is downloaded."""
+
+    description = "Import MeSH subjects while downloading, without caching the file"
+    title = "Import MeSH subjects (spooled download)"
+    id = "import_mesh_subjects_spooled"
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        """Process MeSH subjects."""
+        return {"config": {**MESH_SPOOLED_DATASTREAM_CONFIG}}
+
+
+class ImportMultilingualMeshSubjectsJob(ProcessParallelDataStreamJob):
+    """Import the MeSH subjects joining the descriptor files of several languages."""
+
+    description = "Import MeSH subjects in all configured languages at once"
+    title = "Import multilingual MeSH subjects"
+    id = "import_mesh_subjects_multilingual"
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        """Process MeSH subjects of several languages."""
+        return {"config": {**MESH_MULTILINGUAL_DATASTREAM_CONFIG}}
+
+
+class PrefixIndexArgsSchema(PredefinedArgsSchema):
+    """Arguments of the prefix index job."""
+
+    job_arg_schema = fields.String(
+        metadata={"type": "hidden"},
+        dump_default="PrefixIndexArgsSchema",
+        load_default="PrefixIndexArgsSchema",
+    )
+    scheme = fields.String(
+        validate=validate.OneOf(["DDC", "GND", "MESH"]),
+        load_default="GND",
+        metadata={"description": "Scheme of the subjects."},
+    )
+
+
+class RebuildPrefixIndexJob(JobType):
+    """Rebuild the prefix index of a scheme from the search index.
+
+    The GND harvests do not update the prefix index, this job is meant to be
+    scheduled e.g. nightly for the GND.
+    """
+
+    description = "Rebuild the prefix index for subject autocompletion"
+    title = "Rebuild subjects prefix index"
+    id = "rebuild_prefix_index"
+    task = rebuild_prefix_index
+    arguments_schema = PrefixIndexArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, scheme="GND", **kwargs):
+        """Rebuild the prefix index of a scheme."""
+        return {"scheme": scheme}
+
+
+class ProfileDataStreamArgsSchema(PredefinedArgsSchema):
+    """Arguments of the profiling job."""
+
+    job_arg_schema = fields.String(
+        metadata={"type": "hidden"},
+        dump_default="ProfileDataStreamArgsSchema",
+        load_default="ProfileDataStreamArgsSchema",
+    )
+    vocabulary = fields.String(
+        validate=validate.OneOf(FULL_DATASTREAMS),
+        load_default="gnd",
+        metadata={"description": "Import to profile."},
+    )
+    limit = fields.Integer(
+        validate=validate.Range(min=1),
+        allow_none=True,
+        metadata={"description": "Number of records, leave empty for the default."},
+    )
+    fraction = fields.Float(
+        validate=validate.Range(min=0, max=1, min_inclusive=False),
+        allow_none=True,
+        metadata={
+            "description": "Share of the records, e.g. 0.01, instead of a number."
+        },
+    )
+
+
+class ProfileDataStreamJob(JobType):
+    """Profile a full import on a sample of the real source, writing nothing."""
+
+    description = "Profile a vocabulary import without writing"
+    title = "Profile vocabulary import"
+    id = "profile_vocabulary_import"
+    task = profile_datastream
+    arguments_schema = ProfileDataStreamArgsSchema
+
+    @classmethod
+    def build_task_arguments(
+        cls, job_obj, since=None, vocabulary="gnd", limit=None, fraction=None, **kwargs
+    ):
+        """Profile the import of a vocabulary."""
+        return {
+            "config": {**FULL_DATASTREAMS[vocabulary]},
+            "name": vocabulary,
+            "limit": limit,
+            "fraction": fraction,
+        }
+
+
+class VocabularyArgsSchema(PredefinedArgsSchema):
+    """Arguments of the snapshot jobs."""
+
+    job_arg_schema = fields.String(
+        metadata={"type": "hidden"},
+        dump_default="VocabularyArgsSchema",
+        load_default="VocabularyArgsSchema",
+    )
+    vocabulary = fields.String(
+        validate=validate.OneOf(FULL_DATASTREAMS),
+        load_default="gnd",
+        metadata={"description": "Import of the vocabulary."},
+    )
+
+
+class SnapshotDataStreamJob(JobType):
+    """Write the transformed entries of a full import to a snapshot."""
+
+    description = "Snapshot the transformed entries of a vocabulary import"
+    title = "Snapshot vocabulary import"
+    id = "snapshot_vocabulary_import"
+    task = snapshot_datastream
+    arguments_schema = VocabularyArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, vocabulary="gnd", **kwargs):
+        """Snapshot the import of a vocabulary."""
+        return {"config": {**FULL_DATASTREAMS[vocabulary]}, "name": vocabulary}
+
+
+class LoadSnapshotJob(ProcessParallelDataStreamJob):
+    """Write the entries of a snapshot without reading the source again."""
+
+    description = "Load a vocabulary from its snapshot"
+    title = "Load vocabulary snapshot"
+    id = "load_vocabulary_snapshot"
+    arguments_schema = VocabularyArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, vocabulary="gnd", **kwargs):
+        """Load the snapshot of a vocabulary."""
+        return {
+            "config": load_snapshot_config(FULL_DATASTREAMS[vocabulary], vocabulary)
+        }
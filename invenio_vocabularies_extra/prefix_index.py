@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Memory-mapped prefix index of the subject labels for autocompletion.
+
+Every scheme has one index file with the normalised titles, subjects and
+synonyms of its subjects, sorted by language and label. A prefix is looked
+up by a binary search in the memory-mapped file, so the web processes share
+the pages of the file through the page cache instead of loading it. The best
+suggestions of the prefixes matching more than ``max_scan`` labels, which
+are too many to rank them on every keystroke, are ranked once when the index
+is built, like the top k lists of the nodes of a trie. The labels of all
+other prefixes are ranked when they are looked up.
+
+The file starts with a header followed by two offset tables and the records
+they point to, all integers are little-endian ``uint32``:
+
+- header: ``MAGIC``, number of labels, number of ranked prefixes, top k.
+- offsets of the label records, one more than labels, sorted by key.
+- offsets of the ranked prefix records, one more than prefixes, sorted by key.
+- label records: ``key US rank US id US label``.
+- ranked prefix records: ``key US`` and the positions of its top k labels.
+
+The key of a label is its language and normalised label separated by
+``RS``. Titles have rank 0, synonyms rank 1. Labels are ranked by rank and
+length. The index files are replaced atomically when they are rebuilt, open
+indexes are reopened once their file was replaced.
+"""
+
+import bisect
+import fcntl
+import functools
+import itertools
+import mmap
+import operator
+import os
+import re
+import struct
+import time
+import unicodedata
+from collections import namedtuple
+from contextlib import contextmanager
+
+from flask import current_app
+
+from .datastreams.cache import cache_dir
+
+MAGIC = b"IVXPFX1\n"
+HEADER = struct.Struct("<8sIII")
+UINT32 = struct.Struct("<I")
+US = b"\x1f"
+RS = "\x1e"
+
+UNDETERMINED = "und"
+"""Language of the subject labels and synonyms, which have no language."""
+
+Suggestion = namedtuple("Suggestion", ["rank", "label", "id", "lang"])
+
+
+_ASCII_CONTROLS = re.compile("[\x00-\x1f\x7f]")
+
+
+@functools.cache
+def _stripped():
+    """Translation table removing the combining and control characters of the BMP."""
+    return dict.fromkeys(
+        cp
+        for cp in range(0x10000)
+        if unicodedata.combining(chr(cp)) or unicodedata.category(chr(cp))[0] == "C"
+    )
+
+
+def normalize(text):
+    """Normalised label: case folded, without accents and control characters."""
+    if text.isascii():
+        text = _ASCII_CONTROLS.sub("", text)
+    else:
+        text = unicodedata.normalize("NFKD", text).translate(_stripped())
+    return " ".join(text.casefold().split())
+
+
+def _clean(text):
+    """Label without control characters, which separate the fields of a record."""
+    if text.isascii():
+        return _ASCII_CONTROLS.sub("", text)
+    return "".join(char for char in text if unicodedata.category(char)[0] != "C")
+
+
+def subject_labels(subject):
+    """``(lang, label, rank)`` tuples of the labels of a subject."""
+    labels = []
+    for lang, title in (subject.get("title") or {}).items():
+        if title:
+            labels.append((lang, _clean(title), 0))
+    if subject.get("subject"):
+        labels.append((UNDETERMINED, _clean(subject["subject"]), 0))
+    for synonym in subject.get("synonyms") or ():
+        if synonym:
+            labels.append((UNDETERMINED, _clean(synonym), 1))
+    return labels
+
+
+def _sort_key(suggestion):
+    """Ranking of a suggestion, best first."""
+    return (suggestion.rank, len(suggestion.label), suggestion.label)
+
+
+def _top(items, k, order=_sort_key, subject=operator.attrgetter("id")):
+    """Best k items by their ``order``, one per ``subject``."""
+    top = []
+    seen = set()
+    for item in sorted(items, key=order):
+        id_ = subject(item)
+        if id_ in seen:
+            continue
+        seen.add(id_)
+        top.append(item)
+        if len(top) == k:
+            break
+    return top
+
+
+class PrefixIndexBuilder:
+    """Labels of the subjects of a scheme, written as a prefix index."""
+
+    def __init__(self):
+        """Constructor."""
+        # labels of the subjects by id
+        self.subjects = {}
+        self.removed = set()
+
+    @classmethod
+    def load(cls, path):
+        """Builder with the labels of an index file, empty if it does not exist."""
+        builder = cls()
+        if not os.path.exists(path):
+            return builder
+        with PrefixIndex(path) as index:
+            for suggestion in index.suggestions():
+                builder.subjects.setdefault(suggestion.id, []).append(
+                    (suggestion.lang, suggestion.label, suggestion.rank)
+                )
+        return builder
+
+    def add(self, subject):
+        """Adds or replaces the labels of a subject."""
+        self.subjects[subject["id"]] = subject_labels(subject)
+        self.removed.discard(subject["id"])
+
+    def remove(self, id_):
+        """Removes the labels of a subject."""
+        self.subjects.pop(id_, None)
+        self.removed.add(id_)
+
+    def update(self, other):
+        """Applies the additions and removals of another builder."""
+        for id_ in other.removed:
+            self.subjects.pop(id_, None)
+        self.subjects.update(other.subjects)
+
+    def __len__(self):
+        """Number of subjects."""
+        return len(self.subjects)
+
+    def write(self, path, top_k=20, max_scan=200):
+        """Writes the index file, replacing an existing one atomically.
+
+        :param top_k: number of suggestions ranked in advance per prefix.
+        :param max_scan: maximum number of labels ranked on lookup.
+        :returns: the number of labels.
+        """
+        labels = sorted(
+            (f"{lang}{RS}{normalize(label)}", rank, label, id_)
+            for id_, labels in self.subjects.items()
+            for lang, label, rank in labels
+        )
+        labels = [label for label in labels if not label[0].endswith(RS)]
+        records = [
+            f"{key}\x1f{rank}\x1f{id_}\x1f{label}".encode("utf-8")
+            for key, rank, label, id_ in labels
+        ]
+
+        keys = [key for key, _, _, _ in labels]
+        ids = [id_ for _, _, _, id_ in labels]
+        order = [(rank, len(label), label) for _, rank, label, _ in labels]
+        prefixes = []
+
+        def rank(lo, hi, end):
+            """Top k of the labels in ``lo:hi``, which share ``key[:end]``.
+
+            Ranked prefixes get the top k of their children merged.
+            """
+            prefix = keys[lo][:end]
+            if hi - lo <= max_scan and not prefix.endswith(RS):
+                return _top(range(lo, hi), top_k, order.__getitem__, ids.__getitem__)
+            pos = lo
+            # labels equal to the prefix come first
+            while pos < hi and len(keys[pos]) == end:
+                pos += 1
+            candidates = list(range(lo, pos))
+            while pos < hi:
+                child = keys[pos][: end + 1]
+                after = bisect.bisect_left(
+                    keys, child[:-1] + chr(ord(child[-1]) + 1), pos, hi
+                )
+                candidates.extend(rank(pos, after, end + 1))
+                pos = after
+            top = _top(candidates, top_k, order.__getitem__, ids.__getitem__)
+            if not prefix.endswith(RS):
+                prefixes.append((prefix.encode("utf-8"), top))
+            return top
+
+        pos = 0
+        while pos < len(keys):
+            lang = keys[pos][: keys[pos].index(RS) + 1]
+            after = bisect.bisect_left(keys, lang[:-1] + chr(ord(RS) + 1), pos)
+            rank(pos, after, len(lang))
+            pos = after
+        prefixes.sort()
+        prefixes = [
+            prefix + US + struct.pack(f"<{len(top)}I", *top) for prefix, top in prefixes
+        ]
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(HEADER.pack(MAGIC, len(records), len(prefixes), top_k))
+            offset = HEADER.size + 4 * (len(records) + 1 + len(prefixes) + 1)
+            for chunk in (records, prefixes):
+                for record in chunk:
+                    fp.write(UINT32.pack(offset))
+                    offset += len(record)
+                fp.write(UINT32.pack(offset))
+            for chunk in (records, prefixes):
+                fp.writelines(chunk)
+        os.replace(tmp_path, path)
+        return len(records)
+
+
+class PrefixIndex:
+    """Read-only, memory-mapped prefix index file."""
+
+    def __init__(self, path):
+        """Constructor."""
+        self.path = path
+        with open(path, "rb") as fp:
+            self.stat = os.fstat(fp.fileno())
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._labels, self._prefixes, self.top_k = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a prefix index.")
+        self._label_offsets = HEADER.size
+        self._prefix_offsets = self._label_offsets + 4 * (self._labels + 1)
+
+    def close(self):
+        """Unmaps the file."""
+        self._map.close()
+
+    def __enter__(self):
+        """Returns the index."""
+        return self
+
+    def __exit__(self, *exc):
+        """Unmaps the file."""
+        self.close()
+
+    def __len__(self):
+        """Number of labels."""
+        return self._labels
+
+    def _record(self, table, pos):
+        """Bytes of a record of an offset table."""
+        start, end = struct.unpack_from("<II", self._map, table + 4 * pos)
+        return self._map[start:end]
+
+    def _key(self, table, pos):
+        """Key of a record of an offset table."""
+        start, end = struct.unpack_from("<II", self._map, table + 4 * pos)
+        return self._map[start : self._map.find(US, start, end)]
+
+    def _bisect(self, table, count, key):
+        """Position of the first record of a table with a key not below ``key``."""
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(table, mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _suggestion(self, pos):
+        """Suggestion of a label record."""
+        key, rank, id_, label = (
+            self._record(self._label_offsets, pos).decode("utf-8").split("\x1f", 3)
+        )
+        return Suggestion(int(rank), label, id_, key.partition(RS)[0])
+
+    def suggestions(self):
+        """All labels of the index."""
+        offsets = struct.unpack_from(
+            f"<{self._labels + 1}I", self._map, self._label_offsets
+        )
+        data = self._map[offsets[0] : offsets[-1]]
+        base = offsets[0]
+        for start, end in zip(offsets, offsets[1:]):
+            key, rank, id_, label = (
+                data[start - base : end - base].decode().split("\x1f", 3)
+            )
+            yield Suggestion(int(rank), label, id_, key.partition(RS)[0])
+
+    def lookup(self, prefix, lang, k=10):
+        """Best k suggestions of the labels of a language starting with a prefix.
+
+        At most the top k of the index are suggested for a prefix ranked in
+        advance.
+        """
+        prefix = normalize(prefix)
+        if not prefix or k <= 0:
+            return []
+        key = f"{lang}{RS}{prefix}".encode("utf-8")
+
+        pos = self._bisect(self._prefix_offsets, self._prefixes, key)
+        if pos < self._prefixes and self._key(self._prefix_offsets, pos) == key:
+            positions = self._record(self._prefix_offsets, pos)[len(key) + 1 :]
+            top = struct.unpack(f"<{len(positions) // 4}I", positions)
+            return [self._suggestion(pos) for pos in top[:k]]
+
+        start = self._bisect(self._label_offsets, self._labels, key)
+        # UTF-8 has no 0xff bytes, so it follows all keys with the prefix
+        end = self._bisect(self._label_offsets, self._labels, key + b"\xff")
+        return _top((self._suggestion(pos) for pos in range(start, end)), k)
+
+
+def prefix_index_path(scheme):
+    """Path of the prefix index of a scheme."""
+    directory = current_app.config["VOCABULARIES_EXTRA_PREFIX_INDEX_DIR"] or (
+        os.path.join(cache_dir(), "prefix-index")
+    )
+    return os.path.join(directory, f"{scheme.lower()}.idx")
+
+
+@contextmanager
+def _locked(path):
+    """Serializes the updates of an index file between processes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "w") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def update_prefix_index(scheme, updates, replace=False):
+    """Applies the additions and removals of a builder to the index of a scheme.
+
+    :param replace: if True the index is rebuilt from the updates alone.
+    :returns: the number of labels in the index.
+    """
+    path = prefix_index_path(scheme)
+    with _locked(path):
+        builder = PrefixIndexBuilder() if replace else PrefixIndexBuilder.load(path)
+        builder.update(updates)
+        return builder.write(
+            path,
+            top_k=current_app.config["VOCABULARIES_EXTRA_PREFIX_INDEX_TOP_K"],
+            max_scan=current_app.config["VOCABULARIES_EXTRA_PREFIX_INDEX_MAX_SCAN"],
+        )
+
+
+class SubjectSuggester:
+    """Suggests subjects by the prefix of their labels.
+
+    The index files of the schemes are opened on first use. They are checked
+    for replacements at most every ``reload_interval`` seconds.
+    """
+
+    def __init__(self, paths, reload_interval=5):
+        """Constructor.
+
+        :param paths: function returning the index path of a scheme.
+        :param reload_interval: seconds between two checks for a new file.
+        """
+        self._paths = paths
+        self._reload_interval = reload_interval
+        self._indexes = {}
+        self._checked = {}
+
+    @classmethod
+    def from_config(cls):
+        """Suggester of the configured index files."""
+        return cls(
+            prefix_index_path,
+            reload_interval=current_app.config[
+                "VOCABULARIES_EXTRA_PREFIX_INDEX_RELOAD_INTERVAL"
+            ],
+        )
+
+    def index(self, scheme):
+        """Prefix index of a scheme, None if it was not built yet."""
+        now = time.monotonic()
+        index = self._indexes.get(scheme)
+        if index is not None and now - self._checked[scheme] < self._reload_interval:
+            return index
+        self._checked[scheme] = now
+        path = self._paths(scheme)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return index
+        if index is not None and (stat.st_ino, stat.st_mtime_ns) == (
+            index.stat.st_ino,
+            index.stat.st_mtime_ns,
+        ):
+            return index
+        # lookups still running on the old index keep its pages mapped
+        self._indexes[scheme] = PrefixIndex(path)
+        return self._indexes[scheme]
+
+    def suggest(self, prefix, schemes, lang, k=10):
+        """Best k subjects of the schemes with a label starting with the prefix.
+
+        The titles of the language and the labels without language are
+        searched.
+
+        :returns: dicts with the ``scheme``, ``id`` and matching ``label``.
+        """
+        suggestions = []
+        for scheme in schemes:
+            index = self.index(scheme)
+            if index is None:
+                continue
+            for label_lang in (lang, UNDETERMINED):
+                for suggestion in index.lookup(prefix, label_lang, k):
+                    suggestions.append((scheme, suggestion))
+
+        return [
+            {"scheme": scheme, "id": suggestion.id, "label": suggestion.label}
+            for scheme, suggestion in _top(
+                suggestions,
+                k,
+                lambda item: _sort_key(item[1]),
+                lambda item: (item[0], item[1].id),
+            )
+        ]
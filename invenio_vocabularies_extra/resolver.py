@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Cached resolution of subjects by scheme and id.
+
+Subjects are looked up in an in-process LRU cache first, then in an
+optional Redis cache shared by all processes and only then read with the
+subjects service. The writers of the imports invalidate the subjects they
+update or delete and warm the caches with the written subjects. With Redis
+the invalidations are published to the in-process caches of all processes,
+without it the in-process caches of other processes expire after their TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from invenio_access.permissions import system_identity
+from invenio_records_resources.proxies import current_service_registry
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a maximum size and a time to live."""
+
+    def __init__(self, max_size=10000, ttl=None):
+        """Constructor.
+
+        :param max_size: maximum number of items.
+        :param ttl: seconds an item is kept, None keeps it until evicted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Item of the key, or default if it is missing or expired."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Sets an item, evicting the least recently used ones beyond the size."""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._items[key] = (expires, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        """Removes an item."""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """Removes all items."""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        """Number of items, including expired ones not evicted yet."""
+        return len(self._items)
+
+
+class SubjectResolver:
+    """Resolves subjects by scheme and id through the caches.
+
+    The subjects are resolved with the system identity, as returned by the
+    ``read`` of the subjects service. The returned dicts are shared by the
+    callers and must not be modified.
+    """
+
+    def __init__(
+        self,
+        service_or_name="subjects",
+        max_size=10000,
+        ttl=300,
+        redis_client=None,
+        redis_ttl=None,
+        prefix="vocabularies-extra:subjects:",
+    ):
+        """Constructor.
+
+        :param service_or_name: a service instance or a key of the service
+                                registry.
+        :param max_size: maximum number of subjects in the in-process cache.
+        :param ttl: seconds a subject is kept in the in-process cache.
+        :param redis_client: client of the shared cache, None disables it.
+        :param redis_ttl: seconds a subject is kept in the shared cache.
+        :param prefix: prefix of the keys and channel in Redis.
+        """
+        self._service = service_or_name
+        self.local = LRUCache(max_size=max_size, ttl=ttl)
+        self._redis = redis_client
+        self._redis_ttl = redis_ttl
+        self._prefix = prefix
+        self._channel = f"{prefix}invalidate"
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """Whether the resolver has a cache shared by all processes."""
+        return self._redis is not None
+
+    @classmethod
+    def from_config(cls):
+        """Resolver configured by the ``VOCABULARIES_EXTRA_SUBJECTS_CACHE_*`` keys."""
+        config = current_app.config
+        redis_url = config.get("VOCABULARIES_EXTRA_SUBJECTS_CACHE_REDIS_URL")
+        redis_client = None
+        if redis_url:
+            if redis is None:
+                raise RuntimeError(
+                    "The shared subjects cache needs the redis package, "
+                    "install invenio-vocabularies-extra[redis]."
+                )
+            redis_client = redis.Redis.from_url(redis_url)
+        return cls(
+            max_size=config.get("VOCABULARIES_EXTRA_SUBJECTS_CACHE_SIZE", 10000),
+            ttl=config.get("VOCABULARIES_EXTRA_SUBJECTS_CACHE_TTL", 300),
+            redis_client=redis_client,
+            redis_ttl=config.get("VOCABULARIES_EXTRA_SUBJECTS_CACHE_REDIS_TTL"),
+        )
+
+    @property
+    def service(self):
+        """The subjects service."""
+        if isinstance(self._service, str):
+            self._service = current_service_registry.get(self._service)
+        return self._service
+
+    @staticmethod
+    def key(scheme, id_):
+        """Cache key of a subject."""
+        return f"{scheme}:{id_}"
+
+    def resolve(self, scheme, id_):
+        """The subject of the scheme with the id.
+
+        :raises PIDDoesNotExistError: if there is no such subject.
+        """
+        key = self.key(scheme, id_)
+        subject = self.local.get(key)
+        if subject is not None:
+            return subject
+
+        self._listen()
+        if self._redis is not None:
+            data = self._redis.get(self._prefix + key)
+            if data is not None:
+                subject = json.loads(data)
+                self.local.set(key, subject)
+                return subject
+
+        subject = self.service.read(system_identity, id_).to_dict()
+        self.prime([subject], scheme=scheme)
+        return subject
+
+    def resolve_many(self, scheme, ids):
+        """The subjects of the scheme with the ids, missing ones are left out.
+
+        The subjects missing in the caches are searched with one request.
+        """
+        subjects = {}
+        missing = []
+        for id_ in ids:
+            subject = self.local.get(self.key(scheme, id_))
+            if subject is not None:
+                subjects[id_] = subject
+            else:
+                missing.append(id_)
+
+        if missing:
+            self._listen()
+        if missing and self._redis is not None:
+            values = self._redis.mget(
+                [self._prefix + self.key(scheme, id_) for id_ in missing]
+            )
+            still_missing = []
+            for id_, data in zip(missing, values):
+                if data is None:
+                    still_missing.append(id_)
+                    continue
+                subjects[id_] = json.loads(data)
+                self.local.set(self.key(scheme, id_), subjects[id_])
+            missing = still_missing
+
+        if missing:
+            found = list(self.service.read_many(system_identity, missing).hits)
+            self.prime(found, scheme=scheme)
+            subjects.update((subject["id"], subject) for subject in found)
+        return [subjects[id_] for id_ in ids if id_ in subjects]
+
+    def prime(self, subjects, scheme=None):
+        """Puts subjects into the caches.
+
+        :param scheme: scheme of the subjects, defaults to their ``scheme``.
+        """
+        if not subjects:
+            return
+        pipeline = self._redis.pipeline() if self._redis is not None else None
+        for subject in subjects:
+            key = self.key(scheme or subject.get("scheme"), subject["id"])
+            self.local.set(key, subject)
+            if pipeline is not None:
+                pipeline.set(
+                    self._prefix + key, json.dumps(subject), ex=self._redis_ttl
+                )
+        if pipeline is not None:
+            pipeline.execute()
+
+    def invalidate(self, keys):
+        """Removes subjects from the caches of all processes.
+
+        :param keys: ``(scheme, id)`` tuples of the subjects.
+        """
+        keys = [self.key(scheme, id_) for scheme, id_ in keys]
+        if not keys:
+            return
+        for key in keys:
+            self.local.delete(key)
+        if self._redis is not None:
+            self._redis.delete(*[self._prefix + key for key in keys])
+            self._redis.publish(self._channel, json.dumps(keys))
+
+    def _listen(self):
+        """Starts removing the subjects invalidated by other processes."""
+        if self._redis is None or self._listener is not None:
+            return
+        with self._listener_lock:
+            if self._listener is not None:
+                return
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self._channel: self._invalidated})
+            self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _invalidated(self, message):
+        """Removes the subjects of an invalidation message."""
+        for key in json.loads(message["data"]):
+            self.local.delete(key)
+
+
+def subject_resolver():
+    """Subject resolver of the application, None without the extension."""
+    ext = current_app.extensions.get("invenio-vocabularies-extra")
+    return ext.subject_resolver if ext is not None else None
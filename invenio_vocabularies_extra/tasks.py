@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Celery tasks."""
+
+import copy
+import json
+import os
+import time
+import tracemalloc
+from collections import Counter
+from urllib.parse import urlparse
+
+import arrow
+from celery import shared_task
+from flask import current_app
+from invenio_access.permissions import system_identity
+from invenio_jobs.errors import TaskExecutionPartialError
+from invenio_jobs.logging.jobs import EMPTY_JOB_CTX, job_context
+from invenio_records_resources.proxies import current_service_registry
+from invenio_vocabularies.datastreams.errors import IncompleteReadError
+from invenio_vocabularies.datastreams.factories import (
+    ReaderFactory,
+    TransformerFactory,
+    WriterFactory,
+)
+from invenio_vocabularies.services.tasks import process_datastream
+
+from .contrib.subjects.gnd.datastreams import (
+    GND_FULL_DATASTREAM_CONFIG,
+    GND_PRESET_DATASTREAM_CONFIG,
+)
+from .datastreams.cache import SourceCache, cache_dir
+from .datastreams.checkpoint import Checkpoint
+from .datastreams.datastreams import ParallelDataStream
+from .datastreams.decompress import threaded_inflate
+from .datastreams.harvest import OAI_DATESTAMP_FORMAT, HarvestState, harvest_windows
+from .datastreams.manifest import Manifest, manifest_path
+from .datastreams.profiling import SampledDataStream, SamplingProfiler, write_profile
+from .datastreams.readers import NoRecordsMatchError
+from .datastreams.shards import (
+    build_record_index,
+    load_record_index,
+    write_record_index,
+)
+from .datastreams.snapshot import snapshot_index_path, snapshot_path
+from .datastreams.stats import DataStreamStats, send_statsd
+from .prefix_index import PrefixIndexBuilder, update_prefix_index
+
+CACHING_READERS = ("ddc", "http-cached", "mesh-join")
+"""Readers marking the sources they read completely as processed in the source cache."""
+
+
+def cache_indexed_collection(url):
+    """Downloads, decompresses and indexes a MARC21-xml collection.
+
+    The download is kept in the source cache, the decompressed copy and its
+    record index in the cache directory. They are reused as long as the
+    source did not change.
+
+    :returns: the path of the decompressed collection.
+    """
+    source_cache = SourceCache.from_config()
+    metadata = source_cache.fetch(url)
+    # ties the index to the downloaded version of the source
+    source = f"{url}#{metadata['fetched']}"
+    name = os.path.basename(urlparse(url).path)
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[: -len(".gz")]
+    path = os.path.join(cache_dir(), name)
+    index = load_record_index(path)
+    if index is not None and index["source"] == source:
+        return path
+
+    tmp_path = f"{path}.tmp"
+    with open(source_cache.path(url), "rb") as fp:
+        src = threaded_inflate(fp) if compressed else fp
+        with src, open(tmp_path, "wb") as dst:
+            index = build_record_index(src, dst, source=source)
+    os.replace(tmp_path, path)
+    write_record_index(path, index)
+    current_app.logger.info(
+        "Indexed %s records of %s in %s", len(index["records"]), url, path
+    )
+    return path
+
+
+def report_stats(stats):
+    """Logs the stats of a data stream and sends them to StatsD if configured."""
+    current_app.logger.info("Data stream stats: %s", json.dumps(stats.as_dict()))
+    statsd = current_app.config["VOCABULARIES_EXTRA_DATASTREAM_STATSD"]
+    if statsd:
+        try:
+            send_statsd(stats, **statsd)
+        except OSError:
+            current_app.logger.warning("Could not send stats to StatsD", exc_info=True)
+
+
+def run_summary(result):
+    """Message of a data stream run from the result of its task."""
+    lines = []
+    counts = []
+    if "create" in result:
+        counts.append(f"{result['create']} entries created")
+        counts.append(f"{result['update']} updated")
+    if "skip" in result:
+        counts.append(f"{result['skip']} skipped as unchanged")
+    if counts:
+        lines.append(", ".join(counts + [f"{result['errors']} with errors."]))
+    if "stats" in result:
+        lines.append(f"Data stream stats: {json.dumps(result['stats'])}")
+    return "\n".join(lines)
+
+
+def journaled_writer_config(w_conf, manifest):
+    """Writer config recording the entries of an async writer in the manifest.
+
+    The entries of an async writer are written by sub-tasks. Writers
+    supporting it append the entries they committed to the journal of the
+    manifest, the others leave the manifest unchanged, so that their entries
+    are always written.
+    """
+    if not manifest or w_conf["type"] != "async":
+        return w_conf
+    inner = w_conf["args"]["writer"]
+    writer_cls = WriterFactory.options().get(inner["type"])
+    if not getattr(writer_cls, "journals_manifest", False):
+        current_app.logger.warning(
+            "The %s writer does not record its entries in the manifest %s, "
+            "unchanged entries are written again",
+            inner["type"],
+            manifest,
+        )
+        return w_conf
+    w_conf = copy.deepcopy(w_conf)
+    w_conf["args"]["writer"].setdefault("args", {})["manifest"] = manifest
+    return w_conf
+
+
+@shared_task(ignore_result=True)
+def process_datastream_parallel(config):
+    """Process a datastream from config, transforming in worker processes.
+
+    Besides the keys of ``process_datastream`` the config accepts
+    ``transform_workers``, ``ordered``, the name of a ``manifest`` of
+    content hashes to skip unchanged entries, the name of a ``checkpoint`` to
+    resume an interrupted run and ``stats`` to log the timing and counters of
+    every stage. With the scheme of the entries as ``prefix_index``, the
+    labels of the processed entries are updated in its prefix index.
+
+    The numbers of entries created and updated by synchronous writers,
+    counted from the results of the writes, are logged and returned, like
+    the unchanged entries of a manifest and the stats. The entries of async
+    writers are counted by their sub-tasks in the job run.
+    """
+    manifest = None
+    if config.get("manifest"):
+        manifest = Manifest(manifest_path(config["manifest"]))
+    checkpoint = None
+    if config.get("checkpoint"):
+        checkpoint = Checkpoint(
+            os.path.join(cache_dir(), "checkpoints", f"{config['checkpoint']}.json"),
+            interval=current_app.config["VOCABULARIES_EXTRA_CHECKPOINT_INTERVAL"],
+        )
+    stats = None
+    if config.get("stats", current_app.config["VOCABULARIES_EXTRA_DATASTREAM_STATS"]):
+        stats = DataStreamStats(
+            sample=current_app.config["VOCABULARIES_EXTRA_DATASTREAM_STATS_SAMPLE"]
+        )
+    ds = ParallelDataStream(
+        readers=[ReaderFactory.create(r_conf) for r_conf in config["readers"]],
+        transformers=[
+            TransformerFactory.create(t_conf)
+            for t_conf in config.get("transformers", [])
+        ],
+        writers=[
+            WriterFactory.create(
+                journaled_writer_config(w_conf, config.get("manifest"))
+            )
+            for w_conf in config["writers"]
+        ],
+        batch_size=config.get("batch_size", 1000),
+        run_subtasks=config.get("run_subtasks", True),
+        write_many=config.get("write_many", False),
+        transform_workers=config.get(
+            "transform_workers",
+            current_app.config["VOCABULARIES_EXTRA_TRANSFORM_WORKERS"],
+        )
+        or os.cpu_count(),
+        ordered=config.get("ordered", True),
+        manifest=manifest,
+        checkpoint=checkpoint,
+        stats=stats,
+    )
+    prefix_updates = PrefixIndexBuilder() if config.get("prefix_index") else None
+    entries_with_errors = 0
+    written = Counter()
+    try:
+        for result in ds.process():
+            if result.errors:
+                current_app.logger.warning(
+                    "Skipped entry with errors: %s",
+                    result.errors,
+                )
+                entries_with_errors += 1
+                continue
+            written["skip" if result.filtered else result.op_type] += 1
+            if prefix_updates is not None:
+                # unchanged entries, filtered out by the manifest, are added too
+                if result.entry.get("deleted"):
+                    # deletions by IDN are only resolved to ids by the writer
+                    if "id" in result.entry:
+                        prefix_updates.remove(result.entry["id"])
+                else:
+                    prefix_updates.add(result.entry)
+    except IncompleteReadError as err:
+        raise TaskExecutionPartialError(
+            message=str(err),
+            errored_entries_count=entries_with_errors,
+        ) from err
+    finally:
+        if stats is not None:
+            report_stats(stats)
+        if prefix_updates is not None and (
+            prefix_updates.subjects or prefix_updates.removed
+        ):
+            index_prefixes(config["prefix_index"], prefix_updates)
+
+    result = {"errors": entries_with_errors}
+    if not any(w_conf["type"] == "async" for w_conf in config["writers"]):
+        result.update(create=written["create"], update=written["update"])
+    if manifest is not None:
+        result["skip"] = written["skip"]
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+    summary = run_summary(result)
+    if summary:
+        current_app.logger.info(summary)
+    if entries_with_errors:
+        message = f"Task execution partially succeeded with {entries_with_errors} entries with errors."
+        raise TaskExecutionPartialError(
+            message=f"{message}\n{summary}" if summary else message,
+            errored_entries_count=entries_with_errors,
+        )
+    return result
+
+
+def index_prefixes(scheme, updates, replace=False):
+    """Updates the prefix index of a scheme, logging failures."""
+    try:
+        labels = update_prefix_index(scheme, updates, replace=replace)
+    except Exception:
+        current_app.logger.exception("Could not update the %s prefix index", scheme)
+        return
+    current_app.logger.info(
+        "Updated the %s prefix index with %s subjects, %s labels in total",
+        scheme,
+        len(updates),
+        labels,
+    )
+
+
+@shared_task(ignore_result=True)
+def rebuild_prefix_index(scheme):
+    """Rebuilds the prefix index of a scheme from the subjects in the search index.
+
+    For an index lost or out of date, e.g. after a sharded import, whose
+    sub-tasks do not update it, and periodically for the GND harvests, which
+    do not update it either.
+    """
+    service = current_service_registry.get("subjects")
+    updates = PrefixIndexBuilder()
+    for subject in service.scan(
+        system_identity, params={"q": f'scheme:"{scheme}"'}
+    ).hits:
+        updates.add(subject)
+    index_prefixes(scheme, updates, replace=True)
+
+
+@shared_task(ignore_result=True)
+def import_gnd_subjects_sharded(shards=None, origin=None):
+    """Imports the full GND subjects file in parallel shards.
+
+    The file is decompressed and indexed once, then every shard is processed
+    by its own datastream task.
+    """
+    shards = shards or current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_SHARDS"]
+    origin = origin or current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_FILE_URL"]
+    path = cache_indexed_collection(origin)
+    # shards are processed concurrently and cannot share the manifest and
+    # checkpoint
+    config = {
+        key: value
+        for key, value in GND_FULL_DATASTREAM_CONFIG.items()
+        if key not in ("manifest", "checkpoint")
+    }
+    for shard in range(shards):
+        process_datastream.delay(
+            config={
+                **config,
+                "readers": [
+                    {
+                        "type": "marc21-shard",
+                        "args": {
+                            "origin": path,
+                            "shard": shard,
+                            "shards": shards,
+                            "serialize": False,
+                        },
+                    }
+                ],
+            }
+        )
+
+
+def gnd_harvest_state():
+    """High-water mark of the GND subjects updates harvest."""
+    return HarvestState(os.path.join(cache_dir(), "harvest", "gnd-subjects.json"))
+
+
+def gnd_harvest_config(start, end):
+    """Datastream config harvesting the GND subjects updates of a time window."""
+    config = copy.deepcopy(GND_PRESET_DATASTREAM_CONFIG)
+    config["readers"][0]["args"].update(
+        from_date=start.format(OAI_DATESTAMP_FORMAT),
+        until_date=end.format(OAI_DATESTAMP_FORMAT),
+    )
+    # the windows run concurrently, each in a single process
+    config["transform_workers"] = 1
+    return config
+
+
+@shared_task(ignore_result=True)
+def harvest_gnd_subjects_window(start, end):
+    """Harvests the GND subjects updates of a time window.
+
+    The window is recorded in the harvest state once it was harvested, so
+    that the high-water mark can advance. A window failing with any other
+    error than having no updates is not recorded and harvested again by the
+    next run.
+    """
+    start = arrow.get(start)
+    end = arrow.get(end)
+    try:
+        process_datastream_parallel(gnd_harvest_config(start, end))
+    except NoRecordsMatchError:
+        current_app.logger.info("No GND subjects updates from %s to %s", start, end)
+        gnd_harvest_state().mark_harvested(start, end)
+        return
+    except TaskExecutionPartialError as err:
+        if not isinstance(err.__cause__, IncompleteReadError):
+            # entries with errors are skipped, the window itself was harvested
+            gnd_harvest_state().mark_harvested(start, end)
+        raise
+    gnd_harvest_state().mark_harvested(start, end)
+
+
+@shared_task(ignore_result=True)
+def harvest_gnd_subjects(since=None, until=None):
+    """Harvests the GND subjects updates since the high-water mark.
+
+    A large gap, e.g. after a downtime, is split into windows harvested
+    concurrently by separate tasks, each with its own resumption token
+    chain.
+
+    :param since: start of the harvest, the persisted high-water mark is used
+                  if it is earlier.
+    :param until: end of the harvest, defaults to now.
+    """
+    until = arrow.get(until) if until else arrow.utcnow()
+    state = gnd_harvest_state()
+    starts = [arrow.get(date) for date in (since, state.high_water_mark) if date]
+    since = min(starts) if starts else until.shift(minutes=-15)
+    state.start(since)
+
+    windows = harvest_windows(
+        since,
+        until,
+        window=current_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_HARVEST_WINDOW"],
+        max_windows=current_app.config[
+            "VOCABULARIES_EXTRA_SUBJECTS_GND_HARVEST_MAX_WINDOWS"
+        ],
+    )
+    if len(windows) == 1:
+        harvest_gnd_subjects_window(*(date.isoformat() for date in windows[0]))
+        return
+
+    current_app.logger.info(
+        "Harvesting GND subjects updates from %s to %s in %s windows",
+        since,
+        until,
+        len(windows),
+    )
+    for start, end in windows:
+        harvest_gnd_subjects_window.delay(start.isoformat(), end.isoformat())
+
+
+def profile_config(config):
+    """Datastream config without side effects, for profiling.
+
+    The writers, manifest, checkpoint and prefix index are dropped, the cached source is not
+    marked as processed and the entries are transformed in the current
+    process, where they are sampled by the profiler.
+    """
+    config = {
+        key: value
+        for key, value in copy.deepcopy(config).items()
+        if key not in ("writers", "manifest", "checkpoint", "prefix_index")
+    }
+    for r_conf in config["readers"]:
+        if r_conf["type"] in CACHING_READERS:
+            r_conf.setdefault("args", {})["mark_processed"] = False
+    config.update(writers=[], write_many=False, transform_workers=1)
+    return config
+
+
+@shared_task(ignore_result=True)
+def profile_datastream(config, name="datastream", limit=None, fraction=None):
+    """Profiles the readers and transformers of a datastream, writing nothing.
+
+    A sample of the entries is read and transformed, with a sampling CPU
+    profiler and tracemalloc running. The reports are written to a directory
+    named after ``name`` and the job run in ``VOCABULARIES_EXTRA_PROFILE_DIR``.
+
+    :param limit: number of entries processed, defaults to
+                  ``VOCABULARIES_EXTRA_PROFILE_LIMIT`` unless ``fraction``
+                  is given.
+    :param fraction: share of the entries processed, the whole source is read.
+    """
+    if limit is None and fraction is None:
+        limit = current_app.config["VOCABULARIES_EXTRA_PROFILE_LIMIT"]
+    top = current_app.config["VOCABULARIES_EXTRA_PROFILE_TOP"]
+    config = profile_config(config)
+    stats = DataStreamStats()
+    ds = SampledDataStream(
+        readers=[ReaderFactory.create(r_conf) for r_conf in config["readers"]],
+        transformers=[
+            TransformerFactory.create(t_conf)
+            for t_conf in config.get("transformers", [])
+        ],
+        writers=[],
+        batch_size=config.get("batch_size", 1000),
+        transform_workers=1,
+        stats=stats,
+        limit=limit,
+        fraction=fraction,
+    )
+
+    run = job_context.get()
+    run_id = (
+        run["run_id"]
+        if run is not EMPTY_JOB_CTX
+        else arrow.utcnow().format("YYYYMMDDTHHmmss")
+    )
+    directory = os.path.join(
+        current_app.config["VOCABULARIES_EXTRA_PROFILE_DIR"]
+        or os.path.join(cache_dir(), "profiles"),
+        f"{name}-{run_id}",
+    )
+    profiler = SamplingProfiler(
+        current_app.config["VOCABULARIES_EXTRA_PROFILE_INTERVAL"]
+    )
+    entries = 0
+    entries_with_errors = 0
+    start = time.perf_counter()
+    tracemalloc.start()
+    try:
+        with profiler:
+            for result in ds.process():
+                entries += 1
+                if result.errors:
+                    entries_with_errors += 1
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        summary = {
+            "name": name,
+            "limit": limit,
+            "fraction": fraction,
+            "entries": entries,
+            "entries_with_errors": entries_with_errors,
+            # tracemalloc slows the allocations down
+            "seconds": round(time.perf_counter() - start, 3),
+            "stats": stats.as_dict(),
+            "config": config,
+        }
+        paths = write_profile(directory, profiler, snapshot, peak, summary, top)
+        current_app.logger.info(
+            "Profiled %s entries of %s, reports written to %s",
+            entries,
+            name,
+            ", ".join(paths),
+        )
+
+
+def snapshot_config(config, path):
+    """Datastream config writing the transformed entries to a snapshot.
+
+    All entries are written, so the manifest is dropped, like the checkpoint
+    and the prefix index. The cached source is not marked as processed, the
+    next import still processes it.
+    """
+    config = {
+        key: value
+        for key, value in copy.deepcopy(config).items()
+        if key not in ("writers", "manifest", "checkpoint", "prefix_index")
+    }
+    for r_conf in config["readers"]:
+        if r_conf["type"] in CACHING_READERS:
+            r_conf.setdefault("args", {})["mark_processed"] = False
+    config.update(
+        writers=[{"type": "snapshot", "args": {"origin": path}}], write_many=True
+    )
+    return config
+
+
+@shared_task(ignore_result=True)
+def snapshot_datastream(config, name):
+    """Writes the transformed entries of a datastream to the snapshot ``name``.
+
+    The snapshot replaces the previous one once the source was read
+    completely. Entries with errors are left out.
+    """
+    path = snapshot_path(name)
+    tmp_path = f"{path}.tmp"
+    try:
+        process_datastream_parallel(snapshot_config(config, tmp_path))
+    except TaskExecutionPartialError as err:
+        if isinstance(err.__cause__, IncompleteReadError):
+            raise
+        replace_snapshot(tmp_path, path)
+        raise
+    replace_snapshot(tmp_path, path)
+
+
+def replace_snapshot(tmp_path, path):
+    """Replaces a snapshot and its chunk index with new ones."""
+    if not os.path.exists(tmp_path):
+        current_app.logger.warning("No entries written, %s is kept", path)
+        return
+    os.replace(snapshot_index_path(tmp_path), snapshot_index_path(path))
+    os.replace(tmp_path, path)
+    current_app.logger.info("Snapshot written to %s", path)
+
+
+def load_snapshot_config(config, name):
+    """Datastream config writing the entries of a snapshot like ``config``.
+
+    The entries are not transformed and not compared with the manifest, so
+    all of them are written.
+    """
+    return {
+        "readers": [{"type": "snapshot", "args": {"origin": snapshot_path(name)}}],
+        "writers": copy.deepcopy(config["writers"]),
+        "batch_size": config.get("batch_size", 1000),
+        "write_many": config.get("write_many", False),
+        "transform_workers": 1,
+        "prefix_index": config.get("prefix_index"),
+    }
@@ -34,12 +34,28 @@ def create_app(instance_path):
     return _create_app
 
 
+def create_transform_app():
+    """Application of the transform worker processes."""
+    app_ = Flask("testapp", instance_path=tempfile.mkdtemp())
+    app_.config.update(
+        VOCABULARIES_EXTRA_SUBJECTS_DDC_LANG="de",
+        VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG="de",
+        I18N_LANGUAGES=[
+            ("de", "German"),
+        ],
+    )
+    InvenioI18N(app_)
+    return app_
+
+
 @pytest.fixture()
 def base_app():
     """Flask base application fixture."""
     instance_path = tempfile.mkdtemp()
     app_ = Flask("testapp", instance_path=instance_path)
     app_.config.update(
+        VOCABULARIES_EXTRA_TRANSFORM_WORKERS=1,
+        VOCABULARIES_EXTRA_TRANSFORM_APP_FACTORY="conftest:create_transform_app",
         VOCABULARIES_EXTRA_SUBJECTS_DDC_LANG="de",
         VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG="de",
         ACCOUNTS_USE_CELERY=False,
@@ -107,3 +123,62 @@ def expected_mesh_result():
             },
         ],
     }
+
+
+@pytest.fixture(scope="module")
+def gnd_marc21_record():
+    """A single MARC21-xml GND subject record."""
+    return """<record xmlns="http://www.loc.gov/MARC21/slim" type="Authority">
+  <leader>00000nz  a2200000nc 4500</leader>
+  <controlfield tag="001">04558957X</controlfield>
+  <controlfield tag="003">DE-101</controlfield>
+  <controlfield tag="005">20230317154912.0</controlfield>
+  <datafield tag="024" ind1="7" ind2=" ">
+    <subfield code="a">4558957-4</subfield>
+    <subfield code="0">http://d-nb.info/gnd/4558957-4</subfield>
+    <subfield code="2">gnd</subfield>
+  </datafield>
+  <datafield tag="035" ind1=" " ind2=" ">
+    <subfield code="a">(DE-101)04558957X</subfield>
+  </datafield>
+  <datafield tag="150" ind1=" " ind2=" ">
+    <subfield code="a">Mozartjahr</subfield>
+  </datafield>
+  <datafield tag="450" ind1=" " ind2=" ">
+    <subfield code="a">Mozart-Jahr</subfield>
+  </datafield>
+  <datafield tag="450" ind1=" " ind2=" ">
+    <subfield code="a">Mozart-Feier</subfield>
+  </datafield>
+  <datafield tag="750" ind1=" " ind2="7">
+    <subfield code="0">(DLC)sh85088152</subfield>
+    <subfield code="a">Mozart Year</subfield>
+    <subfield code="4">EQ</subfield>
+    <subfield code="9">L:eng</subfield>
+  </datafield>
+</record>"""
+
+
+@pytest.fixture(scope="module")
+def expected_gnd_result():
+    """Set the expected results."""
+    return {
+        "id": "gnd:4558957-4",
+        "scheme": "GND",
+        "title": {
+            "de": "Mozartjahr",
+            "en": "Mozart Year",
+        },
+        "subject": "Mozartjahr",
+        "synonyms": [
+            "Mozart-Jahr",
+            "Mozart-Feier",
+        ],
+        "identifiers": [
+            {
+                "scheme": "url",
+                "identifier": "http://d-nb.info/gnd/4558957-4",
+            }
+        ],
+        "props": {"idn": "04558957X"},
+    }
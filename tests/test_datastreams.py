@@ -0,0 +1,606 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Custom datastreams tests."""
+
+import json
+import os
+import tracemalloc
+
+import arrow
+import billiard
+import pytest
+from invenio_jobs.errors import TaskExecutionPartialError
+from invenio_vocabularies.datastreams import StreamEntry
+from invenio_vocabularies.datastreams.errors import ReaderError, WriterError
+from invenio_vocabularies.datastreams.readers import BaseReader
+from invenio_vocabularies.datastreams.transformers import BaseTransformer
+from invenio_vocabularies.datastreams.writers import AsyncWriter, BaseWriter
+
+from invenio_vocabularies_extra import InvenioExtraVocabularies
+from invenio_vocabularies_extra.contrib.subjects.ddc.datastreams import (
+    DdcYamlTransformer,
+)
+from invenio_vocabularies_extra.datastreams.checkpoint import Checkpoint
+from invenio_vocabularies_extra.datastreams.datastreams import ParallelDataStream
+from invenio_vocabularies_extra.datastreams.harvest import (
+    HarvestState,
+    harvest_windows,
+)
+from invenio_vocabularies_extra.datastreams.manifest import (
+    Manifest,
+    journal_written,
+)
+from invenio_vocabularies_extra.datastreams.profiling import (
+    SampledDataStream,
+    SamplingProfiler,
+    write_profile,
+)
+from invenio_vocabularies_extra.datastreams.readers import NoRecordsMatchError
+from invenio_vocabularies_extra.datastreams.stats import (
+    DataStreamStats,
+    MeteredTransformer,
+)
+from invenio_vocabularies_extra.datastreams.writers import SubjectsBulkWriter
+from invenio_vocabularies_extra.tasks import (
+    gnd_harvest_state,
+    harvest_gnd_subjects_window,
+    journaled_writer_config,
+    process_datastream_parallel,
+)
+
+
+class ListReader(BaseReader):
+    """Reader handing out the entries of a list."""
+
+    def __init__(self, entries, *args, **kwargs):
+        """Constructor."""
+        self._entries = entries
+        super().__init__(*args, **kwargs)
+
+    def _iter(self, fp, *args, **kwargs):
+        """Not used."""
+
+    def read(self, item=None, *args, **kwargs):
+        """Yields the entries."""
+        yield from self._entries
+
+
+class VersionedListReader(ListReader):
+    """List reader with a source version."""
+
+    source_version = "v1"
+
+
+class ListWriter(BaseWriter):
+    """Writer collecting the entries in a list."""
+
+    def __init__(self, *args, **kwargs):
+        """Constructor."""
+        self.entries = []
+        super().__init__(*args, **kwargs)
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Collects the entry."""
+        self.entries.append(stream_entry.entry)
+        return stream_entry
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Collects the entries."""
+        self.entries.extend(stream_entry.entry for stream_entry in stream_entries)
+        return stream_entries
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parallel_datastream(app, ordered):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(250)
+    ]
+    writer = ListWriter()
+    datastream = ParallelDataStream(
+        readers=[ListReader(ddc)],
+        transformers=[DdcYamlTransformer()],
+        writers=[writer],
+        batch_size=20,
+        transform_workers=3,
+        ordered=ordered,
+    )
+
+    results = list(datastream.process())
+
+    assert not any(result.errors for result in results)
+    subjects = [entry["subject"] for entry in writer.entries]
+    expected = [f"{idx:03d} Klasse {idx}" for idx in range(250)]
+    if ordered:
+        assert subjects == expected
+    else:
+        assert sorted(subjects) == expected
+
+
+class JsonLinesWriter(BaseWriter):
+    """Writer appending the entries to a JSON lines file.
+
+    Entries whose id is in ``fail`` are not written and get an error.
+    """
+
+    def __init__(self, path, fail=(), *args, **kwargs):
+        """Constructor."""
+        self._path = path
+        self._fail = set(fail)
+        super().__init__(*args, **kwargs)
+
+    def write(self, stream_entry, *args, **kwargs):
+        """Appends the entry."""
+        return self.write_many([stream_entry])[0]
+
+    def write_many(self, stream_entries, *args, **kwargs):
+        """Appends the entries, as updates if their id was written before."""
+        written = set()
+        if os.path.exists(self._path):
+            with open(self._path) as fp:
+                written = {json.loads(line).get("id") for line in fp}
+        with open(self._path, "a") as fp:
+            for stream_entry in stream_entries:
+                entry_id = stream_entry.entry.get("id")
+                if entry_id in self._fail:
+                    stream_entry.errors.append("not written")
+                    continue
+                fp.write(json.dumps(stream_entry.entry) + "\n")
+                stream_entry.op_type = "update" if entry_id in written else "create"
+        return stream_entries
+
+
+class PidTransformer(BaseTransformer):
+    """Transformer recording the process transforming the entry."""
+
+    def apply(self, stream_entry, *args, **kwargs):
+        """Adds the process id."""
+        stream_entry.entry["pid"] = os.getpid()
+        return stream_entry
+
+
+def test_process_datastream_parallel_in_daemonic_worker(app, tmp_path):
+    InvenioExtraVocabularies(app)
+    app.config.update(
+        VOCABULARIES_DATASTREAM_READERS={"list": ListReader},
+        VOCABULARIES_DATASTREAM_TRANSFORMERS={
+            "ddc-subjects": DdcYamlTransformer,
+            "pid": PidTransformer,
+        },
+        VOCABULARIES_DATASTREAM_WRITERS={"jsonl": JsonLinesWriter},
+    )
+    path = tmp_path / "written.jsonl"
+    config = {
+        "readers": [
+            {
+                "type": "list",
+                "args": {
+                    "entries": [
+                        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"K {idx}"}
+                        for idx in range(30)
+                    ]
+                },
+            }
+        ],
+        "transformers": [{"type": "ddc-subjects"}, {"type": "pid"}],
+        "writers": [{"type": "jsonl", "args": {"path": str(path)}}],
+        "batch_size": 10,
+        "write_many": True,
+        "transform_workers": 3,
+    }
+    results = billiard.Queue()
+
+    def run_task():
+        # like a task run by a process of Celery's prefork pool
+        with app.app_context():
+            try:
+                process_datastream_parallel.apply(kwargs={"config": config}).get()
+            except BaseException as err:
+                results.put(repr(err))
+            else:
+                results.put(os.getpid())
+
+    worker = billiard.Process(target=run_task, daemon=True)
+    worker.start()
+    task_pid = results.get(timeout=60)
+    worker.join()
+
+    assert isinstance(task_pid, int), task_pid
+    with open(path) as fp:
+        entries = [json.loads(line) for line in fp]
+    assert len(entries) == 30
+    # transformed by the worker processes, not by the daemonic task process
+    assert task_pid not in {entry["pid"] for entry in entries}
+
+
+def test_manifest_skips_unchanged_entries(app, tmp_path):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(5)
+    ]
+    path = tmp_path / "manifests" / "ddc.json"
+
+    def run(entries):
+        writer = ListWriter()
+        manifest = Manifest(path)
+        datastream = ParallelDataStream(
+            readers=[ListReader(entries)],
+            transformers=[DdcYamlTransformer()],
+            writers=[writer],
+            transform_workers=1,
+            manifest=manifest,
+        )
+        list(datastream.process())
+        return [entry["id"] for entry in writer.entries], manifest.counts
+
+    written, counts = run(ddc)
+    assert written == ["000", "001", "002", "003", "004"]
+    assert counts == {"create": 5, "update": 0, "skip": 0}
+
+    ddc[2] = {**ddc[2], "de": "Geänderte Klasse"}
+    ddc.append({"id": "005", "en": "Class 5", "de": "Klasse 5"})
+    written, counts = run(ddc)
+    assert written == ["002", "005"]
+    assert counts == {"create": 1, "update": 1, "skip": 4}
+
+
+def test_manifest_records_written_entries_only(app, tmp_path):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(5)
+    ]
+    path = tmp_path / "manifests" / "ddc.json"
+
+    class FailingWriter(ListWriter):
+        def write(self, stream_entry, *args, **kwargs):
+            if stream_entry.entry["id"] == "003":
+                raise WriterError(["database down"])
+            return super().write(stream_entry, *args, **kwargs)
+
+    class AsyncListWriter(ListWriter):
+        is_async = True
+
+    def run(writer, batch_size=1):
+        manifest = Manifest(path)
+        datastream = ParallelDataStream(
+            readers=[ListReader(ddc)],
+            transformers=[DdcYamlTransformer()],
+            writers=[writer],
+            batch_size=batch_size,
+            transform_workers=1,
+            manifest=manifest,
+        )
+        list(datastream.process())
+        return [entry["id"] for entry in writer.entries]
+
+    assert run(FailingWriter()) == ["000", "001", "002", "004"]
+    assert run(ListWriter()) == ["003"]
+
+    # the sub-tasks of an async writer journal the entries they wrote
+    ddc = [{**entry, "de": f"{entry['de']}!"} for entry in ddc]
+    writer = AsyncListWriter()
+    assert run(writer, batch_size=5) == ["000", "001", "002", "003", "004"]
+    assert run(AsyncListWriter(), batch_size=5) == ["000", "001", "002", "003", "004"]
+    results = [StreamEntry(entry) for entry in writer.entries]
+    results[1].errors.append("invalid")
+    journal_written(str(path), results)
+    assert run(ListWriter()) == ["001"]
+
+
+def test_process_datastream_parallel_reports_counts(app, tmp_path, caplog):
+    InvenioExtraVocabularies(app)
+    app.config.update(
+        VOCABULARIES_EXTRA_CACHE_DIR=str(tmp_path),
+        VOCABULARIES_DATASTREAM_READERS={"list": ListReader},
+        VOCABULARIES_DATASTREAM_TRANSFORMERS={"ddc-subjects": DdcYamlTransformer},
+        VOCABULARIES_DATASTREAM_WRITERS={
+            "async": AsyncWriter,
+            "jsonl": JsonLinesWriter,
+            "subjects-bulk": SubjectsBulkWriter,
+        },
+    )
+    entries = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"K {idx}"} for idx in range(3)
+    ]
+    w_args = {"path": str(tmp_path / "w.jsonl")}
+    config = {
+        "readers": [{"type": "list", "args": {"entries": entries}}],
+        "transformers": [{"type": "ddc-subjects"}],
+        "writers": [{"type": "jsonl", "args": w_args}],
+        "manifest": "ddc",
+    }
+
+    def run():
+        return process_datastream_parallel.apply(kwargs={"config": config}).get()
+
+    def summary():
+        return [r.message for r in caplog.records if r.name == app.logger.name][-1]
+
+    assert run() == {"create": 3, "update": 0, "skip": 0, "errors": 0}
+    entries[0] = {**entries[0], "de": "Geändert"}
+    caplog.set_level("INFO")
+    assert run() == {"create": 0, "update": 1, "skip": 2, "errors": 0}
+    assert summary() == (
+        "0 entries created, 1 updated, 2 skipped as unchanged, 0 with errors."
+    )
+
+    # entries failing to be written are not counted as created or updated
+    entries.append({"id": "003", "en": "Class 3", "de": "K 3"})
+    w_args["fail"] = ["003"]
+    with pytest.raises(TaskExecutionPartialError):
+        run()
+    w_args["fail"] = []
+    assert run() == {"create": 1, "update": 0, "skip": 3, "errors": 0}
+
+    config["stats"] = True
+    stats = run()["stats"]
+    assert stats["transform[0]:DdcYamlTransformer"]["records_in"] == 4
+    assert summary().splitlines()[1] == (f"Data stream stats: {json.dumps(stats)}")
+
+    # the sub-tasks of the bulk writer journal the entries they wrote
+    w_conf = {"type": "async", "args": {"writer": {"type": "subjects-bulk"}}}
+    assert journaled_writer_config(w_conf, "ddc")["args"]["writer"] == {
+        "type": "subjects-bulk",
+        "args": {"manifest": "ddc"},
+    }
+    assert "args" not in w_conf["args"]["writer"]
+    w_conf = {"type": "async", "args": {"writer": {"type": "jsonl"}}}
+    assert journaled_writer_config(w_conf, "ddc") is w_conf
+
+
+@pytest.mark.parametrize("transform_workers", [1, 2])
+def test_datastream_stats(app, transform_workers):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(30)
+    ]
+    stats = DataStreamStats()
+    datastream = ParallelDataStream(
+        readers=[ListReader(ddc)],
+        transformers=[DdcYamlTransformer()],
+        writers=[ListWriter()],
+        batch_size=10,
+        transform_workers=transform_workers,
+        stats=stats,
+    )
+
+    list(datastream.process())
+
+    result = stats.as_dict()
+    assert set(result) == {
+        "read[0]:ListReader",
+        "transform[0]:DdcYamlTransformer",
+        "write[0]:ListWriter",
+    }
+    assert result["read[0]:ListReader"]["records_out"] == 30
+    transform = result["transform[0]:DdcYamlTransformer"]
+    assert transform["records_in"] == transform["records_out"] == 30
+    assert transform["errors"] == 0
+    assert transform["wall"] > 0
+    assert result["write[0]:ListWriter"]["records_out"] == 30
+
+
+@pytest.mark.parametrize("sample", [1, 10])
+def test_datastream_stats_sampled(app, monkeypatch, sample):
+    clock = {"now": 0.0, "reads": 0}
+
+    def tick():
+        clock["now"] += 1.0
+        clock["reads"] += 1
+        return clock["now"]
+
+    monkeypatch.setattr("time.perf_counter", tick)
+    stats = DataStreamStats(sample=sample)
+    transformer = MeteredTransformer(DdcYamlTransformer(), stats, "transform")
+
+    for idx in range(100):
+        transformer.apply(StreamEntry({"id": f"{idx:03d}", "en": "", "de": ""}))
+
+    result = stats.as_dict()["transform"]
+    assert result["records_in"] == result["records_out"] == 100
+    # every timed call takes a second and stands for ``sample`` calls
+    assert result["wall"] == 100
+    assert clock["reads"] == 2 * 100 // sample
+
+
+@pytest.mark.parametrize("transform_workers", [1, 2])
+def test_checkpoint_resumes(app, tmp_path, transform_workers):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(50)
+    ]
+    path = tmp_path / "checkpoints" / "ddc.json"
+
+    class FailingWriter(ListWriter):
+        def write(self, stream_entry, *args, **kwargs):
+            if stream_entry.entry["id"] == "025":
+                raise RuntimeError("worker died")
+            return super().write(stream_entry, *args, **kwargs)
+
+    def run(writer, reader_cls=VersionedListReader):
+        datastream = ParallelDataStream(
+            readers=[reader_cls(ddc)],
+            transformers=[DdcYamlTransformer()],
+            writers=[writer],
+            batch_size=10,
+            transform_workers=transform_workers,
+            checkpoint=Checkpoint(path, interval=10),
+        )
+        list(datastream.process())
+        return [entry["id"] for entry in writer.entries]
+
+    with pytest.raises(RuntimeError):
+        run(FailingWriter())
+    assert path.exists()
+
+    # only the batch in flight is written again
+    written = run(ListWriter())
+    assert written == [f"{idx:03d}" for idx in range(20, 50)]
+    assert not path.exists()
+
+    # without a source version nothing is skipped
+    with pytest.raises(RuntimeError):
+        run(FailingWriter())
+    assert len(run(ListWriter(), reader_cls=ListReader)) == 50
+
+
+@pytest.mark.parametrize("transform_workers", [1, 2])
+def test_checkpoint_waits_for_async_writers(app, tmp_path, transform_workers):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(50)
+    ]
+    manifest_path = tmp_path / "manifests" / "ddc.json"
+    checkpoint_path = tmp_path / "checkpoints" / "ddc.json"
+
+    class AsyncJournalWriter(ListWriter):
+        is_async = True
+
+        def write_many(self, stream_entries, *args, **kwargs):
+            ids = [stream_entry.entry["id"] for stream_entry in stream_entries]
+            if "040" in ids:
+                raise RuntimeError("worker died")
+            # the sub-task writing the second batch never runs
+            if "010" not in ids:
+                journal_written(str(manifest_path), stream_entries)
+            return super().write_many(stream_entries, *args, **kwargs)
+
+    def run(writer):
+        datastream = ParallelDataStream(
+            readers=[VersionedListReader(ddc)],
+            transformers=[DdcYamlTransformer()],
+            writers=[writer],
+            batch_size=10,
+            write_many=True,
+            transform_workers=transform_workers,
+            manifest=Manifest(manifest_path),
+            checkpoint=Checkpoint(checkpoint_path, interval=10),
+        )
+        list(datastream.process())
+        return [entry["id"] for entry in writer.entries]
+
+    with pytest.raises(RuntimeError):
+        run(AsyncJournalWriter())
+    # the checkpoint stops before the batch that was not committed
+    assert json.loads(checkpoint_path.read_text())["position"] == 10
+
+    # the batches committed after it are skipped as unchanged
+    written = run(ListWriter())
+    expected = [f"{idx:03d}" for idx in list(range(10, 20)) + list(range(40, 50))]
+    assert written == expected
+    assert not checkpoint_path.exists()
+
+
+def test_profile_sampled_datastream(app, tmp_path):
+    ddc = [
+        {"id": f"{idx:03d}", "en": f"Class {idx}", "de": f"Klasse {idx}"}
+        for idx in range(100)
+    ]
+
+    def run(**kwargs):
+        datastream = SampledDataStream(
+            readers=[ListReader(ddc)],
+            transformers=[DdcYamlTransformer()],
+            writers=[],
+            transform_workers=1,
+            **kwargs,
+        )
+        return [result.entry["id"] for result in datastream.process()]
+
+    assert run(limit=3) == ["000", "001", "002"]
+    assert run(fraction=0.25)[:3] == ["000", "004", "008"]
+    assert len(run(fraction=0.25, limit=10)) == 10
+
+    profiler = SamplingProfiler(interval=0.001)
+    tracemalloc.start()
+    with profiler:
+        while profiler.samples < 5:
+            run()
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    paths = write_profile(tmp_path, profiler, snapshot, peak, {"entries": 100})
+    files = {os.path.basename(path): open(path).read() for path in paths}
+    assert set(files) == {"cpu.folded", "cpu.txt", "memory.txt", "summary.json"}
+    stack, count = files["cpu.folded"].splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "MainThread" in files["cpu.folded"]
+    assert "test_profile_sampled_datastream" in files["cpu.folded"]
+    assert "Functions on top of the stack" in files["cpu.txt"]
+    assert "Peak traced memory" in files["memory.txt"]
+
+
+def test_harvest_windows():
+    since = arrow.get("2025-01-01T00:00:00Z")
+    assert harvest_windows(since, since.shift(minutes=10), window=3600) == [
+        (since, since.shift(minutes=10))
+    ]
+
+    windows = harvest_windows(since, since.shift(days=3), window=6 * 3600)
+    assert len(windows) == 12
+    assert windows[0][0] == since
+    assert windows[-1][1] == since.shift(days=3)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+
+    windows = harvest_windows(since, since.shift(days=3), window=3600, max_windows=8)
+    assert len(windows) == 8
+    assert windows[1][0] == since.shift(hours=9)
+
+
+def test_harvest_state_advances_without_gaps(tmp_path):
+    since = arrow.get("2025-01-01T00:00:00Z")
+    windows = harvest_windows(since, since.shift(hours=4), window=3600)
+    state = HarvestState(str(tmp_path / "gnd.json"))
+    assert state.high_water_mark is None
+    state.start(since)
+
+    # windows finishing out of order
+    state.mark_harvested(*windows[1])
+    state.mark_harvested(*windows[3])
+    assert state.high_water_mark == since
+    state.mark_harvested(*windows[0])
+    assert state.high_water_mark == since.shift(hours=2)
+    # window 2 failed, the next run starts from its start
+    state.start(since.shift(hours=-1))
+    assert state.high_water_mark == since.shift(hours=2)
+    state.mark_harvested(*windows[2])
+    assert state.high_water_mark == since.shift(hours=4)
+
+
+@pytest.mark.parametrize(
+    "error, harvested",
+    [
+        (NoRecordsMatchError("No records found in OAI-PMH request."), True),
+        (ReaderError("Failed to fetch OAI-PMH page: 503"), False),
+    ],
+)
+def test_harvest_gnd_subjects_window(app, tmp_path, monkeypatch, error, harvested):
+    app.config["VOCABULARIES_EXTRA_CACHE_DIR"] = str(tmp_path)
+
+    def process_datastream(config):
+        raise error
+
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.tasks.process_datastream_parallel",
+        process_datastream,
+    )
+    start = arrow.get("2025-01-01T00:00:00Z")
+    end = start.shift(hours=1)
+    state = gnd_harvest_state()
+    state.start(start)
+
+    if harvested:
+        harvest_gnd_subjects_window(start.isoformat(), end.isoformat())
+        assert state.high_water_mark == end
+    else:
+        # the window is harvested again by the next run
+        with pytest.raises(ReaderError):
+            harvest_gnd_subjects_window(start.isoformat(), end.isoformat())
+        assert state.high_water_mark == start
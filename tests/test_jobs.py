@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Custom jobs tests."""
+
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from invenio_vocabularies.datastreams.factories import (
+    DataStreamFactory,
+    WriterFactory,
+)
+from invenio_vocabularies.datastreams.writers import AsyncWriter
+from marshmallow import ValidationError
+
+from invenio_vocabularies_extra import InvenioExtraVocabularies, config
+from invenio_vocabularies_extra.contrib.subjects.ddc import datastreams as ddc
+from invenio_vocabularies_extra.contrib.subjects.gnd import datastreams as gnd
+from invenio_vocabularies_extra.contrib.subjects.mesh import datastreams as mesh
+from invenio_vocabularies_extra.datastreams.snapshot import snapshot_path
+from invenio_vocabularies_extra.jobs import (
+    FULL_DATASTREAMS,
+    ImportBinaryGndSubjectsJob,
+    ImportShardedGndSubjectsJob,
+    ImportSpooledMeshSubjectsJob,
+    LoadSnapshotJob,
+    PrefixIndexArgsSchema,
+    ProfileDataStreamArgsSchema,
+    ProfileDataStreamJob,
+    RebuildPrefixIndexJob,
+    SnapshotDataStreamJob,
+    VocabularyArgsSchema,
+)
+from invenio_vocabularies_extra.tasks import profile_config, snapshot_config
+
+
+@pytest.fixture()
+def jobs_app(app):
+    """Application with the readers, transformers and writers of the imports."""
+    InvenioExtraVocabularies(app)
+    app.config.update(
+        VOCABULARIES_DATASTREAM_READERS=config.VOCABULARIES_DATASTREAM_READERS,
+        VOCABULARIES_DATASTREAM_TRANSFORMERS={
+            **ddc.VOCABULARIES_DATASTREAM_TRANSFORMERS,
+            **gnd.VOCABULARIES_DATASTREAM_TRANSFORMERS,
+            **mesh.VOCABULARIES_DATASTREAM_TRANSFORMERS,
+        },
+        VOCABULARIES_DATASTREAM_WRITERS={
+            "async": AsyncWriter,
+            **ddc.VOCABULARIES_DATASTREAM_WRITERS,
+            **gnd.VOCABULARIES_DATASTREAM_WRITERS,
+            **mesh.VOCABULARIES_DATASTREAM_WRITERS,
+            **config.VOCABULARIES_DATASTREAM_WRITERS,
+        },
+    )
+    return app
+
+
+def task_arguments(job, **kwargs):
+    """Task arguments of a job, checked against the signature of its task."""
+    arguments = job.build_task_arguments(SimpleNamespace(), **kwargs)
+    inspect.signature(job.task).bind(**arguments)
+    return arguments
+
+
+def create_datastream(config):
+    """Datastream of a config, created like ``process_datastream`` does."""
+    for w_conf in config["writers"]:
+        if w_conf["type"] == "async":
+            # the writer of the sub-tasks is only created by them
+            assert w_conf["args"]["writer"]["type"] in WriterFactory.options()
+    return DataStreamFactory.create(
+        readers_config=config["readers"],
+        transformers_config=config.get("transformers"),
+        writers_config=config["writers"],
+        batch_size=config.get("batch_size", 1000),
+        run_subtasks=config.get("run_subtasks", True),
+        write_many=config.get("write_many", False),
+    )
+
+
+def test_import_sharded_gnd_subjects_job(jobs_app, monkeypatch, tmp_path):
+    jobs_app.config["VOCABULARIES_EXTRA_SUBJECTS_GND_SHARDS"] = 3
+    path = str(tmp_path / "authorities-gnd-sachbegriff_dnbmarc.mrc.xml")
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.tasks.cache_indexed_collection",
+        lambda origin: path,
+    )
+    configs = []
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.tasks.process_datastream",
+        SimpleNamespace(delay=lambda config: configs.append(config)),
+    )
+
+    arguments = task_arguments(ImportShardedGndSubjectsJob)
+    assert arguments == {"shards": 3}
+    ImportShardedGndSubjectsJob.task(**arguments)
+
+    assert len(configs) == 3
+    for shard, shard_config in enumerate(configs):
+        assert shard_config["readers"][0]["args"]["shard"] == shard
+        # the shards run concurrently and cannot share them
+        assert "manifest" not in shard_config
+        assert "checkpoint" not in shard_config
+        assert create_datastream(shard_config)
+
+
+def test_import_binary_gnd_subjects_job(jobs_app):
+    arguments = task_arguments(ImportBinaryGndSubjectsJob)
+    job_config = arguments["config"]
+
+    assert [r_conf["type"] for r_conf in job_config["readers"]] == [
+        "http-cached",
+        "gzip-threaded",
+        "marc21-binary",
+    ]
+    # the same subjects as the MARC21-xml import, but not the same source
+    assert job_config["manifest"] == gnd.GND_FULL_DATASTREAM_CONFIG["manifest"]
+    assert job_config["checkpoint"] != gnd.GND_FULL_DATASTREAM_CONFIG["checkpoint"]
+    assert create_datastream(job_config)
+
+
+@pytest.mark.parametrize("vocabulary", sorted(FULL_DATASTREAMS))
+def test_profile_datastream_job(jobs_app, vocabulary):
+    job_arguments = ProfileDataStreamArgsSchema().load(
+        {"vocabulary": vocabulary, "fraction": 0.01}
+    )
+    arguments = task_arguments(ProfileDataStreamJob, **job_arguments)
+
+    assert arguments["name"] == vocabulary
+    assert arguments["fraction"] == 0.01
+    assert arguments["limit"] is None
+    job_config = profile_config(arguments["config"])
+    assert job_config["writers"] == []
+    assert create_datastream(job_config)
+
+
+def test_profile_datastream_job_arguments(jobs_app):
+    assert ProfileDataStreamArgsSchema().load({})["vocabulary"] == "gnd"
+    with pytest.raises(ValidationError):
+        ProfileDataStreamArgsSchema().load({"vocabulary": "lcsh"})
+    with pytest.raises(ValidationError):
+        ProfileDataStreamArgsSchema().load({"fraction": 0})
+    with pytest.raises(ValidationError):
+        ProfileDataStreamArgsSchema().load({"limit": 0})
+
+
+@pytest.mark.parametrize("vocabulary", sorted(FULL_DATASTREAMS))
+def test_snapshot_datastream_job(jobs_app, tmp_path, vocabulary):
+    jobs_app.config["VOCABULARIES_EXTRA_CACHE_DIR"] = str(tmp_path)
+    job_arguments = VocabularyArgsSchema().load({"vocabulary": vocabulary})
+    arguments = task_arguments(SnapshotDataStreamJob, **job_arguments)
+
+    assert arguments["name"] == vocabulary
+    job_config = snapshot_config(
+        arguments["config"], f"{snapshot_path(vocabulary)}.tmp"
+    )
+    assert [w_conf["type"] for w_conf in job_config["writers"]] == ["snapshot"]
+    assert create_datastream(job_config)
+
+
+@pytest.mark.parametrize("vocabulary", sorted(FULL_DATASTREAMS))
+def test_load_snapshot_job(jobs_app, tmp_path, vocabulary):
+    jobs_app.config["VOCABULARIES_EXTRA_CACHE_DIR"] = str(tmp_path)
+    job_arguments = VocabularyArgsSchema().load({"vocabulary": vocabulary})
+    arguments = task_arguments(LoadSnapshotJob, **job_arguments)
+
+    job_config = arguments["config"]
+    full_config = FULL_DATASTREAMS[vocabulary]
+    assert job_config["readers"] == [
+        {"type": "snapshot", "args": {"origin": snapshot_path(vocabulary)}}
+    ]
+    # the entries of the snapshot are already transformed
+    assert "transformers" not in job_config
+    assert job_config["writers"] == full_config["writers"]
+    assert job_config["writers"] is not full_config["writers"]
+    assert job_config["prefix_index"] == full_config.get("prefix_index")
+    assert create_datastream(job_config)
+
+
+def test_vocabulary_job_arguments(jobs_app):
+    assert VocabularyArgsSchema().load({})["vocabulary"] == "gnd"
+    with pytest.raises(ValidationError):
+        VocabularyArgsSchema().load({"vocabulary": "lcsh"})
+
+
+def test_import_spooled_mesh_subjects_job(jobs_app):
+    arguments = task_arguments(ImportSpooledMeshSubjectsJob)
+    job_config = arguments["config"]
+
+    # the archive is read while it is downloaded, not from the source cache
+    assert job_config["readers"][0]["type"] == "http-spooled"
+    assert job_config["readers"][1:] == mesh.MESH_DATASTREAM_CONFIG["readers"][1:]
+    assert job_config["manifest"] == mesh.MESH_DATASTREAM_CONFIG["manifest"]
+    assert create_datastream(job_config)
+
+
+def test_rebuild_prefix_index_job(jobs_app):
+    job_arguments = PrefixIndexArgsSchema().load({"scheme": "MESH"})
+    assert task_arguments(RebuildPrefixIndexJob, **job_arguments) == {"scheme": "MESH"}
+    assert PrefixIndexArgsSchema().load({})["scheme"] == "GND"
+    with pytest.raises(ValidationError):
+        PrefixIndexArgsSchema().load({"scheme": "LCSH"})
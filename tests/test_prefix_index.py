@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Prefix index tests."""
+
+import os
+
+from invenio_vocabularies_extra.prefix_index import (
+    PrefixIndex,
+    PrefixIndexBuilder,
+    SubjectSuggester,
+    normalize,
+    update_prefix_index,
+)
+
+SUBJECTS = [
+    {
+        "id": "gnd:1",
+        "scheme": "GND",
+        "subject": "Ärztin",
+        "title": {"de": "Ärztin", "en": "Female physician"},
+        "synonyms": ["Ärztinnen", "Medizinerin"],
+    },
+    {
+        "id": "gnd:2",
+        "scheme": "GND",
+        "subject": "Arzt",
+        "title": {"de": "Arzt"},
+        "synonyms": ["Mediziner", "Doktor"],
+    },
+    {
+        "id": "gnd:3",
+        "scheme": "GND",
+        "subject": "Arbeitsmedizin",
+        "title": {"de": "Arbeitsmedizin"},
+        "synonyms": [],
+    },
+]
+
+
+def labels(suggestions):
+    """Labels and ids of suggestions."""
+    return [(suggestion.label, suggestion.id) for suggestion in suggestions]
+
+
+def test_normalize():
+    assert normalize("  Ärztin\x1f  und  STRASSE ") == "arztin und strasse"
+    assert normalize("Straße") == "strasse"
+
+
+def test_prefix_index(tmp_path):
+    builder = PrefixIndexBuilder()
+    for subject in SUBJECTS:
+        builder.add(subject)
+    path = str(tmp_path / "gnd.idx")
+    # prefixes matching more than two labels are ranked in advance
+    assert builder.write(path, top_k=2, max_scan=2) == 11
+
+    with PrefixIndex(path) as index:
+        # ranked in advance, by rank and length, one label per subject
+        assert labels(index.lookup("A", "de", k=5)) == [
+            ("Arzt", "gnd:2"),
+            ("Ärztin", "gnd:1"),
+        ]
+        assert labels(index.lookup("medi", "und", k=1)) == [("Mediziner", "gnd:2")]
+        assert labels(index.lookup("arz", "de")) == [
+            ("Arzt", "gnd:2"),
+            ("Ärztin", "gnd:1"),
+        ]
+        assert labels(index.lookup("medizin", "und")) == [
+            ("Mediziner", "gnd:2"),
+            ("Medizinerin", "gnd:1"),
+        ]
+        assert labels(index.lookup("fem", "en")) == [("Female physician", "gnd:1")]
+        assert index.lookup("fem", "de") == []
+        assert index.lookup("x", "de") == []
+        assert index.lookup(" ", "de") == []
+
+    # the labels are read back from the file
+    loaded = PrefixIndexBuilder.load(path)
+    assert {id_: sorted(labels) for id_, labels in loaded.subjects.items()} == {
+        id_: sorted(labels) for id_, labels in builder.subjects.items()
+    }
+
+
+def test_update_prefix_index(app, tmp_path):
+    app.config.update(
+        VOCABULARIES_EXTRA_PREFIX_INDEX_DIR=str(tmp_path),
+        VOCABULARIES_EXTRA_PREFIX_INDEX_TOP_K=20,
+        VOCABULARIES_EXTRA_PREFIX_INDEX_MAX_SCAN=200,
+    )
+    updates = PrefixIndexBuilder()
+    for subject in SUBJECTS:
+        updates.add(subject)
+    assert update_prefix_index("GND", updates) == 11
+
+    suggester = SubjectSuggester(
+        lambda scheme: os.path.join(tmp_path, f"{scheme.lower()}.idx"),
+        reload_interval=0,
+    )
+    assert suggester.suggest("ar", ["GND", "MESH"], "de", k=2) == [
+        {"scheme": "GND", "id": "gnd:2", "label": "Arzt"},
+        {"scheme": "GND", "id": "gnd:1", "label": "Ärztin"},
+    ]
+    # a title and a synonym of the same subject are suggested once
+    assert suggester.suggest("ärztin", ["GND"], "de") == [
+        {"scheme": "GND", "id": "gnd:1", "label": "Ärztin"},
+    ]
+
+    updates = PrefixIndexBuilder()
+    updates.remove("gnd:2")
+    updates.add({**SUBJECTS[2], "title": {"de": "Arbeitsschutz"}})
+    assert update_prefix_index("GND", updates) == 7
+
+    # the replaced file is reopened
+    assert suggester.suggest("ar", ["GND"], "de") == [
+        {"scheme": "GND", "id": "gnd:1", "label": "Ärztin"},
+        {"scheme": "GND", "id": "gnd:3", "label": "Arbeitsschutz"},
+    ]
@@ -0,0 +1,787 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Custom datastream readers tests."""
+
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+import yaml
+from invenio_vocabularies.datastreams import DataStream, StreamEntry
+from invenio_vocabularies.datastreams.errors import ReaderError
+from invenio_vocabularies.datastreams.factories import ReaderFactory
+from invenio_vocabularies.datastreams.readers import ZipReader
+from lxml import etree
+
+from benchmarks.generators import dump_iso2709
+from invenio_vocabularies_extra import InvenioExtraVocabularies, config
+from invenio_vocabularies_extra.contrib.subjects.ddc.datastreams import (
+    DDC_PRESET_DATASTREAM_CONFIG,
+)
+from invenio_vocabularies_extra.contrib.subjects.mesh.datastreams import (
+    MESH_SPOOLED_DATASTREAM_CONFIG,
+)
+from invenio_vocabularies_extra.datastreams.cache import SourceCache
+from invenio_vocabularies_extra.datastreams.iso2709 import subfields_of_field
+from invenio_vocabularies_extra.datastreams.readers import (
+    MARC21_NAMESPACE,
+    CachedHTTPReader,
+    DdcReader,
+    Marc21BinaryReader,
+    Marc21CollectionReader,
+    Marc21ShardReader,
+    MeshJoinReader,
+    MeshReader,
+    NoRecordsMatchError,
+    PrefetchingOAIPMHReader,
+    SnapshotReader,
+    SpooledHTTPReader,
+    ThreadedGzipReader,
+    ThreadedZipReader,
+)
+from invenio_vocabularies_extra.datastreams.shards import (
+    build_record_index,
+    write_record_index,
+)
+from invenio_vocabularies_extra.datastreams.snapshot import snapshot_index_path
+from invenio_vocabularies_extra.datastreams.spool import SpooledDownload
+from invenio_vocabularies_extra.datastreams.writers import SnapshotWriter
+
+
+class ChunkedStream(io.RawIOBase):
+    """Non-seekable stream handing out small chunks and counting read bytes."""
+
+    def __init__(self, data, chunk_size=256):
+        """Constructor."""
+        self._data = data
+        self._chunk_size = chunk_size
+        self.position = 0
+
+    def readable(self):
+        """Stream is readable."""
+        return True
+
+    def readinto(self, buffer):
+        """Reads at most one chunk into the buffer."""
+        size = min(len(buffer), self._chunk_size)
+        chunk = self._data[self.position : self.position + size]
+        buffer[: len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+
+def marc21_collection(record, count):
+    """Builds a MARC21-xml collection repeating the given record."""
+    records = "\n".join([record] * count)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<collection xmlns="http://www.loc.gov/MARC21/slim">\n'
+        f"{records}\n"
+        "</collection>\n"
+    ).encode("utf-8")
+
+
+def test_marc21_collection_reader(gnd_marc21_record):
+    collection = marc21_collection(gnd_marc21_record, 3)
+
+    entries = list(Marc21CollectionReader().read(io.BytesIO(collection)))
+
+    assert len(entries) == 3
+    for entry in entries:
+        record = etree.fromstring(entry["record"])
+        assert record.tag == "{http://www.loc.gov/MARC21/slim}record"
+        assert len(record.findall("{http://www.loc.gov/MARC21/slim}datafield")) == 6
+
+
+def test_marc21_collection_reader_streams(gnd_marc21_record):
+    collection = marc21_collection(gnd_marc21_record, 200)
+    stream = ChunkedStream(collection)
+
+    entries = Marc21CollectionReader().read(stream)
+    next(entries)
+
+    # the first record is available long before the whole collection is read
+    assert stream.position < len(collection) / 10
+    assert len(list(entries)) == 199
+
+
+def test_marc21_shard_reader(tmp_path, gnd_marc21_record):
+    records = [gnd_marc21_record.replace("4558957-4", f"{idx}-0") for idx in range(10)]
+    collection = marc21_collection("\n".join(records), 1)
+    path = tmp_path / "collection.xml"
+    with open(path, "wb") as dst:
+        # small chunks to find tags across chunk boundaries
+        index = build_record_index(io.BytesIO(collection), dst, chunk_size=50)
+    write_record_index(path, index)
+
+    assert len(index["records"]) == 10
+    assert collection[index["records"][0] :].startswith(b"<record")
+    assert collection[index["end"] :].strip() == b"</collection>"
+
+    xmlns = "{http://www.loc.gov/MARC21/slim}"
+    ids = []
+    for shard in range(3):
+        reader = Marc21ShardReader(path, shard=shard, shards=3, serialize=False)
+        ids.extend(
+            entry["record"].findtext(f"{xmlns}datafield/{xmlns}subfield")
+            for entry in reader.read()
+        )
+    assert ids == [f"{idx}-0" for idx in range(10)]
+
+
+MESH_DESCRIPTOR_RECORD = """<DescriptorRecord DescriptorClass="1">
+  <DescriptorUI>D{idx:06d}</DescriptorUI>
+  <DescriptorName><String>Deskriptor {idx}[Descriptor {idx}]</String></DescriptorName>
+</DescriptorRecord>"""
+
+
+def mesh_descriptor_record_set(count):
+    """Builds a MeSH descriptor record set with the given number of records."""
+    records = "\n".join(MESH_DESCRIPTOR_RECORD.format(idx=idx) for idx in range(count))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        "<DescriptorRecordSet>\n"
+        f"{records}\n"
+        "</DescriptorRecordSet>\n"
+    ).encode("utf-8")
+
+
+def test_mesh_reader_streams():
+    descriptors = mesh_descriptor_record_set(500)
+    stream = ChunkedStream(descriptors)
+
+    entries = MeshReader().read(stream)
+    first = etree.fromstring(next(entries)["record"])
+
+    assert first.findtext("DescriptorUI") == "D000000"
+    assert stream.position < len(descriptors) / 10
+    assert len(list(entries)) == 499
+
+
+def test_mesh_reader_from_zip_member():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(3))
+    archive.seek(0)
+
+    reader = MeshReader()
+    entries = [
+        entry for member in ZipReader().read(archive) for entry in reader.read(member)
+    ]
+
+    ids = [etree.fromstring(e["record"]).findtext("DescriptorUI") for e in entries]
+    assert ids == ["D000000", "D000001", "D000002"]
+
+
+def test_marc21_binary_reader(app, gnd_marc21_record):
+    binary = dump_iso2709(etree.fromstring(gnd_marc21_record))
+    # a line break between records and a record with a broken leader
+    data = binary + b"\n" + b"garbage\x1d" + binary * 2
+    compressed = gzip.compress(data)
+
+    stream = ChunkedStream(data)
+    entries = Marc21BinaryReader().read(stream)
+    first = next(entries)["record"]
+    assert stream.position < len(data)
+    assert len(list(entries)) == 2
+
+    assert [tag for tag, _ in first] == ["024", "035", "150", "450", "450", "750"]
+    assert subfields_of_field(first[0][1]) == {
+        "a": ["4558957-4"],
+        "0": ["http://d-nb.info/gnd/4558957-4"],
+        "2": ["gnd"],
+    }
+    assert subfields_of_field(first[3][1]) == {"a": ["Mozart-Jahr"]}
+
+    reader = Marc21BinaryReader()
+    entries = [
+        entry
+        for member in ThreadedGzipReader(buffer=2).read(compressed)
+        for entry in reader.read(member)
+    ]
+    assert [e["record"] for e in entries] == [first] * 3
+
+
+def test_threaded_gzip_reader(gnd_marc21_record):
+    collection = marc21_collection(gnd_marc21_record, 50)
+    # concatenated members, as written by parallel compressors
+    half = len(collection) // 2
+    compressed = gzip.compress(collection[:half]) + gzip.compress(collection[half:])
+
+    streams = ThreadedGzipReader(buffer=2, chunk_size=64).read(compressed)
+    stream = next(streams)
+    assert stream.read() == collection
+    assert list(streams) == []
+
+    reader = Marc21CollectionReader()
+    entries = [
+        entry
+        for member in ThreadedGzipReader(buffer=2, chunk_size=64).read(compressed)
+        for entry in reader.read(member)
+    ]
+    assert len(entries) == 50
+
+
+def test_threaded_gzip_reader_truncated(gnd_marc21_record):
+    collection = marc21_collection(gnd_marc21_record, 50)
+    compressed = gzip.compress(collection)
+
+    # zero bytes padding the last member are ignored, like gzip does
+    streams = ThreadedGzipReader(buffer=2, chunk_size=64).read(compressed + b"\0" * 100)
+    assert next(streams).read() == collection
+
+    for broken in (compressed[: len(compressed) // 2], compressed[:-4]):
+        streams = ThreadedGzipReader(buffer=2, chunk_size=64).read(broken)
+        with pytest.raises(ReaderError):
+            next(streams).read()
+
+
+@pytest.mark.parametrize("field", ["compress_size", "CRC", "file_size"])
+def test_threaded_zip_reader_truncated(field):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(300))
+
+    with zipfile.ZipFile(archive) as zip_file:
+        member = zip_file.infolist()[0]
+        # a member cut short, or not matching the central directory
+        setattr(member, field, getattr(member, field) // 2)
+        streams = ThreadedZipReader(buffer=2, chunk_size=64)._iter(zip_file)
+        with pytest.raises(ReaderError):
+            next(streams).read()
+
+
+def test_threaded_zip_reader():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(300))
+        zip_file.writestr(
+            "stored.xml", mesh_descriptor_record_set(2), zipfile.ZIP_STORED
+        )
+        zip_file.writestr("readme.txt", "not a descriptor")
+    archive.seek(0)
+
+    reader = MeshReader()
+    entries = [
+        entry
+        for member in ThreadedZipReader(regex=r"\.xml$", buffer=2, chunk_size=64).read(
+            archive
+        )
+        for entry in reader.read(member)
+    ]
+
+    ids = [etree.fromstring(e["record"]).findtext("DescriptorUI") for e in entries]
+    assert len(ids) == 302
+    assert ids[:2] == ["D000000", "D000001"]
+    assert ids[-2:] == ["D000000", "D000001"]
+
+
+def test_marc21_collection_reader_elements(gnd_marc21_record):
+    collection = marc21_collection(gnd_marc21_record, 3)
+
+    reader = Marc21CollectionReader(serialize=False)
+    entries = list(reader.read(ChunkedStream(collection)))
+
+    # records stay intact after the reader moved on
+    assert len(entries) == 3
+    for entry in entries:
+        record = entry["record"]
+        assert etree.iselement(record)
+        assert record.getparent() is None
+        assert len(record.findall("{http://www.loc.gov/MARC21/slim}datafield")) == 6
+
+
+def test_mesh_reader_elements():
+    descriptors = mesh_descriptor_record_set(3)
+
+    entries = list(MeshReader(serialize=False).read(io.BytesIO(descriptors)))
+
+    ids = [e["record"].findtext("DescriptorUI") for e in entries]
+    assert ids == ["D000000", "D000001", "D000002"]
+
+
+class FakeResponse:
+    """Response of the patched ``requests.get``."""
+
+    def __init__(self, status_code, content=b"", headers=None):
+        """Constructor."""
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        """Yields the content."""
+        yield self.content
+
+    def __enter__(self):
+        """Context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Context manager."""
+
+    def close(self):
+        """Closes the response."""
+
+
+def test_cached_http_reader(app, tmp_path, monkeypatch):
+    app.config["VOCABULARIES_EXTRA_CACHE_DIR"] = str(tmp_path)
+    app.config["VOCABULARIES_EXTRA_SOURCE_CACHE_SKIP_UNCHANGED"] = True
+    requests_sent = []
+
+    def get(url, headers=None, **kwargs):
+        requests_sent.append(headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, b"content", {"ETag": '"v1"'})
+
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.cache.requests.get", get
+    )
+    reader = CachedHTTPReader("https://example.org/source.gz")
+
+    assert [fp.read() for fp in reader.read()] == [b"content"]
+    assert requests_sent == [{}]
+
+    # unchanged and processed completely before
+    assert list(reader.read()) == []
+    assert requests_sent[-1] == {"If-None-Match": '"v1"'}
+
+    reader = CachedHTTPReader("https://example.org/source.gz", skip_unchanged=False)
+    assert [fp.read() for fp in reader.read()] == [b"content"]
+
+
+def test_source_cache_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.cache.requests.get",
+        lambda url, **kwargs: FakeResponse(200, b"x" * 10),
+    )
+    cache = SourceCache(str(tmp_path), max_size=25)
+    for url in ("https://example.org/1", "https://example.org/2"):
+        cache.fetch(url)
+    cache.fetch("https://example.org/3")
+
+    assert cache.metadata("https://example.org/1") is None
+    assert cache.metadata("https://example.org/2") is not None
+    assert cache.metadata("https://example.org/3") is not None
+
+
+OAI_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+  <ListRecords>
+    {records}
+    <resumptionToken>{token}</resumptionToken>
+  </ListRecords>
+</OAI-PMH>"""
+
+
+OAI_RECORD = """<record>
+  <header{status}><identifier>oai:dnb.de/{id}</identifier></header>
+  <metadata>{metadata}</metadata>
+</record>"""
+
+
+class FakeSession:
+    """Session of the patched ``requests.Session`` serving OAI-PMH pages."""
+
+    def __init__(self, pages):
+        """Constructor."""
+        self.pages = pages
+        self.headers = {}
+        self.requests = []
+
+    def mount(self, prefix, adapter):
+        """Ignores the adapter."""
+
+    def get(self, url, params=None, **kwargs):
+        """Serves the page of the resumption token."""
+        self.requests.append(params)
+        page = self.pages[params.get("resumptionToken", "")]
+        return FakeResponse(200, page.encode("utf-8"))
+
+    def __enter__(self):
+        """Context manager."""
+        return self
+
+    def __exit__(self, *exc):
+        """Context manager."""
+
+
+def test_prefetching_oai_pmh_reader(app, gnd_marc21_record, monkeypatch):
+    record = etree.tostring(etree.fromstring(gnd_marc21_record)).decode("utf-8")
+
+    def oai_record(idx, deleted=False):
+        return OAI_RECORD.format(
+            id=idx,
+            status=' status="deleted"' if deleted else "",
+            metadata="" if deleted else record,
+        )
+
+    session = FakeSession(
+        {
+            "": OAI_PAGE.format(
+                records=oai_record(1) + oai_record(2, deleted=True), token="page2"
+            ),
+            "page2": OAI_PAGE.format(records=oai_record(3), token=""),
+        }
+    )
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.readers.requests.Session",
+        lambda: session,
+    )
+    reader = PrefetchingOAIPMHReader(
+        base_url="https://services.dnb.de/oai/repository",
+        metadata_prefix="MARC21-xml",
+        set="authorities:sachbegriff",
+        from_date="2025-01-01T00:00:00Z",
+        read_ahead=1,
+        serialize=False,
+    )
+
+    entries = list(reader.read())
+
+    assert len(entries) == 2
+    assert all(entry["record"].tag == f"{MARC21_NAMESPACE}record" for entry in entries)
+    assert session.requests == [
+        {
+            "verb": "ListRecords",
+            "metadataPrefix": "MARC21-xml",
+            "set": "authorities:sachbegriff",
+            "from": "2025-01-01T00:00:00Z",
+        },
+        {"verb": "ListRecords", "resumptionToken": "page2"},
+    ]
+    assert session.headers["Accept-Encoding"] == "gzip"
+
+    reader = PrefetchingOAIPMHReader(
+        base_url="https://services.dnb.de/oai/repository",
+        read_ahead=0,
+        serialize=False,
+        deleted=True,
+    )
+
+    entries = list(reader.read())
+
+    assert len(entries) == 3
+    assert entries[1] == {"deleted": True, "identifier": "oai:dnb.de/2"}
+
+
+def test_prefetching_oai_pmh_reader_no_records(app, monkeypatch):
+    page = (
+        '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+        '<error code="noRecordsMatch"/></OAI-PMH>'
+    )
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.readers.requests.Session",
+        lambda: FakeSession({"": page}),
+    )
+    reader = PrefetchingOAIPMHReader(base_url="https://services.dnb.de/oai/repository")
+
+    with pytest.raises(NoRecordsMatchError):
+        list(reader.read())
+
+    page = (
+        '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+        '<error code="badResumptionToken">expired</error></OAI-PMH>'
+    )
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.readers.requests.Session",
+        lambda: FakeSession({"": page}),
+    )
+
+    with pytest.raises(ReaderError) as excinfo:
+        list(reader.read())
+    assert not isinstance(excinfo.value, NoRecordsMatchError)
+
+
+def test_snapshot_reader(app, tmp_path):
+    path = str(tmp_path / "gnd.jsonl.gz")
+    entries = [
+        {"id": f"gnd:{idx}", "scheme": "GND", "subject": f"Thema\u2028{idx}"}
+        for idx in range(25)
+    ]
+    # an existing snapshot is replaced
+    SnapshotWriter(path).write_many([StreamEntry({"id": "old"})])
+    writer = SnapshotWriter(path)
+    for idx in range(0, 25, 10):
+        batch = [StreamEntry(entry) for entry in entries[idx : idx + 10]]
+        assert writer.write_many(batch) == batch
+
+    assert list(SnapshotReader(path, buffer=1).read()) == entries
+    shards = [list(SnapshotReader(path, shard=i, shards=2).read()) for i in range(2)]
+    # whole chunks per shard
+    assert shards == [entries[:20], entries[20:]]
+
+    # a valid gzip file of JSON lines
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        assert len(fp.read().split("\n")) == 26
+
+    with open(path, "rb") as fp:
+        assert list(SnapshotReader().read(fp)) == entries
+
+    os.remove(snapshot_index_path(path))
+    assert list(SnapshotReader(path).read()) == entries
+    with pytest.raises(ValueError):
+        list(SnapshotReader(path, shard=1, shards=2).read())
+    with pytest.raises(ReaderError):
+        list(SnapshotReader(str(tmp_path / "missing.jsonl.gz")).read())
+
+
+def test_mesh_join_reader(app, tmp_path):
+    german = tmp_path / "de.zip"
+    with zipfile.ZipFile(german, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(50))
+    # in reverse order and without the first descriptor
+    records = "\n".join(
+        MESH_DESCRIPTOR_RECORD.format(idx=idx).replace("Deskriptor", "Descripteur")
+        for idx in reversed(range(1, 50))
+    )
+    french = tmp_path / "fr.xml.gz"
+    french.write_bytes(
+        gzip.compress(
+            f"<DescriptorRecordSet>\n{records}\n</DescriptorRecordSet>\n".encode()
+        )
+    )
+
+    reader = MeshJoinReader(
+        origin={"de": str(german), "fr": str(french)}, max_pending=4
+    )
+    entries = list(reader.read())
+
+    joined = {entry["id"]: entry["descriptors"] for entry in entries}
+    assert len(entries) == len(joined) == 50
+    assert joined["D000049"] == {
+        "de": {"name": "Deskriptor 49[Descriptor 49]", "synonyms": []},
+        "fr": {"name": "Descripteur 49[Descriptor 49]", "synonyms": []},
+    }
+    # the descriptor missing in a file comes last
+    assert entries[-1] == {
+        "id": "D000000",
+        "descriptors": {"de": {"name": "Deskriptor 0[Descriptor 0]", "synonyms": []}},
+    }
+    assert str(german) in reader.source_version
+
+
+class GatedResponse(FakeResponse):
+    """Response sending its last chunks only once the gate is opened."""
+
+    def __init__(self, content, gate, held_back, **kwargs):
+        """Constructor."""
+        super().__init__(200, content, **kwargs)
+        self.gate = gate
+        self.held_back = held_back
+
+    def iter_content(self, chunk_size):
+        """Yields the content in chunks."""
+        for start in range(0, len(self.content), chunk_size):
+            if start >= len(self.content) - self.held_back:
+                self.gate.wait(5)
+            yield self.content[start : start + chunk_size]
+
+
+def test_spooled_http_reader_zip(app, monkeypatch):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(2000))
+    content = archive.getvalue()
+    gate = threading.Event()
+    requests_sent = []
+
+    def get(url, headers=None, **kwargs):
+        requests_sent.append(headers)
+        if headers and "Range" in headers:
+            return FakeResponse(206, content[-4096:])
+        return GatedResponse(
+            content,
+            gate,
+            held_back=len(content) // 2,
+            headers={"Content-Length": str(len(content)), "Accept-Ranges": "bytes"},
+        )
+
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.spool.requests.get", get
+    )
+    reader = SpooledHTTPReader(
+        "https://example.org/desc.zip", max_memory=1024, tail_size=4096, chunk_size=512
+    )
+    zip_reader = ThreadedZipReader(chunk_size=512)
+    mesh_reader = MeshReader(serialize=False)
+    entries = (
+        entry
+        for fp in reader.read()
+        for member in zip_reader.read(fp)
+        for entry in mesh_reader.read(member)
+    )
+
+    # read before the second half of the archive was sent
+    assert next(entries)["record"].findtext("DescriptorUI") == "D000000"
+    assert not gate.is_set()
+    gate.set()
+    assert len(list(entries)) == 1999
+    assert requests_sent == [None, {"Range": "bytes=-4096"}]
+
+
+def test_spooled_http_reader_without_ranges(app, monkeypatch):
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.spool.requests.get",
+        lambda url, **kwargs: FakeResponse(200, b"content"),
+    )
+    reader = SpooledHTTPReader("https://example.org/source")
+
+    assert [fp.read() for fp in reader.read()] == [b"content"]
+
+
+def test_spooled_mesh_datastream(app, monkeypatch):
+    InvenioExtraVocabularies(app)
+    app.config.update(
+        VOCABULARIES_DATASTREAM_READERS=config.VOCABULARIES_DATASTREAM_READERS,
+        VOCABULARIES_EXTRA_SUBJECTS_MESH_FILE_URL="https://example.org/desc.zip",
+        VOCABULARIES_EXTRA_DECOMPRESS_BUFFER=2,
+    )
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("desc.xml", mesh_descriptor_record_set(50))
+    content = archive.getvalue()
+    requests_sent = []
+
+    def get(url, headers=None, **kwargs):
+        requests_sent.append((url, headers))
+        return FakeResponse(
+            200,
+            content,
+            headers={"Content-Length": str(len(content)), "Accept-Ranges": "bytes"},
+        )
+
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.spool.requests.get", get
+    )
+    readers = [
+        ReaderFactory.create(reader)
+        for reader in MESH_SPOOLED_DATASTREAM_CONFIG["readers"]
+    ]
+    stream = DataStream(readers=readers, transformers=[], writers=[])
+
+    entries = [entry.entry for entry in stream.read()]
+
+    assert [entry["record"].findtext("DescriptorUI") for entry in entries] == [
+        f"D{idx:06d}" for idx in range(50)
+    ]
+    # the archive is smaller than the tail fetched first
+    assert requests_sent == [("https://example.org/desc.zip", None)]
+
+
+class StalledResponse(FakeResponse):
+    """Response whose download never progresses."""
+
+    def __init__(self, **kwargs):
+        """Constructor."""
+        super().__init__(200, **kwargs)
+        self.released = threading.Event()
+
+    def iter_content(self, chunk_size):
+        """Blocks until released, ignoring that the response is closed."""
+        self.released.wait(10)
+        yield b"late"
+
+
+def test_spooled_download_close_stalled(monkeypatch):
+    response = StalledResponse()
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.spool.requests.get",
+        lambda url, **kwargs: response,
+    )
+    download = SpooledDownload("https://example.org/source", timeout=0.1).start()
+
+    started = time.monotonic()
+    download.close()
+
+    assert time.monotonic() - started < 5
+    assert download.closed
+    # the thread left behind stops without writing to the closed spool
+    response.released.set()
+    download._thread.join(5)
+    assert not download._thread.is_alive()
+    assert download._error is None
+
+
+DDC_NOTATIONS = [
+    {"id": "004", "en": "Computer science", "de": "Informatik"},
+    {"id": "551", "en": "Geology, hydrology, meteorology"},
+    {"id": "610", "en": "Medicine & health", "de": "Medizin, Gesundheit"},
+]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 1000])
+def test_ddc_reader_yaml(tmp_path, batch_size):
+    path = tmp_path / "ddc.yaml"
+    path.write_text(
+        "# DDC\n---\n" + yaml.safe_dump(DDC_NOTATIONS, allow_unicode=True),
+        encoding="utf-8",
+    )
+
+    reader = DdcReader(origin=str(path), batch_size=batch_size)
+
+    assert list(reader.read()) == DDC_NOTATIONS
+
+
+def test_ddc_reader_yaml_flow_sequence():
+    reader = DdcReader(format="yaml")
+    data = b'[{id: "004", en: Computer science}]'
+
+    assert list(reader.read(io.BytesIO(data))) == [
+        {"id": "004", "en": "Computer science"}
+    ]
+
+
+def test_ddc_reader_jsonl_and_csv():
+    jsonl = "".join(json.dumps(notation) + "\n" for notation in DDC_NOTATIONS)
+    csv_data = (
+        "id,en,de\n"
+        "004,Computer science,Informatik\n"
+        '551,"Geology, hydrology, meteorology",\n'
+        '610,Medicine & health,"Medizin, Gesundheit"\n'
+    )
+
+    # the format is guessed from the first bytes
+    reader = DdcReader()
+    assert list(reader.read(io.BytesIO(jsonl.encode()))) == DDC_NOTATIONS
+    assert list(reader.read(io.BytesIO(csv_data.encode("utf-8-sig")))) == (
+        DDC_NOTATIONS
+    )
+
+
+def test_ddc_reader_without_origin():
+    with pytest.raises(ReaderError):
+        list(DdcReader().read())
+
+
+def test_ddc_default_config(app):
+    InvenioExtraVocabularies(app)
+    app.config["VOCABULARIES_DATASTREAM_READERS"] = (
+        config.VOCABULARIES_DATASTREAM_READERS
+    )
+    readers = [
+        ReaderFactory.create(reader)
+        for reader in DDC_PRESET_DATASTREAM_CONFIG["readers"]
+    ]
+
+    # the DDC file of the package is read by default
+    entries = [entry.entry for entry in DataStream(readers, [], []).read()]
+
+    assert len(entries) == 913
+    assert entries[0] == {
+        "id": "000",
+        "en": "Computer science, information, general works",
+        "de": "Informatik, Information und Wissen, allgemeine Werke",
+    }
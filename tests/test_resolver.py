@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Subject resolver tests."""
+
+from types import SimpleNamespace
+
+import pytest
+from invenio_pidstore.errors import PIDDoesNotExistError
+
+from invenio_vocabularies_extra.resolver import LRUCache, SubjectResolver
+
+
+class FakeRedis:
+    """Redis client keeping the values in a dict."""
+
+    def __init__(self):
+        """Constructor."""
+        self.values = {}
+        self.published = []
+        self.subscribers = []
+
+    def get(self, key):
+        """Value of a key."""
+        return self.values.get(key)
+
+    def mget(self, keys):
+        """Values of the keys."""
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        """Sets a value."""
+        self.values[key] = value.encode("utf-8")
+
+    def delete(self, *keys):
+        """Removes the keys."""
+        for key in keys:
+            self.values.pop(key, None)
+
+    def pipeline(self):
+        """Pipeline executing the commands right away."""
+        return SimpleNamespace(set=self.set, execute=lambda: None)
+
+    def publish(self, channel, message):
+        """Delivers a message to the subscribers."""
+        self.published.append((channel, message))
+        for handler in self.subscribers:
+            handler({"channel": channel, "data": message.encode("utf-8")})
+
+    def pubsub(self, **kwargs):
+        """Subscription calling the handlers of published messages."""
+
+        def subscribe(**handlers):
+            self.subscribers.extend(handlers.values())
+
+        return SimpleNamespace(subscribe=subscribe, run_in_thread=lambda **kw: True)
+
+
+class FakeSubjectsService:
+    """Subjects service counting the reads."""
+
+    def __init__(self, subjects):
+        """Constructor."""
+        self.subjects = {subject["id"]: subject for subject in subjects}
+        self.reads = []
+
+    def read(self, identity, id_):
+        """Reads a subject."""
+        self.reads.append(id_)
+        if id_ not in self.subjects:
+            raise PIDDoesNotExistError("subid", id_)
+        return SimpleNamespace(to_dict=lambda: dict(self.subjects[id_]))
+
+    def read_many(self, identity, ids):
+        """Searches the subjects."""
+        self.reads.append(list(ids))
+        return SimpleNamespace(
+            hits=[dict(self.subjects[id_]) for id_ in ids if id_ in self.subjects]
+        )
+
+
+def test_lru_cache(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.resolver.time.monotonic", lambda: now[0]
+    )
+    cache = LRUCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    # "b" is the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+    cache.delete("c")
+    assert len(cache) == 0
+
+
+def test_subject_resolver(app):
+    subjects = [
+        {"id": "gnd:1", "scheme": "GND", "subject": "Eins"},
+        {"id": "gnd:2", "scheme": "GND", "subject": "Zwei"},
+    ]
+    service = FakeSubjectsService(subjects)
+    resolver = SubjectResolver(service_or_name=service)
+
+    assert resolver.resolve("GND", "gnd:1") == subjects[0]
+    assert resolver.resolve("GND", "gnd:1") == subjects[0]
+    assert service.reads == ["gnd:1"]
+
+    assert resolver.resolve_many("GND", ["gnd:2", "gnd:1", "gnd:3"]) == [
+        subjects[1],
+        subjects[0],
+    ]
+    assert service.reads == ["gnd:1", ["gnd:2", "gnd:3"]]
+
+    resolver.invalidate([("GND", "gnd:1")])
+    assert resolver.resolve("GND", "gnd:1") == subjects[0]
+    assert service.reads[-1] == "gnd:1"
+
+    with pytest.raises(PIDDoesNotExistError):
+        resolver.resolve("GND", "gnd:3")
+
+
+def test_subject_resolver_shared_cache(app):
+    subjects = [{"id": "gnd:1", "scheme": "GND", "subject": "Eins"}]
+    service = FakeSubjectsService(subjects)
+    client = FakeRedis()
+    resolver = SubjectResolver(service_or_name=service, redis_client=client)
+    other = SubjectResolver(service_or_name=service, redis_client=client)
+
+    assert resolver.resolve("GND", "gnd:1") == subjects[0]
+    # the other process finds the subject in the shared cache
+    assert other.resolve("GND", "gnd:1") == subjects[0]
+    assert other.resolve_many("GND", ["gnd:1"]) == subjects
+    assert service.reads == ["gnd:1"]
+
+    # invalidations reach the in-process caches of the other processes
+    resolver.invalidate([("GND", "gnd:1")])
+    assert client.values == {}
+    assert other.local.get("GND:gnd:1") is None
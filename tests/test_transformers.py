@@ -8,14 +8,29 @@
 
 """Custom datastream transformer for GND subjects."""
 
+import pickle
+
+import pytest
 from invenio_vocabularies.datastreams import StreamEntry
+from invenio_vocabularies.datastreams.errors import TransformerError
+from lxml import etree
 
+from benchmarks.generators import dump_iso2709
 from invenio_vocabularies_extra.contrib.subjects.ddc.datastreams import (
     DdcYamlTransformer,
 )
+from invenio_vocabularies_extra.contrib.subjects.gnd.datastreams import (
+    GNDSubjectMarc21Transformer,
+)
 from invenio_vocabularies_extra.contrib.subjects.mesh.datastreams import (
+    MeSHMultilingualTransformer,
     MeSHSubjectXMLTransformer,
 )
+from invenio_vocabularies_extra.datastreams.iso2709 import parse_iso2709
+from invenio_vocabularies_extra.datastreams.readers import mesh_descriptor_terms
+from invenio_vocabularies_extra.datastreams.transformers import (
+    Marc21MappingTransformer,
+)
 
 
 def test_ddc_transformer(app, expected_ddc_result):
@@ -31,6 +46,72 @@ def test_ddc_transformer(app, expected_ddc_result):
     assert expected_ddc_result == transformer.apply(ddc_entry).entry
 
 
+def test_gnd_transformer(app, gnd_marc21_record, expected_gnd_result):
+    transformer = GNDSubjectMarc21Transformer()
+
+    gnd_entry = StreamEntry({"record": gnd_marc21_record.encode("utf-8")})
+    assert expected_gnd_result == transformer.apply(gnd_entry).entry
+
+    gnd_entry = StreamEntry({"record": etree.fromstring(gnd_marc21_record)})
+    assert expected_gnd_result == transformer.apply(gnd_entry).entry
+
+    binary = dump_iso2709(etree.fromstring(gnd_marc21_record))
+    gnd_entry = StreamEntry({"record": parse_iso2709(binary)})
+    assert expected_gnd_result == transformer.apply(gnd_entry).entry
+
+    # only the number of the DNB is the IDN
+    record = gnd_marc21_record.replace(
+        '<subfield code="a">(DE-101)04558957X</subfield>',
+        '<subfield code="a">(DE-588)4558957-4</subfield>'
+        '</datafield><datafield tag="035" ind1=" " ind2=" ">'
+        '<subfield code="a">(DE-101)04558957X</subfield>',
+    )
+    gnd_entry = StreamEntry({"record": record.encode("utf-8")})
+    assert expected_gnd_result == transformer.apply(gnd_entry).entry
+
+
+def test_gnd_transformer_pickled(app, gnd_marc21_record, expected_gnd_result):
+    # the transform worker processes get the transformers pickled
+    transformer = pickle.loads(pickle.dumps(GNDSubjectMarc21Transformer()))
+
+    gnd_entry = StreamEntry({"record": gnd_marc21_record.encode("utf-8")})
+    assert expected_gnd_result == transformer.apply(gnd_entry).entry
+
+
+def test_gnd_transformer_deleted(app):
+    transformer = GNDSubjectMarc21Transformer()
+
+    # the OAI-PMH identifiers of the DNB end with the IDN of field 001
+    gnd_entry = StreamEntry(
+        {"deleted": True, "identifier": "oai:dnb.de/authorities/04558957X"}
+    )
+    assert transformer.apply(gnd_entry).entry == {
+        "idn": "04558957X",
+        "deleted": True,
+        "scheme": "GND",
+    }
+
+    with pytest.raises(TransformerError):
+        transformer.apply(StreamEntry({"deleted": True}))
+
+
+def test_gnd_transformer_empty_suffix(app, gnd_marc21_record):
+    transformer = GNDSubjectMarc21Transformer()
+    record = gnd_marc21_record.replace(
+        '<subfield code="a">Mozartjahr</subfield>',
+        '<subfield code="a">Mozartjahr</subfield><subfield code="g"/>',
+    ).replace(
+        '<subfield code="a">Mozart-Feier</subfield>',
+        '<subfield code="a">Mozart-Feier</subfield><subfield code="g">1956</subfield>',
+    )
+
+    entry = transformer.apply(StreamEntry({"record": record.encode("utf-8")})).entry
+
+    # like the hand-written transformer, an empty $g adds an empty suffix
+    assert entry["subject"] == entry["title"]["de"] == "Mozartjahr <>"
+    assert entry["synonyms"] == ["Mozart-Jahr", "Mozart-Feier <1956>"]
+
+
 def test_mesh_transformer(app, expected_mesh_result):
     mesh_descriptor = """
         <DescriptorRecord DescriptorClass="1">
@@ -271,3 +352,117 @@ def test_mesh_transformer(app, expected_mesh_result):
 
     transformer = MeSHSubjectXMLTransformer()
     assert expected_mesh_result == transformer.apply(mesh_entry).entry
+
+    mesh_entry = StreamEntry({"record": etree.fromstring(mesh_descriptor)})
+    assert expected_mesh_result == transformer.apply(mesh_entry).entry
+
+    descriptor_ui, terms = mesh_descriptor_terms(etree.fromstring(mesh_descriptor))
+    joined = StreamEntry({"id": descriptor_ui, "descriptors": {"de": terms}})
+    assert expected_mesh_result == MeSHMultilingualTransformer().apply(joined).entry
+
+
+def test_mesh_multilingual_transformer(app):
+    app.config["I18N_LANGUAGES"] = [("de", "German"), ("fr", "French")]
+    joined = {
+        "id": "D000003",
+        "descriptors": {
+            "de": {
+                "name": "Schlachthöfe[Abattoirs]",
+                "synonyms": ["Slaughterhouses", "Schlachthäuser"],
+            },
+            "fr": {
+                "name": "Abattoirs",
+                "synonyms": ["Slaughterhouses", "Tuerie"],
+            },
+            "en": {"name": "Abattoir", "synonyms": ["Slaughterhouses"]},
+        },
+    }
+
+    entry = MeSHMultilingualTransformer().apply(StreamEntry(joined)).entry
+
+    assert entry["id"] == "mesh:D000003"
+    assert entry["title"] == {"de": "Schlachthöfe", "fr": "Abattoirs", "en": "Abattoir"}
+    assert entry["subject"] == "Schlachthöfe"
+    assert entry["synonyms"] == ["Slaughterhouses", "Schlachthäuser", "Tuerie"]
+
+
+def test_mesh_multilingual_transformer_unsupported_language(app):
+    app.config["VOCABULARIES_EXTRA_SUBJECTS_MESH_LANG"] = "fr"
+    joined = {
+        "id": "D000003",
+        "descriptors": {
+            "de": {"name": "Schlachthöfe[Abattoirs]"},
+            "fr": {"name": "Abattoirs"},
+        },
+    }
+
+    entry = MeSHMultilingualTransformer().apply(StreamEntry(joined)).entry
+
+    # French is not a language of the instance
+    assert entry["title"] == {"de": "Schlachthöfe", "en": "Abattoirs"}
+    assert entry["subject"] == "Abattoirs"
+
+
+def test_marc21_mapping_transformer(app):
+    record = """<record xmlns="http://www.loc.gov/MARC21/slim">
+  <datafield tag="100"><subfield code="a">Mozart, Wolfgang Amadeus</subfield>
+    <subfield code="d">1756-1791</subfield></datafield>
+  <datafield tag="400"><subfield code="a">Mozart, W. A.</subfield></datafield>
+  <datafield tag="400"><subfield code="a">Mozart, W. A.</subfield></datafield>
+  <datafield tag="400"><subfield code="a">Motzart, Wolfgang</subfield></datafield>
+  <datafield tag="700"><subfield code="a">Mozart, Wolfgang Amadeus</subfield>
+    <subfield code="4">EQ</subfield><subfield code="9">L:eng</subfield>
+    <subfield code="9">L:fre</subfield></datafield>
+  <datafield tag="700"><subfield code="a">Mozart</subfield>
+    <subfield code="4">CLOSE</subfield><subfield code="9">L:ita</subfield></datafield>
+</record>"""
+    mapping = {
+        "defaults": {"name": {}, "aliases": [], "links": []},
+        "rules": [
+            {
+                "tag": "100",
+                "first": True,
+                "value": {"code": "a", "suffix": "d", "suffix_format": " ({})"},
+                "target": ["name.de", "label"],
+            },
+            {
+                "tag": "100",
+                "value": "d",
+                "target": "links",
+                "append": True,
+                "format": {"scheme": "dates", "value": "{}"},
+            },
+            {
+                "tag": "400",
+                "value": "a",
+                "target": "aliases",
+                "append": True,
+                "unique": True,
+            },
+            {
+                "tag": "700",
+                "when": {"4": "EQ"},
+                "value": "a",
+                "language": {
+                    "code": "9",
+                    "prefix": "L:",
+                    "map": {"eng": "en", "fre": "fr"},
+                },
+                "target": "name.{lang}",
+            },
+        ],
+    }
+    transformer = Marc21MappingTransformer(mapping=mapping)
+
+    result = transformer.apply(StreamEntry({"record": record.encode()})).entry
+
+    assert result == {
+        "name": {
+            "de": "Mozart, Wolfgang Amadeus (1756-1791)",
+            "en": "Mozart, Wolfgang Amadeus",
+            "fr": "Mozart, Wolfgang Amadeus",
+        },
+        "label": "Mozart, Wolfgang Amadeus (1756-1791)",
+        "aliases": ["Mozart, W. A.", "Motzart, Wolfgang"],
+        "links": [{"scheme": "dates", "value": "1756-1791"}],
+    }
@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2025 University of Münster.
+#
+# invenio-vocabularies-extra is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Custom writers tests."""
+
+import json
+from types import SimpleNamespace
+
+from invenio_pidstore.errors import PIDDoesNotExistError
+from invenio_vocabularies.datastreams import StreamEntry
+
+from invenio_vocabularies_extra.datastreams.manifest import content_hash
+from invenio_vocabularies_extra.datastreams.writers import SubjectsBulkWriter
+from invenio_vocabularies_extra.resolver import SubjectResolver
+
+
+class FakeRedis:
+    """Redis client keeping the values in a dict."""
+
+    def __init__(self):
+        """Constructor."""
+        self.values = {}
+
+    def set(self, key, value, ex=None):
+        """Sets a value."""
+        self.values[key] = value
+
+    def delete(self, *keys):
+        """Removes the keys."""
+        for key in keys:
+            self.values.pop(key, None)
+
+    def pipeline(self):
+        """Pipeline executing the commands right away."""
+        return SimpleNamespace(set=self.set, execute=lambda: None)
+
+    def publish(self, channel, message):
+        """Drops the message, there are no subscribers."""
+
+
+class FakeSession:
+    """Database session counting the commits."""
+
+    def __init__(self):
+        """Constructor."""
+        self.commits = 0
+
+    def begin_nested(self):
+        """Starts a transaction."""
+
+    def commit(self):
+        """Commits the transaction."""
+        self.commits += 1
+
+    def rollback(self):
+        """Rolls the transaction back."""
+
+
+class FakeRecord:
+    """Subject record."""
+
+    def __init__(self, pid):
+        """Constructor."""
+        self.id = f"uuid-{pid}"
+        self.deleted = False
+
+    def delete(self):
+        """Deletes the record."""
+        self.deleted = True
+
+
+class FakeSubjectsService:
+    """Subjects service recording the batches, failing on a broken subject."""
+
+    def __init__(self, records=()):
+        """Constructor."""
+        self.batches = []
+        self.records = {pid: FakeRecord(pid) for pid in records}
+        self.bulk_deleted = []
+        self.record_cls = SimpleNamespace(pid=SimpleNamespace(resolve=self._resolve))
+        self.indexer = SimpleNamespace(bulk_delete=self.bulk_deleted.append)
+        self.links_item_tpl = None
+        self.searches = []
+
+    def result_item(self, service, identity, record, links_tpl=None):
+        """Result item dumping the record."""
+        return SimpleNamespace(to_dict=lambda: dict(record, dumped=True))
+
+    def _resolve(self, pid):
+        """Resolves the record of a pid."""
+        if pid not in self.records:
+            raise PIDDoesNotExistError("subid", pid)
+        return self.records[pid]
+
+    def search(self, identity, params=None, extra_filter=None):
+        """Hits of the records with an IDN of the terms query."""
+        self.searches.append(extra_filter.to_dict())
+        idns = extra_filter.to_dict()["bool"]["must"][0]["terms"]["props.idn.keyword"]
+        return SimpleNamespace(
+            hits=[
+                {"id": pid, "scheme": "GND", "props": {"idn": f"idn-{pid}"}}
+                for pid in self.records
+                if f"idn-{pid}" in idns
+            ]
+        )
+
+    def require_permission(self, identity, action, **kwargs):
+        """Everything is permitted."""
+
+    def run_components(self, action, *args, **kwargs):
+        """No components."""
+
+    def create_or_update_many(self, identity, data):
+        """Upserts the batch or fails as a whole."""
+        self.batches.append([entry_id for entry_id, _ in data])
+        if any(entry["title"] is None for _, entry in data):
+            raise RuntimeError("transaction failed")
+        return SimpleNamespace(
+            results=[
+                SimpleNamespace(
+                    record=entry,
+                    errors=["invalid"] if entry["title"] == "invalid" else [],
+                    op_type="create",
+                    exc=None,
+                )
+                for _, entry in data
+            ]
+        )
+
+
+def test_subjects_bulk_writer(app, monkeypatch):
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=SimpleNamespace(rollback=lambda: None)),
+    )
+    service = FakeSubjectsService()
+    writer = SubjectsBulkWriter(service_or_name=service, batch_size=3)
+    entries = [{"id": f"{idx}", "title": f"Subject {idx}"} for idx in range(7)]
+    entries[1]["title"] = "invalid"
+    entries[4]["title"] = None
+    del entries[6]["id"]
+
+    results = writer.write_many([StreamEntry(entry) for entry in entries])
+
+    assert [result.entry for result in results] == entries
+    assert [bool(result.errors) for result in results] == [
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
+    # the failed batch is written again one by one
+    assert service.batches == [
+        ["0", "1", "2"],
+        ["3", "4", "5"],
+        ["3"],
+        ["4"],
+        ["5"],
+    ]
+
+
+def test_subjects_bulk_writer_deletes(app, monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=session),
+    )
+    service = FakeSubjectsService(records=["gnd:1", "gnd:2", "gnd:3"])
+    writer = SubjectsBulkWriter(service_or_name=service, batch_size=10)
+    entries = [
+        {"id": "gnd:1", "deleted": True},
+        {"id": "gnd:4", "title": "Subject 4"},
+        {"id": "gnd:2", "deleted": True},
+        {"id": "gnd:5", "deleted": True},
+    ]
+
+    results = writer.write_many([StreamEntry(entry) for entry in entries])
+
+    assert [result.entry for result in results] == entries
+    assert not any(result.errors for result in results)
+    assert [result.op_type for result in results] == [
+        "delete",
+        "create",
+        "delete",
+        "delete",
+    ]
+    # all deletions in one transaction and one bulk request
+    assert session.commits == 1
+    assert service.bulk_deleted == [["uuid-gnd:1", "uuid-gnd:2"]]
+    assert [pid for pid, record in service.records.items() if record.deleted] == [
+        "gnd:1",
+        "gnd:2",
+    ]
+    assert service.batches == [["gnd:4"]]
+
+
+def test_subjects_bulk_writer_deletes_by_idn(app, monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=session),
+    )
+    service = FakeSubjectsService(records=["gnd:1", "gnd:2", "gnd:3"])
+    writer = SubjectsBulkWriter(service_or_name=service, batch_size=3)
+    entries = [
+        {"idn": "idn-gnd:1", "deleted": True, "scheme": "GND"},
+        {"idn": "idn-gnd:9", "deleted": True, "scheme": "GND"},
+        {"idn": "idn-gnd:2", "deleted": True, "scheme": "GND"},
+        {"idn": "idn-gnd:3", "deleted": True, "scheme": "GND"},
+    ]
+
+    results = writer.write_many([StreamEntry(entry) for entry in entries])
+
+    # one search per batch resolves its IDNs
+    assert service.searches == [
+        {
+            "bool": {
+                "must": [
+                    {
+                        "terms": {
+                            "props.idn.keyword": [f"idn-gnd:{idn}" for idn in idns]
+                        }
+                    },
+                    {"terms": {"scheme": ["GND"]}},
+                ]
+            }
+        }
+        for idns in ((1, 2, 9), (3,))
+    ]
+    assert not any(result.errors for result in results)
+    # the unknown IDN is skipped
+    assert [result.op_type for result in results] == [
+        "delete",
+        "skip",
+        "delete",
+        "delete",
+    ]
+    assert [result.entry.get("id") for result in results] == [
+        "gnd:1",
+        None,
+        "gnd:2",
+        "gnd:3",
+    ]
+    # the matches of a batch are deleted with one bulk request
+    assert service.bulk_deleted == [["uuid-gnd:1", "uuid-gnd:2"], ["uuid-gnd:3"]]
+    assert session.commits == 2
+
+
+def test_subjects_bulk_writer_updates_cache(app, monkeypatch):
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=FakeSession()),
+    )
+    service = FakeSubjectsService(records=["gnd:1"])
+    resolver = SubjectResolver(service_or_name=service)
+    app.extensions["invenio-vocabularies-extra"] = SimpleNamespace(
+        subject_resolver=resolver
+    )
+    resolver.prime(
+        [
+            {"id": "gnd:1", "scheme": "GND", "title": "Stale 1"},
+            {"id": "gnd:2", "scheme": "GND", "title": "Stale 2"},
+        ]
+    )
+    writer = SubjectsBulkWriter(service_or_name=service, batch_size=10)
+    entries = [
+        {"id": "gnd:1", "scheme": "GND", "deleted": True},
+        {"id": "gnd:2", "scheme": "GND", "title": "Subject 2"},
+        {"id": "gnd:3", "scheme": "GND", "title": "invalid"},
+    ]
+
+    writer.write_many([StreamEntry(entry) for entry in entries])
+
+    # the written subjects are invalidated, but not warmed by default
+    assert resolver.local.get("GND:gnd:1") is None
+    assert resolver.local.get("GND:gnd:2") is None
+    assert resolver.local.get("GND:gnd:3") is None
+
+    # without a shared cache only the importing process would see them
+    app.config["VOCABULARIES_EXTRA_SUBJECTS_CACHE_WARM"] = True
+    writer.write_many([StreamEntry(entries[1])])
+    assert resolver.local.get("GND:gnd:2") is None
+
+
+def test_subjects_bulk_writer_warms_shared_cache(app, monkeypatch):
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=FakeSession()),
+    )
+    app.config["VOCABULARIES_EXTRA_SUBJECTS_CACHE_WARM"] = True
+    service = FakeSubjectsService(records=[])
+    shared = FakeRedis()
+    resolver = SubjectResolver(service_or_name=service, redis_client=shared)
+    app.extensions["invenio-vocabularies-extra"] = SimpleNamespace(
+        subject_resolver=resolver
+    )
+    writer = SubjectsBulkWriter(service_or_name=service, batch_size=10)
+    entry = {"id": "gnd:2", "scheme": "GND", "title": "Subject 2"}
+
+    writer.write_many([StreamEntry(entry)])
+
+    key = "vocabularies-extra:subjects:GND:gnd:2"
+    assert json.loads(shared.values[key]) == dict(entry, dumped=True)
+    assert resolver.local.get("GND:gnd:2") == dict(entry, dumped=True)
+
+
+def test_subjects_bulk_writer_journals_manifest(app, monkeypatch, tmp_path):
+    app.config["VOCABULARIES_EXTRA_CACHE_DIR"] = str(tmp_path)
+    monkeypatch.setattr(
+        "invenio_vocabularies_extra.datastreams.writers.db",
+        SimpleNamespace(session=FakeSession()),
+    )
+    service = FakeSubjectsService(records=["gnd:1"])
+    writer = SubjectsBulkWriter(
+        service_or_name=service, batch_size=10, manifest="subjects"
+    )
+    entries = [
+        {"id": "gnd:1", "deleted": True},
+        {"id": "gnd:2", "title": "Subject 2"},
+        {"id": "gnd:3", "title": "invalid"},
+    ]
+
+    writer.write_many([StreamEntry(entry) for entry in entries])
+
+    path = tmp_path / "manifests" / "subjects.json.journal"
+    journal = [json.loads(line) for line in path.read_text().splitlines()]
+    assert journal == [
+        ["gnd:1", None],
+        ["gnd:2", content_hash(entries[1])],
+        ["gnd:3", None],
+    ]